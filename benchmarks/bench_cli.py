@@ -0,0 +1,41 @@
+"""Benchmarks of `opet-cli` startup and single-province runs."""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.common import summarize
+
+
+def _time_command(args, env, iterations):
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable] + args,
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies)
+
+
+def run(stub, iterations):
+    """Measures interpreter startup, CLI import and `--il 34` runs."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, OPET_API_URL=stub.url, OPET_CACHE_DIR=cache_dir)
+        return {
+            "python_startup": _time_command(["-c", "pass"], env, iterations),
+            "import_cli": _time_command(
+                ["-c", "import opet.main"], env, iterations
+            ),
+            "cli_help": _time_command(
+                ["-m", "opet.main", "--help"], env, iterations
+            ),
+            "cli_price": _time_command(
+                ["-m", "opet.main", "--il", "34"], env, iterations
+            )
+        }
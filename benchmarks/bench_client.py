@@ -0,0 +1,29 @@
+"""Benchmarks of `OpetApiClient` calls against the stub upstream."""
+
+from benchmarks.common import measure
+from opet.api import OpetApiClient
+from opet.cache import PriceCache
+from opet.transport import HttpTransport
+
+
+def run(stub, iterations):
+    """Measures uncached and cached client calls."""
+    transport = HttpTransport()
+    uncached = OpetApiClient(transport=transport, cache=PriceCache(maxsize=0))
+    uncached.url = stub.url
+    cached = OpetApiClient(transport=transport)
+    cached.url = stub.url
+    cached.price("34")
+    results = {
+        "get_last_update": measure(uncached.get_last_update, iterations),
+        "get_price": measure(lambda: uncached.get_price("34"), iterations),
+        "price_uncached": measure(lambda: uncached.price("34"), iterations),
+        "price_cached": measure(lambda: cached.price("34"), iterations),
+        "get_all_prices": measure(
+            lambda: uncached.get_all_prices(max_concurrency=16),
+            max(1, iterations // 20)
+        )
+    }
+    results["transport"] = transport.stats()
+    transport.close()
+    return results
@@ -0,0 +1,69 @@
+"""Micro-benchmark of the size and CPU cost of encoding all prices.
+
+Encodes the price results of every province, as `/fuel/prices` returns
+them, with each available JSON backend in both output modes, with and
+without gzip, and reports the response size and the time per response.
+
+Usage:
+    python -m benchmarks.bench_encoding [--products N] [--number N]
+"""
+
+import argparse
+import gzip
+import json
+import timeit
+from opet.serialization import MODES, available_backends, dumps_bytes
+
+
+def make_results(provinces, products):
+    return {
+        "results": {
+            f"{code:02d}": {
+                "province": f"İl {code}",
+                "lastUpdate": "2024-01-01T06:00:00",
+                "prices": [
+                    {"name": f"Ürün {i}", "amount": round(40.0 + i * 1.37, 2)}
+                    for i in range(products)
+                ]
+            }
+            for code in range(1, provinces + 1)
+        },
+        "errors": {},
+        "lastUpdate": "2024-01-01T06:00:00"
+    }
+
+
+def run(provinces=81, products=12, number=200, compresslevel=6):
+    """Returns size and time per response for every encoding."""
+    data = make_results(provinces, products)
+    report = {}
+    for backend in available_backends():
+        for mode in MODES:
+            body = dumps_bytes(data, mode, backend)
+            compressed = gzip.compress(body, compresslevel)
+            for name, func, size in (
+                ("plain", lambda: dumps_bytes(data, mode, backend), body),
+                ("gzip", lambda: gzip.compress(
+                    dumps_bytes(data, mode, backend), compresslevel
+                ), compressed),
+            ):
+                seconds = min(timeit.repeat(func, number=number, repeat=3))
+                report[f"{backend}_{mode}_{name}"] = {
+                    "bytes": len(size),
+                    "us": round(seconds / number * 1e6, 1)
+                }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--provinces", type=int, default=81)
+    parser.add_argument("--products", type=int, default=12)
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+    report = run(args.provinces, args.products, args.number)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
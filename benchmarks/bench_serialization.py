@@ -0,0 +1,73 @@
+"""Micro-benchmark of the per-request CPU cost of the prices endpoint.
+
+Compares, for a cached price result, the old server path (format with
+`to_json(indent=2)`, parse with `json.loads`, build a pydantic model and
+serialize it again) with the structured path (validate and serialize the
+dictionary once) and `OpetProvider.render`, which the endpoint calls on the
+result read from the price cache, with and without `prerender`.
+
+Usage:
+    python -m benchmarks.bench_serialization [--products N] [--number N]
+"""
+
+import argparse
+import json
+import timeit
+from fastapi.encoders import jsonable_encoder
+from opet.cache import PriceCache
+from opet.server.models.fuel import PriceResponse
+from opet.server.providers.opet import OpetProvider, render_json
+from opet.utils import to_json
+
+
+def make_result(products):
+    return {
+        "province": "İstanbul",
+        "lastUpdate": "2024-01-01T06:00:00",
+        "prices": [
+            {"name": f"Product {i}", "amount": 40.0 + i}
+            for i in range(products)
+        ]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, default=12)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+    result = make_result(args.products)
+    cache = PriceCache(ttl=float("inf"))
+    cache.put("34", result)
+    plain = OpetProvider()
+    prerendered = OpetProvider(prerender=True)
+
+    def json_round_trip():
+        text = to_json({"results": result})
+        model = PriceResponse(**json.loads(text)["results"])
+        return render_json(jsonable_encoder(model))
+
+    def structured():
+        model = PriceResponse.model_validate(result)
+        return render_json(model.model_dump(mode="json"))
+
+    def render():
+        return plain.render(cache.get("34"))
+
+    def render_prerendered():
+        return prerendered.render(cache.get("34"))
+
+    report = {"products": args.products, "number": args.number}
+    for name, func in (
+        ("json_round_trip", json_round_trip),
+        ("structured", structured),
+        ("render", render),
+        ("prerendered", render_prerendered),
+    ):
+        seconds = min(timeit.repeat(func, number=args.number, repeat=3))
+        report[name + "_us"] = round(seconds / args.number * 1e6, 3)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
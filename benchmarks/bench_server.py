@@ -0,0 +1,104 @@
+"""Throughput and latency of the FastAPI server under concurrent load.
+
+The server is started as a separate uvicorn process running
+`opet.server.app:app` against the stub upstream, once proxying requests
+and once serving them from the background-refreshed snapshot.
+"""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import httpx
+from benchmarks.common import summarize
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class _ServerProcess:
+    """Runs uvicorn with the given environment until the block exits."""
+
+    def __init__(self, env):
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self.env = env
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "opet.server.app:app",
+                "--host", "127.0.0.1", "--port", str(self.port),
+                "--log-level", "warning"
+            ],
+            env=self.env
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                response = httpx.get(f"{self.url}/fuel/last-update")
+                if (self.env.get("OPET_REFRESH") != "1"
+                        or "X-Snapshot-Age" in response.headers):
+                    return self
+            except httpx.TransportError:
+                pass
+            time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError("server did not start")
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait()
+
+
+async def _load(url, paths, requests, concurrency):
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker(client):
+        for i in remaining:
+            started = time.perf_counter()
+            response = await client.get(paths[i % len(paths)])
+            latencies.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits) as client:
+        await client.get(paths[0])
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    result = summarize(latencies)
+    result["requests_per_second"] = round(requests / elapsed, 1)
+    return result
+
+
+def run(stub, requests, concurrency, cache_dir):
+    """Measures proxied and snapshot-served endpoints."""
+    results = {}
+    for mode in ("proxy", "snapshot"):
+        env = dict(
+            os.environ,
+            OPET_API_URL=stub.url,
+            OPET_CACHE_DIR=cache_dir,
+            OPET_REFRESH="1" if mode == "snapshot" else "0"
+        )
+        with _ServerProcess(env) as server:
+            for name, paths in (
+                ("prices_single", ["/fuel/prices/34"]),
+                ("prices_rotating", [
+                    f"/fuel/prices/{code}" for code in range(1, 82)
+                ]),
+                ("prices_all", ["/fuel/prices"]),
+            ):
+                count = requests if name != "prices_all" else requests // 10
+                results[f"{mode}.{name}"] = asyncio.run(
+                    _load(server.url, paths, max(count, 1), concurrency)
+                )
+    return results
@@ -0,0 +1,33 @@
+"""Helpers shared by the benchmark modules."""
+
+import time
+from typing import Callable, Dict, List
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """Summarizes latencies given in seconds as milliseconds."""
+    ordered = sorted(latencies)
+    count = len(ordered)
+
+    def percentile(p: float) -> float:
+        index = min(count - 1, max(0, int(round(p / 100 * count)) - 1))
+        return round(ordered[index] * 1000, 3)
+
+    return {
+        "count": count,
+        "mean_ms": round(sum(ordered) / count * 1000, 3),
+        "p50_ms": percentile(50),
+        "p90_ms": percentile(90),
+        "p99_ms": percentile(99),
+        "max_ms": round(ordered[-1] * 1000, 3)
+    }
+
+
+def measure(func: Callable[[], object], iterations: int) -> Dict[str, float]:
+    """Calls `func` repeatedly and summarizes the latency of each call."""
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - started)
+    return summarize(latencies)
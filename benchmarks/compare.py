@@ -0,0 +1,57 @@
+"""Compares two benchmark reports and flags regressions.
+
+Latency metrics (`*_ms`) regress when they grow, `requests_per_second`
+when it shrinks, by more than the threshold. Exits with status 1 if any
+metric regressed.
+
+Usage:
+    python -m benchmarks.compare BASELINE.json CANDIDATE.json [--threshold]
+"""
+
+import argparse
+import json
+import sys
+
+
+def flatten(data, prefix=""):
+    """Flattens nested dicts into dotted metric names."""
+    items = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            items.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)):
+            items[name] = value
+    return items
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed relative change, e.g. 0.10 for 10%%.")
+    args = parser.parse_args(argv)
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = flatten(json.load(f)["results"])
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = flatten(json.load(f)["results"])
+
+    regressions = 0
+    for name in sorted(set(baseline) & set(candidate)):
+        old, new = baseline[name], candidate[name]
+        if name.endswith("_ms"):
+            worse = new > old * (1 + args.threshold)
+        elif name.endswith("requests_per_second"):
+            worse = new < old * (1 - args.threshold)
+        else:
+            continue
+        change = (new - old) / old * 100 if old else 0.0
+        flag = "REGRESSION" if worse else ""
+        regressions += worse
+        print(f"{name:55} {old:>12} {new:>12} {change:+8.1f}% {flag}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Runs the benchmark suite against a local stub of the Opet API.
+
+Results are printed, or written with `--output`, as JSON so that runs of
+different releases can be compared with `benchmarks.compare`.
+
+Usage:
+    python -m benchmarks.run [--latency-ms N] [--products N]
+                             [--only client,cli,server] [--output FILE]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from benchmarks import bench_cli, bench_client, bench_server
+from tests.stub_upstream import StubUpstream
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency-ms", type=float, default=5.0,
+                        help="Delay of every stub response.")
+    parser.add_argument("--products", type=int, default=12,
+                        help="Number of products per province.")
+    parser.add_argument("--iterations", type=int, default=200,
+                        help="Calls per client benchmark.")
+    parser.add_argument("--cli-iterations", type=int, default=10,
+                        help="Runs per CLI benchmark.")
+    parser.add_argument("--requests", type=int, default=2000,
+                        help="Requests per server benchmark.")
+    parser.add_argument("--concurrency", type=int, default=32,
+                        help="Concurrent connections for server benchmarks.")
+    parser.add_argument("--only", default="client,cli,server",
+                        help="Comma separated benchmark groups to run.")
+    parser.add_argument("--output", help="Write the JSON report here.")
+    args = parser.parse_args(argv)
+    groups = set(args.only.split(","))
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform()
+        },
+        "config": vars(args),
+        "results": {}
+    }
+    with StubUpstream(
+        latency=args.latency_ms / 1000, product_count=args.products
+    ) as stub, tempfile.TemporaryDirectory() as cache_dir:
+        if "client" in groups:
+            report["results"]["client"] = bench_client.run(
+                stub, args.iterations
+            )
+        if "cli" in groups:
+            report["results"]["cli"] = bench_cli.run(
+                stub, args.cli_iterations
+            )
+        if "server" in groups:
+            report["results"]["server"] = bench_server.run(
+                stub, args.requests, args.concurrency, cache_dir
+            )
+        report["upstream_hits"] = dict(stub.hits)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
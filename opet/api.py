@@ -1,9 +1,32 @@
 """Provides access to Opet Fuel Prices API through OpetApiClient."""
 
+from opet.cache import PriceCache
 from opet.utils import http_get, to_json
 from opet.exceptions import ProvinceNotFoundError
-from typing import List, Dict, Any, Optional
-from typing_extensions import TypedDict
+from opet.metrics import record_error, record_stale
+from opet.products import PRODUCT_INDEX, FuelTypes, fuel_type_key
+from opet.provinces import ProvinceCatalog
+from opet.stats import PriceStats, ProductStats, RankedPrice
+from opet.transport import HttpTransport
+import os
+import time
+from typing import (
+    TYPE_CHECKING, Iterable, Iterator, List, Dict, Any, Optional, Tuple,
+    cast
+)
+try:
+    from typing import TypedDict
+except ImportError:  # Python < 3.8
+    from typing_extensions import TypedDict
+
+if TYPE_CHECKING:
+    from opet.history import PriceHistory
+    from opet.table import PriceTable
+
+API_URL: str = "https://api.opet.com.tr/api/fuelprices"
+
+# Fields of a price result that can be selected with `fields`
+RESULT_FIELDS: Tuple[str, ...] = ("province", "lastUpdate", "prices")
 
 
 class FuelPrice(TypedDict):
@@ -23,77 +46,686 @@ class LastUpdateInfo(TypedDict):
     lastUpdateDate: str
 
 
-class FormattedPriceResult(TypedDict):
-    """Price result structure."""
+class _PriceResult(TypedDict):
     province: str
     lastUpdate: str
     prices: List[FuelPrice]
 
 
+class FormattedPriceResult(_PriceResult, total=False):
+    """Price result structure.
+
+    `stale` is only present, and True, on last known good prices served
+    because the upstream API failed.
+    """
+    stale: bool
+
+
 class PriceResponse(TypedDict):
     """Main JSON response structure."""
     results: FormattedPriceResult
 
 
-class OpetApiClient:
-    """Opet Fuel Prices API client."""
+class BulkPriceResult(TypedDict):
+    """Prices of many provinces, keyed by normalized plate code."""
+    lastUpdate: str
+    results: Dict[str, FormattedPriceResult]
+    errors: Dict[str, str]
 
-    def __init__(self) -> None:
-        """Loads the list of provinces."""
-        self.url: str = "https://api.opet.com.tr/api/fuelprices"
-        self._provinces_list: List[Province] = self.get_provinces()
-        self._provinces_map: Dict[str, str] = {
-            str(item['code']): item['name'] for item in self._provinces_list
-        }
 
-    def get_last_update(self) -> LastUpdateInfo:
-        """Returns the last update time."""
-        return http_get(f"{self.url}/lastupdate")
+def normalize_plate_code(plate_code: str) -> str:
+    """Normalizes plate code by removing leading zeros if numeric."""
+    if plate_code.isdigit():
+        return str(int(plate_code))
+    return plate_code
 
-    def get_provinces(self) -> List[Province]:
-        """Returns all provinces."""
-        return http_get(f"{self.url}/provinces")
 
-    def get_price(self, province_id: str) -> List[FuelPrice]:
-        """Returns fuel prices for a province."""
-        url: str = (
+def select_prices(
+    prices: List[FuelPrice], fuel_types: Optional[FuelTypes]
+) -> List[FuelPrice]:
+    """Returns the prices of the products matching any of `fuel_types`.
+
+    A product matches if its name contains the fuel type, ignoring case,
+    so "motorin" matches both "Motorin UltraForce" and "Motorin EcoForce".
+    Without fuel types `prices` is returned unchanged.
+    """
+    key = fuel_type_key(fuel_types)
+    if not key:
+        return prices
+    for price in prices:
+        if price["name"] not in PRODUCT_INDEX:
+            PRODUCT_INDEX.add(price["name"])
+    matches = PRODUCT_INDEX.matching(key)
+    return [price for price in prices if price["name"] in matches]
+
+
+def filter_prices(
+    result: FormattedPriceResult, fuel_types: Optional[FuelTypes]
+) -> FormattedPriceResult:
+    """Returns a copy of `result` with only the products of `fuel_types`.
+
+    See `select_prices`. Without fuel types the result is returned
+    unchanged.
+    """
+    if not fuel_type_key(fuel_types):
+        return result
+    filtered: FormattedPriceResult = {
+        **result, "prices": select_prices(result["prices"], fuel_types)
+    }
+    return filtered
+
+
+def validate_fields(fields: Iterable[str]) -> Tuple[str, ...]:
+    """Returns `fields` as a tuple after checking they can be selected.
+
+    Raises:
+        ValueError: If a field is not one of `RESULT_FIELDS`.
+    """
+    fields = tuple(fields)
+    unknown = set(fields).difference(RESULT_FIELDS)
+    if unknown:
+        raise ValueError(
+            f"Unknown field(s): {', '.join(sorted(unknown))}. "
+            f"Valid fields: {', '.join(RESULT_FIELDS)}."
+        )
+    return fields
+
+
+def project_result(
+    result: FormattedPriceResult, fields: Optional[Iterable[str]]
+) -> FormattedPriceResult:
+    """Returns a copy of `result` with only the given fields.
+
+    `stale` is kept whenever it is present. Without fields the result is
+    returned unchanged.
+
+    Raises:
+        ValueError: If a field is not one of `RESULT_FIELDS`.
+    """
+    if fields is None:
+        return result
+    wanted = validate_fields(fields)
+    projected = {
+        key: value for key, value in result.items()
+        if key in wanted or key == "stale"
+    }
+    return cast(FormattedPriceResult, projected)
+
+
+class BaseOpetApiClient:
+    """Request building and response parsing shared by the API clients.
+
+    Subclasses only decide how a request is sent; `OpetApiClient` blocks,
+    `opet.async_api.AsyncOpetApiClient` awaits.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[PriceCache] = None,
+        catalog: Optional[ProvinceCatalog] = None,
+        history: Optional["PriceHistory"] = None,
+        stale_if_error: bool = True
+    ) -> None:
+        """Sets the API base URL, the price cache and the province catalog.
+
+        A default `PriceCache` is created when none is given. Pass
+        `PriceCache(maxsize=0)` to disable caching. The default
+        `ProvinceCatalog` reads the on-disk snapshot lazily, so creating a
+        client makes no request. The `OPET_API_URL` environment variable
+        overrides the API base URL, e.g. to point at a local stub. Prices
+        fetched from the API are recorded in `history` when one is given.
+
+        With `stale_if_error`, a province whose prices cannot be fetched is
+        served from the last prices fetched for it, marked `stale`, instead
+        of raising. Only upstream failures are covered; unknown provinces
+        still raise `ProvinceNotFoundError`.
+
+        Every fetched result is also indexed in `stats`, the nationwide
+        aggregates behind `price_stats` and `cheapest`. Those queries are
+        answered from the index only while it covers every province and
+        its `lastUpdate` was confirmed within the cache TTL.
+        """
+        self.url: str = os.environ.get("OPET_API_URL") or API_URL
+        self.cache: PriceCache = cache if cache is not None else PriceCache()
+        self.catalog: ProvinceCatalog = (
+            catalog if catalog is not None else ProvinceCatalog()
+        )
+        self.history: Optional["PriceHistory"] = history
+        self.stale_if_error: bool = stale_if_error
+        # Last good result of every province as a one-row table
+        self._last_good: Dict[str, "PriceTable"] = {}
+        self.stats: PriceStats = PriceStats()
+        # When `stats` was last checked against `/lastupdate`
+        self._stats_checked: Optional[float] = None
+
+    @property
+    def _provinces_list(self) -> List[Province]:
+        """Returns the province records of the catalog."""
+        return self.catalog.provinces
+
+    @property
+    def _provinces_map(self) -> Dict[str, str]:
+        """Returns the plate code to province name table."""
+        return self.catalog.map
+
+    def _prices_url(self, province_id: str) -> str:
+        """Returns the prices URL for a province."""
+        return (
             f"{self.url}/prices?ProvinceCode={province_id}"
             "&IncludeAllProducts=true"
         )
-        raw_response: List[Dict[str, Any]] = http_get(url)
+
+    @staticmethod
+    def _parse_prices(raw_response: List[Dict[str, Any]]) -> List[FuelPrice]:
+        """Converts a raw prices response into fuel price records."""
         if not raw_response or "prices" not in raw_response[0]:
             return []
+        # Product names repeat in every province; the index interns them
+        # so cached and stored results share one copy of each name.
         response: List[FuelPrice] = [
-            {"name": x["productName"], "amount": x["amount"]}
+            {
+                "name": PRODUCT_INDEX.add(x["productName"]),
+                "amount": x["amount"]
+            }
             for x in raw_response[0]["prices"]
         ]
         return response
 
+    def _stats_due(self) -> bool:
+        """Returns True if `stats` has to be checked before it is queried.
+
+        That is when it misses a province of the catalog, or when its
+        `lastUpdate` was last confirmed more than the cache TTL ago.
+        """
+        return (
+            self._stats_checked is None
+            or time.monotonic() - self._stats_checked >= self.cache.ttl
+            or not self.stats.covers(self._province_codes())
+        )
+
+    def _stats_missing(self, last_update: str) -> List[str]:
+        """Revalidates `stats` and returns the provinces it lacks."""
+        self.stats.revalidate(last_update)
+        self._stats_checked = time.monotonic()
+        return [
+            code for code in self._province_codes() if code not in self.stats
+        ]
+
+    def _province_codes(self) -> List[str]:
+        """Returns the normalized plate codes of the catalog."""
+        return [
+            self._normalize_plate_code(str(code))
+            for code in self._provinces_map
+        ]
+
     def _normalize_plate_code(self, plate_code: str) -> str:
         """Normalizes plate code by removing leading zeros if numeric."""
-        if plate_code.isdigit():
-            return str(int(plate_code))
-        return plate_code
+        return normalize_plate_code(plate_code)
 
-    def price(self, province_id: str) -> str:
-        """Returns prices as JSON for a province."""
-        normalized_id = self._normalize_plate_code(province_id)
-        province_name: Optional[str] = self._provinces_map.get(normalized_id)
+    def _plan_bulk(
+        self, codes: Iterable[str], last_update: str
+    ) -> Tuple[BulkPriceResult, List[Tuple[str, str]]]:
+        """Splits a bulk request into cached results and provinces to fetch.
+
+        The cache is revalidated against `last_update` first, so cached
+        results are only used if they belong to the same update.
+
+        Returns:
+            The partially filled bulk result and the `(code, name)` pairs
+            that still have to be fetched.
+        """
+        self.cache.revalidate(last_update)
+        bulk: BulkPriceResult = {
+            "lastUpdate": last_update, "results": {}, "errors": {}
+        }
+        pending: List[Tuple[str, str]] = []
+        for code in codes:
+            normalized_id = self._normalize_plate_code(str(code))
+            try:
+                name = self._lookup_province(self._provinces_map, str(code))
+            except ProvinceNotFoundError as e:
+                bulk["errors"][normalized_id] = str(e)
+                continue
+            cached = self.cache.get(normalized_id)
+            if cached is not None:
+                bulk["results"][normalized_id] = cached
+            else:
+                pending.append((normalized_id, name))
+        return bulk, pending
+
+    def _record_bulk(
+        self,
+        bulk: BulkPriceResult,
+        code: str,
+        name: str,
+        outcome: Any
+    ) -> None:
+        """Adds a fetched price list, or the exception raised, to `bulk`."""
+        if isinstance(outcome, BaseException):
+            stale = self._stale(code)
+            if stale is not None:
+                bulk["results"][code] = stale
+            else:
+                bulk["errors"][code] = str(outcome) or type(outcome).__name__
+            return
+        bulk["results"][code] = self._make_result(
+            code, name, bulk["lastUpdate"], outcome
+        )
+
+    def _make_result(
+        self,
+        code: str,
+        name: str,
+        last_update: str,
+        prices: List[FuelPrice]
+    ) -> FormattedPriceResult:
+        """Builds the price result of a fetched province and caches it."""
+        result: FormattedPriceResult = {
+            "province": name,
+            "lastUpdate": last_update,
+            "prices": prices
+        }
+        # Imported here; opet.table depends on this module.
+        from opet.table import PriceTable
+        self.cache.put(code, result)
+        self._last_good[code] = PriceTable.from_results({code: result})
+        self.stats.update(code, result)
+        return result
+
+    def _stale(self, code: str) -> Optional[FormattedPriceResult]:
+        """Returns the last good result of a province marked as stale.
+
+        Returns None if `stale_if_error` is off or nothing was fetched yet.
+        """
+        if not self.stale_if_error:
+            return None
+        table = self._last_good.get(code)
+        if table is None:
+            return None
+        result = table.result(code)
+        record_stale()
+        stale: FormattedPriceResult = {
+            "province": result["province"],
+            "lastUpdate": result["lastUpdate"],
+            "prices": result["prices"],
+            "stale": True
+        }
+        return stale
+
+    def _stale_outcomes(
+        self, codes: List[str], error: BaseException
+    ) -> List[Tuple[str, Any]]:
+        """Returns last good results after the batch itself failed.
+
+        Provinces without a last good result get `error` as outcome.
+
+        Raises:
+            The `error` itself if no province has a last good result.
+        """
+        outcomes: List[Tuple[str, Any]] = []
+        found = False
+        for code in codes:
+            normalized_id = self._normalize_plate_code(str(code))
+            try:
+                self._lookup_province(self._provinces_map, str(code))
+            except ProvinceNotFoundError as e:
+                outcomes.append((normalized_id, e))
+                continue
+            stale = self._stale(normalized_id)
+            found = found or stale is not None
+            outcomes.append((normalized_id, stale or error))
+        if not found:
+            raise error
+        return outcomes
+
+    def _stale_bulk(
+        self, codes: List[str], error: BaseException
+    ) -> BulkPriceResult:
+        """Returns `_stale_outcomes` as a bulk result."""
+        bulk: BulkPriceResult = {"lastUpdate": "", "results": {}, "errors": {}}
+        for code, outcome in self._stale_outcomes(codes, error):
+            if isinstance(outcome, BaseException):
+                bulk["errors"][code] = str(outcome) or type(outcome).__name__
+            else:
+                bulk["results"][code] = outcome
+        bulk["lastUpdate"] = max(
+            result["lastUpdate"] for result in bulk["results"].values()
+        )
+        return bulk
+
+    def _planned_outcomes(
+        self, bulk: BulkPriceResult
+    ) -> Iterator[Tuple[str, Any]]:
+        """Yields the unknown provinces and cached results of a plan."""
+        for code, message in bulk["errors"].items():
+            yield code, ProvinceNotFoundError(message)
+        yield from bulk["results"].items()
+
+    def _fetched_results(
+        self, bulk: BulkPriceResult, pending: List[Tuple[str, str]]
+    ) -> Dict[str, FormattedPriceResult]:
+        """Returns the results of `bulk` that were fetched, not cached."""
+        results = bulk["results"]
+        return {
+            code: results[code]
+            for code, _ in pending
+            if code in results and not results[code].get("stale")
+        }
+
+    def _lookup_province(
+        self, provinces_map: Dict[str, str], province_id: str
+    ) -> str:
+        """Returns the province name for a normalized plate code."""
+        province_name: Optional[str] = provinces_map.get(
+            self._normalize_plate_code(province_id)
+        )
         if province_name is None:
-            raise ProvinceNotFoundError(
+            error = ProvinceNotFoundError(
                 f"No province found with plate code {province_id} "
                 "in the system."
             )
-        last_update_info: LastUpdateInfo = self.get_last_update()
-        fuel_prices: List[FuelPrice] = self.get_price(normalized_id)
-        result: PriceResponse = {
-            "results": {
-                "province": province_name,
-                "lastUpdate": last_update_info["lastUpdateDate"],
-                "prices": fuel_prices
-            }
+            record_error(error)
+            raise error
+        return province_name
+
+
+class OpetApiClient(BaseOpetApiClient):
+    """Opet Fuel Prices API client."""
+
+    def __init__(
+        self,
+        transport: Optional[HttpTransport] = None,
+        cache: Optional[PriceCache] = None,
+        catalog: Optional[ProvinceCatalog] = None,
+        history: Optional["PriceHistory"] = None,
+        stale_if_error: bool = True
+    ) -> None:
+        """Creates the client without making any request.
+
+        Requests go through the given transport, or through the shared
+        pooled transport of `opet.utils.http_get` when none is given.
+        """
+        super().__init__(cache, catalog, history, stale_if_error)
+        self.transport: Optional[HttpTransport] = transport
+
+    def _get(self, url: str) -> Any:
+        """Sends a GET request through the client's transport."""
+        if self.transport is None:
+            return http_get(url)
+        return http_get(url, transport=self.transport)
+
+    def get_last_update(self) -> LastUpdateInfo:
+        """Returns the last update time."""
+        return self._get(f"{self.url}/lastupdate")
+
+    def get_provinces(self) -> List[Province]:
+        """Returns all provinces."""
+        return self._get(f"{self.url}/provinces")
+
+    def get_price(
+        self, province_id: str, products: Optional[FuelTypes] = None
+    ) -> List[FuelPrice]:
+        """Returns fuel prices for a province.
+
+        `products` keeps only the products whose name contains one of the
+        given fuel types; see `select_prices`.
+        """
+        return select_prices(
+            self._parse_prices(self._get(self._prices_url(province_id))),
+            products
+        )
+
+    def _record_history(
+        self, results: Dict[str, FormattedPriceResult]
+    ) -> None:
+        """Records freshly fetched price results in the price history."""
+        if self.history is not None and results:
+            self.history.record_many(results)
+
+    def _refresh_catalog(self) -> None:
+        """Refreshes the province catalog from the API if it is stale.
+
+        Failures are ignored; the snapshot or bundled data is used instead.
+        """
+        if not self.catalog.needs_refresh():
+            return
+        try:
+            self.catalog.update(self.get_provinces())
+        except Exception:
+            self.catalog.refresh_failed()
+
+    def price_result(
+        self,
+        province_id: str,
+        products: Optional[FuelTypes] = None,
+        fields: Optional[Iterable[str]] = None
+    ) -> FormattedPriceResult:
+        """Returns the price result of a province as a dictionary.
+
+        `products` keeps only the matching products (see `select_prices`)
+        and `fields` only the given keys of `RESULT_FIELDS`. Filtering
+        happens on the cached full result, so differently filtered calls
+        share one upstream request.
+
+        Raises:
+            ValueError: If `fields` contains an unknown field.
+        """
+        if fields is not None:
+            validate_fields(fields)
+        return project_result(
+            filter_prices(self._price_result(province_id), products), fields
+        )
+
+    def _price_result(self, province_id: str) -> FormattedPriceResult:
+        """Returns the full price result of a province.
+
+        Results are served from the price cache while they are fresh. Once
+        an entry expires, a single `/lastupdate` call revalidates it. The
+        cache builds a new dictionary on every hit, so the caller may keep
+        or modify it. If the upstream API fails, the last good result is
+        returned marked `stale` when there is one.
+        """
+        self._refresh_catalog()
+        province_name = self._lookup_province(
+            self._provinces_map, province_id
+        )
+        normalized_id = self._normalize_plate_code(province_id)
+        last_update_info: Optional[LastUpdateInfo] = None
+        try:
+            if self.cache.revalidation_due(normalized_id):
+                last_update_info = self.get_last_update()
+                self.cache.revalidate(last_update_info["lastUpdateDate"])
+            cached = self.cache.get(normalized_id)
+            if cached is not None:
+                return cached
+            if last_update_info is None:
+                last_update_info = self.get_last_update()
+            fuel_prices: List[FuelPrice] = self.get_price(normalized_id)
+        except Exception:
+            stale = self._stale(normalized_id)
+            if stale is None:
+                raise
+            return stale
+        result = self._make_result(
+            normalized_id,
+            province_name,
+            last_update_info["lastUpdateDate"],
+            fuel_prices
+        )
+        self._record_history({normalized_id: result})
+        return result
+
+    def price(
+        self,
+        province_id: str,
+        products: Optional[FuelTypes] = None,
+        fields: Optional[Iterable[str]] = None
+    ) -> str:
+        """Returns prices as JSON for a province.
+
+        `products` and `fields` work as in `price_result`.
+        """
+        response: PriceResponse = {
+            "results": self.price_result(province_id, products, fields)
         }
-        return to_json(result)
+        return to_json(response)
+
+    def _try_get_price(self, province_id: str) -> Any:
+        """Returns the prices of a province, or the exception raised."""
+        try:
+            return self.get_price(province_id)
+        except Exception as e:
+            return e
+
+    def get_all_prices(
+        self,
+        codes: Optional[Iterable[str]] = None,
+        max_concurrency: int = 8,
+        last_update: Optional[str] = None
+    ) -> BulkPriceResult:
+        """Returns prices for many provinces, fetched concurrently.
+
+        `/lastupdate` is requested once for the whole batch. Provinces
+        whose prices cannot be fetched are reported in `errors` instead of
+        aborting the batch, unless a stale result can be served for them.
+
+        Args:
+            codes: Plate codes to fetch. Defaults to every known province.
+            max_concurrency: Maximum number of requests in flight.
+            last_update: A `lastUpdateDate` the caller has just fetched.
+                         When given, `/lastupdate` is not requested again.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        self._refresh_catalog()
+        codes = list(self._provinces_map if codes is None else codes)
+        if last_update is None:
+            try:
+                last_update = self.get_last_update()["lastUpdateDate"]
+            except Exception as e:
+                return self._stale_bulk(codes, e)
+        bulk, pending = self._plan_bulk(codes, last_update)
+        if not pending:
+            return bulk
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            outcomes = executor.map(
+                self._try_get_price, [code for code, _ in pending]
+            )
+            for (code, name), outcome in zip(pending, outcomes):
+                self._record_bulk(bulk, code, name, outcome)
+        self._record_history(self._fetched_results(bulk, pending))
+        return bulk
+
+    def iter_all_prices(
+        self,
+        codes: Optional[Iterable[str]] = None,
+        max_concurrency: int = 8
+    ) -> Iterator[Tuple[str, Any]]:
+        """Yields the prices of many provinces as each fetch completes.
+
+        Works like `get_all_prices`, but nothing is collected: cached
+        results come first, then fetched ones in completion order.
+
+        Args:
+            codes: Plate codes to fetch. Defaults to every known province.
+            max_concurrency: Maximum number of requests in flight.
+
+        Yields:
+            `(code, outcome)` pairs, where `code` is the normalized plate
+            code and `outcome` the `FormattedPriceResult` or the exception
+            raised for that province.
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        self._refresh_catalog()
+        codes = list(self._provinces_map if codes is None else codes)
+        try:
+            last_update = self.get_last_update()["lastUpdateDate"]
+        except Exception as e:
+            yield from self._stale_outcomes(codes, e)
+            return
+        bulk, pending = self._plan_bulk(codes, last_update)
+        yield from self._planned_outcomes(bulk)
+        if not pending:
+            return
+        fetched: Dict[str, FormattedPriceResult] = {}
+        try:
+            with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+                futures = {
+                    executor.submit(self._try_get_price, code): (code, name)
+                    for code, name in pending
+                }
+                for future in as_completed(futures):
+                    code, name = futures[future]
+                    outcome = future.result()
+                    if isinstance(outcome, BaseException):
+                        outcome = self._stale(code) or outcome
+                    else:
+                        outcome = fetched[code] = self._make_result(
+                            code, name, last_update, outcome
+                        )
+                    yield code, outcome
+        finally:
+            self._record_history(fetched)
+
+    def _fill_stats(self, max_concurrency: int) -> None:
+        """Brings `stats` up to date before a query.
+
+        Nothing is requested while the index is complete and recently
+        confirmed. Otherwise `/lastupdate` is requested once: a new update
+        clears the index, and the provinces it lacks are then fetched. If
+        `/lastupdate` fails, a non-empty index is served as it is when
+        `stale_if_error` is on.
+        """
+        self._refresh_catalog()
+        if not self._stats_due():
+            return
+        try:
+            last_update = self.get_last_update()["lastUpdateDate"]
+        except Exception:
+            if self.stale_if_error and self.stats:
+                return
+            raise
+        missing = self._stats_missing(last_update)
+        if missing:
+            bulk = self.get_all_prices(missing, max_concurrency, last_update)
+            # Stale results, and those served by a shared cache, are
+            # indexed here; fetched ones already are.
+            self.stats.update_many(bulk["results"])
+
+    def price_stats(
+        self,
+        products: Optional[FuelTypes] = None,
+        max_concurrency: int = 8
+    ) -> List[ProductStats]:
+        """Returns the min, max, mean and median of every product nationwide.
+
+        The aggregates are read from `stats`, which is updated whenever a
+        province is fetched. Provinces missing from the index, or every
+        province after a new update, are fetched first; see `__init__`.
+
+        Args:
+            products: Fuel types to include (see `select_prices`).
+                      Defaults to every product.
+            max_concurrency: Maximum number of requests in flight.
+        """
+        self._fill_stats(max_concurrency)
+        return self.stats.all_stats(products)
+
+    def cheapest(
+        self,
+        product: str,
+        n: int = 5,
+        most_expensive: bool = False,
+        max_concurrency: int = 8
+    ) -> List[RankedPrice]:
+        """Returns the `n` provinces where a product is cheapest.
+
+        The index is read as in `price_stats`; see
+        `opet.stats.PriceStats.cheapest` for how `product` is matched.
+        """
+        self._fill_stats(max_concurrency)
+        return self.stats.cheapest(product, n, most_expensive)
 
 
 if __name__ == '__main__':
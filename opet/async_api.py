@@ -0,0 +1,317 @@
+"""Provides asyncio access to Opet Fuel Prices API.
+
+`AsyncOpetApiClient` has the same surface as `opet.api.OpetApiClient`, but
+every method is a coroutine and requests go through a pooled
+`AsyncHttpTransport`, so callers running on an event loop (such as the
+FastAPI server) never block it while waiting for the upstream API.
+"""
+
+import asyncio
+from opet.api import (
+    BaseOpetApiClient,
+    BulkPriceResult,
+    FormattedPriceResult,
+    FuelPrice,
+    LastUpdateInfo,
+    PriceResponse,
+    Province,
+    filter_prices,
+    project_result,
+    select_prices,
+    validate_fields
+)
+from opet.async_transport import AsyncHttpTransport
+from opet.cache import PriceCache
+from opet.products import FuelTypes
+from opet.provinces import ProvinceCatalog
+from opet.stats import ProductStats, RankedPrice
+from opet.utils import to_json
+from typing import (
+    TYPE_CHECKING, Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+)
+
+if TYPE_CHECKING:
+    from opet.history import PriceHistory
+
+
+class AsyncOpetApiClient(BaseOpetApiClient):
+    """Asyncio Opet Fuel Prices API client."""
+
+    def __init__(
+        self,
+        transport: Optional[AsyncHttpTransport] = None,
+        cache: Optional[PriceCache] = None,
+        catalog: Optional[ProvinceCatalog] = None,
+        history: Optional["PriceHistory"] = None,
+        stale_if_error: bool = True
+    ) -> None:
+        """Creates the client without making any request."""
+        super().__init__(cache, catalog, history, stale_if_error)
+        self.transport: AsyncHttpTransport = (
+            transport if transport is not None else AsyncHttpTransport()
+        )
+
+    async def _get(self, url: str) -> Any:
+        """Sends a GET request through the client's transport."""
+        return await self.transport.get(url)
+
+    async def get_last_update(self) -> LastUpdateInfo:
+        """Returns the last update time."""
+        return await self._get(f"{self.url}/lastupdate")
+
+    async def get_provinces(self) -> List[Province]:
+        """Returns all provinces."""
+        return await self._get(f"{self.url}/provinces")
+
+    async def get_price(
+        self, province_id: str, products: Optional[FuelTypes] = None
+    ) -> List[FuelPrice]:
+        """Returns fuel prices for a province.
+
+        `products` works as in `opet.api.OpetApiClient.get_price`.
+        """
+        return select_prices(
+            self._parse_prices(await self._get(self._prices_url(province_id))),
+            products
+        )
+
+    async def _record_history(
+        self, results: Dict[str, FormattedPriceResult]
+    ) -> None:
+        """Records freshly fetched price results in the price history.
+
+        SQLite writes block, so they run in the default executor instead
+        of on the event loop.
+        """
+        if self.history is not None and results:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.history.record_many, results
+            )
+
+    async def _refresh_catalog(self) -> None:
+        """Refreshes the province catalog from the API if it is stale.
+
+        Failures are ignored; the snapshot or bundled data is used instead.
+        """
+        if not self.catalog.needs_refresh():
+            return
+        try:
+            self.catalog.update(await self.get_provinces())
+        except Exception:
+            self.catalog.refresh_failed()
+
+    async def price_result(
+        self,
+        province_id: str,
+        products: Optional[FuelTypes] = None,
+        fields: Optional[Iterable[str]] = None
+    ) -> FormattedPriceResult:
+        """Returns the price result of a province as a dictionary.
+
+        `products` and `fields` work as in
+        `opet.api.OpetApiClient.price_result`.
+        """
+        if fields is not None:
+            validate_fields(fields)
+        return project_result(
+            filter_prices(await self._price_result(province_id), products),
+            fields
+        )
+
+    async def _price_result(self, province_id: str) -> FormattedPriceResult:
+        """Returns the full price result of a province.
+
+        Results are served from the price cache while they are fresh. On a
+        miss, the last update time and the prices are requested
+        concurrently. The cache builds a new dictionary on every hit, so
+        the caller may keep or modify it. If the upstream API fails, the
+        last good result is returned marked `stale` when there is one.
+        """
+        await self._refresh_catalog()
+        province_name = self._lookup_province(
+            self._provinces_map, province_id
+        )
+        normalized_id = self._normalize_plate_code(province_id)
+        last_update_info: Optional[LastUpdateInfo] = None
+        try:
+            if self.cache.revalidation_due(normalized_id):
+                last_update_info = await self.get_last_update()
+                self.cache.revalidate(last_update_info["lastUpdateDate"])
+            cached = self.cache.get(normalized_id)
+            if cached is not None:
+                return cached
+            if last_update_info is None:
+                last_update_info, fuel_prices = await asyncio.gather(
+                    self.get_last_update(), self.get_price(normalized_id)
+                )
+            else:
+                fuel_prices = await self.get_price(normalized_id)
+        except Exception:
+            stale = self._stale(normalized_id)
+            if stale is None:
+                raise
+            return stale
+        result = self._make_result(
+            normalized_id,
+            province_name,
+            last_update_info["lastUpdateDate"],
+            fuel_prices
+        )
+        await self._record_history({normalized_id: result})
+        return result
+
+    async def price(
+        self,
+        province_id: str,
+        products: Optional[FuelTypes] = None,
+        fields: Optional[Iterable[str]] = None
+    ) -> str:
+        """Returns prices as JSON for a province.
+
+        `products` and `fields` work as in `price_result`.
+        """
+        response: PriceResponse = {
+            "results": await self.price_result(province_id, products, fields)
+        }
+        return to_json(response)
+
+    async def get_all_prices(
+        self,
+        codes: Optional[Iterable[str]] = None,
+        max_concurrency: int = 8,
+        last_update: Optional[str] = None
+    ) -> BulkPriceResult:
+        """Returns prices for many provinces, fetched concurrently.
+
+        `/lastupdate` is requested once for the whole batch. Provinces
+        whose prices cannot be fetched are reported in `errors` instead of
+        aborting the batch, unless a stale result can be served for them.
+
+        Args:
+            codes: Plate codes to fetch. Defaults to every known province.
+            max_concurrency: Maximum number of requests in flight.
+            last_update: A `lastUpdateDate` the caller has just fetched.
+                         When given, `/lastupdate` is not requested again.
+        """
+        await self._refresh_catalog()
+        codes = list(self._provinces_map if codes is None else codes)
+        if last_update is None:
+            try:
+                info = await self.get_last_update()
+                last_update = info["lastUpdateDate"]
+            except Exception as e:
+                return self._stale_bulk(codes, e)
+        bulk, pending = self._plan_bulk(codes, last_update)
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch(code: str) -> List[FuelPrice]:
+            async with semaphore:
+                return await self.get_price(code)
+
+        outcomes = await asyncio.gather(
+            *(fetch(code) for code, _ in pending), return_exceptions=True
+        )
+        for (code, name), outcome in zip(pending, outcomes):
+            self._record_bulk(bulk, code, name, outcome)
+        await self._record_history(self._fetched_results(bulk, pending))
+        return bulk
+
+    async def iter_all_prices(
+        self,
+        codes: Optional[Iterable[str]] = None,
+        max_concurrency: int = 8
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """Yields the prices of many provinces as each fetch completes.
+
+        See `opet.api.OpetApiClient.iter_all_prices`. Requests still in
+        flight are cancelled when the iteration is abandoned.
+        """
+        await self._refresh_catalog()
+        codes = list(self._provinces_map if codes is None else codes)
+        try:
+            last_update = (await self.get_last_update())["lastUpdateDate"]
+        except Exception as e:
+            for item in self._stale_outcomes(codes, e):
+                yield item
+            return
+        bulk, pending = self._plan_bulk(codes, last_update)
+        for item in self._planned_outcomes(bulk):
+            yield item
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def fetch(code: str, name: str) -> Tuple[str, str, Any]:
+            async with semaphore:
+                try:
+                    return code, name, await self.get_price(code)
+                except Exception as e:
+                    return code, name, e
+
+        tasks = [
+            asyncio.ensure_future(fetch(code, name)) for code, name in pending
+        ]
+        fetched: Dict[str, FormattedPriceResult] = {}
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                code, name, outcome = await next_done
+                if isinstance(outcome, BaseException):
+                    outcome = self._stale(code) or outcome
+                else:
+                    outcome = fetched[code] = self._make_result(
+                        code, name, last_update, outcome
+                    )
+                yield code, outcome
+        finally:
+            for task in tasks:
+                task.cancel()
+            await self._record_history(fetched)
+
+    async def _fill_stats(self, max_concurrency: int) -> None:
+        """Brings `stats` up to date before a query.
+
+        See `opet.api.OpetApiClient._fill_stats`.
+        """
+        await self._refresh_catalog()
+        if not self._stats_due():
+            return
+        try:
+            last_update = (await self.get_last_update())["lastUpdateDate"]
+        except Exception:
+            if self.stale_if_error and self.stats:
+                return
+            raise
+        missing = self._stats_missing(last_update)
+        if missing:
+            bulk = await self.get_all_prices(
+                missing, max_concurrency, last_update
+            )
+            self.stats.update_many(bulk["results"])
+
+    async def price_stats(
+        self,
+        products: Optional[FuelTypes] = None,
+        max_concurrency: int = 8
+    ) -> List[ProductStats]:
+        """Returns the min, max, mean and median of every product nationwide.
+
+        See `opet.api.OpetApiClient.price_stats`.
+        """
+        await self._fill_stats(max_concurrency)
+        return self.stats.all_stats(products)
+
+    async def cheapest(
+        self,
+        product: str,
+        n: int = 5,
+        most_expensive: bool = False,
+        max_concurrency: int = 8
+    ) -> List[RankedPrice]:
+        """Returns the `n` provinces where a product is cheapest.
+
+        See `opet.api.OpetApiClient.cheapest`.
+        """
+        await self._fill_stats(max_concurrency)
+        return self.stats.cheapest(product, n, most_expensive)
+
+    async def aclose(self) -> None:
+        """Closes the underlying transport."""
+        await self.transport.aclose()
@@ -0,0 +1,247 @@
+"""Pooled asyncio HTTP transport for the Opet API client application.
+
+`AsyncHttpTransport` is the asyncio counterpart of
+`opet.transport.HttpTransport`. It sends requests through a shared
+`httpx.AsyncClient`, so concurrent requests reuse a bounded pool of
+keep-alive connections without blocking the event loop. Identical
+concurrent requests are coalesced into one upstream call.
+"""
+
+import asyncio
+import time
+from opet.breaker import CircuitBreaker
+from opet.budget import CallBudget
+from opet.exceptions import Http200Error
+from opet.metrics import record_error, record_upstream
+from opet.singleflight import AsyncSingleFlight
+from opet.transport import DEFAULT_HEADERS, RETRY_STATUS_CODES
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+
+async def _close_with_loop(client: Any) -> AsyncIterator[None]:
+    """Closes `client` when its event loop shuts down async generators.
+
+    `asyncio.run` finalizes pending async generators before closing the
+    loop, so the client's connections are closed on the loop they belong
+    to rather than leaked once it is gone.
+    """
+    try:
+        yield
+    finally:
+        await client.aclose()
+
+
+async def _aclose(generator: Any) -> None:
+    """Closes an async generator; a coroutine for other loops to run."""
+    await generator.aclose()
+
+
+class AsyncHttpTransport:
+    """Keep-alive asyncio HTTP transport with a bounded connection pool.
+
+    The underlying `httpx.AsyncClient` is created on first use and bound to
+    the running event loop. If the transport is later used from a different
+    loop, a new client is created for it and the old one is closed on its
+    own loop, at the latest when that loop shuts down.
+
+    Attributes:
+        headers: Headers sent with every request.
+        timeout: Default `(connect, read)` timeout tuple in seconds.
+        retries: How many times a failed request is retried.
+        backoff_factor: Base delay in seconds between retries; doubled on
+                        every attempt.
+        verify: Whether TLS certificates are verified.
+        breaker: Circuit breaker failing calls fast after repeated upstream
+                 failures, or None.
+        budget: Upstream call budget failing calls fast beyond a rate, or
+                None.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        retries: int = 2,
+        backoff_factor: float = 0.3,
+        headers: Optional[Dict[str, str]] = None,
+        verify: bool = True,
+        coalesce: bool = True,
+        circuit_breaker: bool = True,
+        max_calls_per_second: Optional[float] = None
+    ) -> None:
+        """Stores the pool, timeout, retry and coalescing settings.
+
+        `circuit_breaker` and `max_calls_per_second` work as in
+        `opet.transport.HttpTransport`.
+        """
+        self.max_connections: int = max_connections
+        self.max_keepalive_connections: int = max_keepalive_connections
+        self.headers: Dict[str, str] = dict(
+            DEFAULT_HEADERS if headers is None else headers
+        )
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.retries: int = retries
+        self.backoff_factor: float = backoff_factor
+        self.verify: bool = verify
+        self.flight: Optional[AsyncSingleFlight] = (
+            AsyncSingleFlight() if coalesce else None
+        )
+        self.breaker: Optional[CircuitBreaker] = (
+            CircuitBreaker() if circuit_breaker else None
+        )
+        self.budget: Optional[CallBudget] = (
+            CallBudget(max_calls_per_second) if max_calls_per_second
+            else None
+        )
+        self._client: Any = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._requests = 0
+        self._opened = 0
+        # Started `_close_with_loop` generator of the current client
+        self._closer: Any = None
+
+    async def _get_client(self) -> Any:
+        """Returns the httpx client for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is loop:
+            return self._client
+        if self._closer is not None and not self._loop.is_closed():
+            asyncio.run_coroutine_threadsafe(
+                _aclose(self._closer), self._loop
+            )
+        import httpx
+
+        connect, read = self.timeout
+        self._client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections
+            ),
+            verify=self.verify
+        )
+        self._loop = loop
+        self._closer = _close_with_loop(self._client)
+        await self._closer.__anext__()
+        return self._client
+
+    async def get(
+        self,
+        url: str,
+        timeout: Optional[Tuple[float, float]] = None
+    ) -> Any:
+        """Makes a GET request and returns the parsed JSON response.
+
+        Args:
+            url: The URL to send the GET request to.
+            timeout: Optional `(connect, read)` timeout overriding the
+                     transport default for this request only.
+
+        Returns:
+            The JSON response from the server, parsed into Python data
+            structures.
+
+        Raises:
+            Http200Error: If the HTTP status code of the response is not 200.
+            CircuitOpenError: If the circuit breaker is open.
+            BudgetExceededError: If the call budget is spent.
+            httpx.HTTPError: For network errors or other issues during the
+                             request.
+        """
+        if self.flight is None:
+            return await self._request(url, timeout)
+        return await self.flight.do(
+            url, lambda: self._request(url, timeout)
+        )
+
+    async def _request(
+        self,
+        url: str,
+        timeout: Optional[Tuple[float, float]]
+    ) -> Any:
+        """Sends the GET request with retries; see `get`."""
+        import httpx
+
+        client = await self._get_client()
+        kwargs: Dict[str, Any] = {"extensions": {"trace": self._trace}}
+        if timeout is not None:
+            kwargs["timeout"] = httpx.Timeout(timeout[1], connect=timeout[0])
+        if self.budget is not None:
+            self.budget.check()
+        if self.breaker is not None:
+            self.breaker.check()
+        attempt = 0
+        start = time.perf_counter()
+        status: Optional[int] = None
+        cancelled = False
+        try:
+            while True:
+                try:
+                    r = await client.get(url, **kwargs)
+                except httpx.TransportError:
+                    if attempt >= self.retries:
+                        raise
+                else:
+                    if (r.status_code not in RETRY_STATUS_CODES
+                            or attempt >= self.retries):
+                        break
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+                attempt += 1
+            status = r.status_code
+        except asyncio.CancelledError:
+            # Our caller gave up; that says nothing about the upstream.
+            cancelled = True
+            raise
+        finally:
+            if self.breaker is not None and not cancelled:
+                self.breaker.record_response(status)
+            record_upstream(
+                url, str(status or "error"), time.perf_counter() - start
+            )
+        if r.status_code != 200:
+            error = Http200Error(
+                f"Request to '{url}' failed with status code "
+                f"{r.status_code}. Response: {r.text}"
+            )
+            record_error(error)
+            raise error
+        return r.json()
+
+    async def _trace(self, event: str, info: Dict[str, Any]) -> None:
+        """Counts sent requests and opened connections from httpcore."""
+        if event.endswith(".send_request_headers.started"):
+            self._requests += 1
+        elif event == "connection.connect_tcp.complete":
+            self._opened += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Returns request and connection counters for this transport.
+
+        The counters match those of `opet.transport.HttpTransport.stats`:
+        every request either opens a new connection or reuses a pooled
+        one, and `coalesced` counts calls that shared another caller's
+        in-flight request.
+        """
+        return {
+            "requests": self._requests,
+            "connections_opened": self._opened,
+            "connections_reused": max(0, self._requests - self._opened),
+            "coalesced": self.flight.stats()["coalesced"] if self.flight else 0
+        }
+
+    async def aclose(self) -> None:
+        """Closes the httpx client and every pooled connection."""
+        if self._closer is not None:
+            closer, self._closer = self._closer, None
+            self._client = None
+            self._loop = None
+            await closer.aclose()
+
+    async def __aenter__(self) -> "AsyncHttpTransport":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
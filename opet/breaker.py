@@ -0,0 +1,161 @@
+"""Circuit breaker for calls to the Opet API.
+
+When the upstream API is down, every request would otherwise wait for its
+timeouts and retries before failing. `CircuitBreaker` counts consecutive
+failures. After `failure_threshold` of them it opens, and calls fail fast
+with `CircuitOpenError` for `reset_timeout` seconds. After that the
+breaker half-opens and lets a single probe through. A successful probe
+closes it again; a failed one reopens it for another `reset_timeout`.
+"""
+
+import threading
+import time
+from opet.exceptions import CircuitOpenError
+from opet.metrics import record_error
+from typing import Callable, Optional
+try:
+    from typing import TypedDict
+except ImportError:  # Python < 3.8
+    from typing_extensions import TypedDict
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class BreakerStats(TypedDict):
+    """Circuit breaker state and counters."""
+    state: str
+    failures: int
+    rejected: int
+    opened: int
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker, safe to share between threads.
+
+    Attributes:
+        failure_threshold: Consecutive failures that open the breaker.
+        reset_timeout: Seconds the breaker stays open before a probe.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Creates a closed breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the breaker.
+            reset_timeout: Seconds the breaker stays open before a probe.
+            clock: Monotonic time source, replaceable in tests.
+        """
+        self.failure_threshold: int = failure_threshold
+        self.reset_timeout: float = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._rejected = 0
+        self._opened = 0
+
+    @property
+    def state(self) -> str:
+        """Returns "closed", "open" or "half_open"."""
+        with self._lock:
+            if (self._state == OPEN
+                    and self._clock() - self._opened_at >= self.reset_timeout):
+                return HALF_OPEN
+            return self._state
+
+    def retry_after(self) -> Optional[float]:
+        """Returns the seconds until the next probe while open, else None."""
+        with self._lock:
+            if self._state != OPEN:
+                return None
+            return max(
+                0.0, self.reset_timeout - (self._clock() - self._opened_at)
+            )
+
+    def allow(self) -> bool:
+        """Returns True if a call may be made now.
+
+        While half-open only one call at a time is allowed through; the
+        caller must report its outcome with `record_success` or
+        `record_failure`.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if (self._state == OPEN
+                    and self._clock() - self._opened_at >= self.reset_timeout):
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self._rejected += 1
+            return False
+
+    def check(self) -> None:
+        """Like `allow`, but raises instead of returning False.
+
+        Raises:
+            CircuitOpenError: If the call is not allowed.
+        """
+        if self.allow():
+            return
+        error = CircuitOpenError(
+            "Opet API calls are suspended after repeated failures; "
+            f"retrying in {self.retry_after() or 0:.0f}s."
+        )
+        record_error(error)
+        raise error
+
+    def record_response(self, status: Optional[int]) -> None:
+        """Reports the outcome of a call by its HTTP status.
+
+        `None` (no response), 429 and 5xx statuses count as failures; any
+        other status means the upstream API is up.
+        """
+        if status is None or status == 429 or status >= 500:
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def record_success(self) -> None:
+        """Reports a successful call; closes the breaker."""
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        """Reports a failed call; opens the breaker at the threshold."""
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if (self._state == HALF_OPEN
+                    or self._failures >= self.failure_threshold):
+                if self._state != OPEN:
+                    self._opened += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+    def reset(self) -> None:
+        """Closes the breaker and forgets past failures."""
+        self.record_success()
+
+    def stats(self) -> BreakerStats:
+        """Returns the state and how often calls were rejected."""
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "failures": self._failures,
+                "rejected": self._rejected,
+                "opened": self._opened
+            }
@@ -0,0 +1,143 @@
+"""Token buckets limiting how fast calls are made.
+
+`TokenBucket` holds up to `capacity` tokens and refills at `rate` tokens
+per second. Each call takes one token; when none is left the call is
+refused with the time until the next token, instead of queueing.
+
+`CallBudget` applies a bucket to Opet API calls. A transport with a
+budget fails calls fast with `BudgetExceededError` once it makes more
+than `rate` calls per second on average, after an initial burst of
+`capacity` calls, so that a traffic spike does not get us throttled
+upstream.
+"""
+
+import threading
+import time
+from opet.exceptions import BudgetExceededError
+from opet.metrics import record_budget_rejected, record_error
+from typing import Callable, Optional
+try:
+    from typing import TypedDict
+except ImportError:  # Python < 3.8
+    from typing_extensions import TypedDict
+
+
+class BudgetStats(TypedDict):
+    """Call budget settings and counters."""
+    rate: float
+    capacity: float
+    tokens: float
+    rejected: int
+
+
+class TokenBucket:
+    """Token bucket rate limiter, safe to share between threads.
+
+    Attributes:
+        rate: Tokens added per second.
+        capacity: Maximum number of tokens, i.e. the largest burst.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Creates a full bucket.
+
+        Args:
+            rate: Tokens added per second.
+            capacity: Largest burst. Defaults to `rate`, and at least one.
+            clock: Monotonic time source, replaceable in tests.
+
+        Raises:
+            ValueError: If `rate` or `capacity` is not positive.
+        """
+        if rate <= 0:
+            raise ValueError("The rate of a token bucket must be positive.")
+        if capacity is None:
+            capacity = max(1.0, rate)
+        if capacity <= 0:
+            raise ValueError(
+                "The capacity of a token bucket must be positive."
+            )
+        self.rate: float = rate
+        self.capacity: float = capacity
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    @property
+    def tokens(self) -> float:
+        """Returns the number of tokens available now."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def take(self) -> float:
+        """Takes a token if one is available.
+
+        Returns:
+            0.0 if a token was taken, otherwise the seconds until one is
+            available. Nothing is taken in that case.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self.rate
+
+
+class CallBudget(TokenBucket):
+    """Token bucket limiting the calls a transport sends upstream."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Creates a full budget; see `TokenBucket`."""
+        super().__init__(rate, capacity, clock)
+        self._rejected = 0
+
+    def check(self) -> None:
+        """Takes a token, or raises if the budget is spent.
+
+        Raises:
+            BudgetExceededError: If no token is available.
+        """
+        wait = self.take()
+        if not wait:
+            return
+        with self._lock:
+            self._rejected += 1
+        record_budget_rejected()
+        error = BudgetExceededError(
+            f"The Opet API call budget of {self.rate:g} calls per second "
+            f"is spent; retrying in {wait:.2f}s.",
+            retry_after=wait
+        )
+        record_error(error)
+        raise error
+
+    def stats(self) -> BudgetStats:
+        """Returns the settings and the number of rejected calls."""
+        tokens = self.tokens
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "capacity": self.capacity,
+                "tokens": tokens,
+                "rejected": self._rejected
+            }
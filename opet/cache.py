@@ -0,0 +1,178 @@
+"""In-memory price cache for the Opet API clients.
+
+Prices change only a few times a day, while every `price()` call used to
+make two upstream round trips. `PriceCache` keeps recent price results
+keyed by normalized plate code, bounded by an LRU size cap and a TTL.
+
+When revalidation is enabled, an expired entry is not simply dropped: the
+client makes one cheap `/lastupdate` call and passes the value to
+`PriceCache.revalidate`, which renews every entry recorded for that same
+`lastUpdateDate` at once and drops the others.
+
+Entries are stored as one-row `opet.table.PriceTable`s instead of a
+dictionary per price. Each table carries its own row and column indexes,
+so an entry of a dozen products still takes about 1.3 KB, roughly half of
+the dictionaries it replaces. `get` builds the result dictionary on every
+hit.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Optional
+try:
+    from typing import TypedDict
+except ImportError:  # Python < 3.8
+    from typing_extensions import TypedDict
+
+if TYPE_CHECKING:
+    from opet.table import PriceTable
+
+
+class CacheStats(TypedDict):
+    """Price cache counters."""
+    hits: int
+    misses: int
+    evictions: int
+    revalidations: int
+    size: int
+
+
+class _Entry:
+    """A cached value with the time it was stored or last revalidated."""
+
+    __slots__ = ("value", "last_update", "stored_at")
+
+    def __init__(
+        self, value: "PriceTable", last_update: str, stored_at: float
+    ):
+        self.value = value
+        self.last_update = last_update
+        self.stored_at = stored_at
+
+
+class PriceCache:
+    """Bounded LRU cache of price results with TTL and revalidation.
+
+    Every hit returns a new dictionary, which callers may keep or modify.
+
+    Attributes:
+        maxsize: Maximum number of provinces kept. 0 disables the cache.
+        ttl: Seconds an entry is served without asking the upstream API.
+        revalidate_enabled: Whether expired entries are kept for
+                            revalidation against `/lastupdate` instead of
+                            being dropped.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 128,
+        ttl: float = 300.0,
+        revalidate: bool = True,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        """Creates an empty cache.
+
+        Args:
+            maxsize: Maximum number of provinces kept. 0 disables the cache.
+            ttl: Seconds an entry is served without asking the upstream API.
+            revalidate: Whether expired entries are revalidated against
+                        `/lastupdate` instead of being dropped.
+            clock: Monotonic time source, replaceable in tests.
+        """
+        self.maxsize: int = maxsize
+        self.ttl: float = ttl
+        self.revalidate_enabled: bool = revalidate
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._revalidations = 0
+
+    def _expired(self, entry: _Entry) -> bool:
+        return self._clock() - entry.stored_at >= self.ttl
+
+    def revalidation_due(self, key: str) -> bool:
+        """Returns True if `key` is cached but expired and revalidatable."""
+        if not self.revalidate_enabled:
+            return False
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and self._expired(entry)
+
+    def revalidate(self, last_update: str) -> int:
+        """Renews entries recorded for `last_update` and drops the rest.
+
+        Args:
+            last_update: The current `lastUpdateDate` of the upstream API.
+
+        Returns:
+            The number of entries that are still valid.
+        """
+        now = self._clock()
+        with self._lock:
+            self._revalidations += 1
+            for key in list(self._entries):
+                entry = self._entries[key]
+                if entry.last_update == last_update:
+                    entry.stored_at = now
+                else:
+                    del self._entries[key]
+            return len(self._entries)
+
+    def get(self, key: str) -> Optional[dict]:
+        """Returns the fresh cached value for `key`, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                if not self.revalidate_enabled:
+                    del self._entries[key]
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            table = entry.value
+        return table.result(table.codes[0])
+
+    def put(self, key: str, value: dict) -> None:
+        """Stores a price result, evicting the least recently used ones.
+
+        The entry is validated by the result's `lastUpdate` value.
+        """
+        if self.maxsize <= 0:
+            return
+        # Imported here; opet.table depends on opet.api, which imports
+        # this module.
+        from opet.table import PriceTable
+        table = PriceTable.from_results({key: value})
+        with self._lock:
+            self._entries[key] = _Entry(
+                table, value["lastUpdate"], self._clock()
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self) -> None:
+        """Removes every entry. Counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        """Returns hit, miss, eviction and revalidation counters."""
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "revalidations": self._revalidations,
+                "size": len(self._entries)
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,87 @@
+"""Differences between two sets of price results.
+
+`diff_results` compares the price results of many provinces, such as two
+consecutive snapshots, and lists every product whose amount changed, was
+added or was removed, with its old and new amount. The server uses it to
+push change events to subscribers instead of having them poll.
+"""
+
+from opet.api import FormattedPriceResult, FuelPrice
+from typing import Dict, List, Mapping, Optional
+try:
+    from typing import TypedDict
+except ImportError:  # Python < 3.8
+    from typing_extensions import TypedDict
+
+
+class PriceChange(TypedDict):
+    """Old and new amount of a product; None where it was not listed."""
+    product: str
+    old: Optional[float]
+    new: Optional[float]
+
+
+class ProvinceChange(TypedDict):
+    """Changed prices of a province.
+
+    `code` is the normalized plate code and `province` the province name.
+    """
+    code: str
+    province: str
+    lastUpdate: str
+    changes: List[PriceChange]
+
+
+def diff_prices(
+    old: List[FuelPrice], new: List[FuelPrice]
+) -> List[PriceChange]:
+    """Returns the products whose amount differs between two price lists.
+
+    Products are listed in the order of `new`, followed by the products
+    only found in `old`.
+    """
+    previous: Dict[str, float] = {
+        price["name"]: price["amount"] for price in old
+    }
+    changes: List[PriceChange] = []
+    for price in new:
+        amount = previous.pop(price["name"], None)
+        if amount != price["amount"]:
+            changes.append({
+                "product": price["name"], "old": amount, "new": price["amount"]
+            })
+    changes.extend(
+        {"product": name, "old": amount, "new": None}
+        for name, amount in previous.items()
+    )
+    return changes
+
+
+def diff_results(
+    old: Mapping[str, FormattedPriceResult],
+    new: Mapping[str, FormattedPriceResult]
+) -> List[ProvinceChange]:
+    """Returns the provinces of `new` whose prices differ from `old`.
+
+    Both mappings are keyed by normalized plate code. Provinces missing
+    from `new` are not reported, as a snapshot keeps a province's last
+    prices when it cannot be fetched. Results that are the same object in
+    both mappings are skipped without comparing them.
+    """
+    changed: List[ProvinceChange] = []
+    for code, result in new.items():
+        previous = old.get(code)
+        if previous is result:
+            continue
+        changes = diff_prices(
+            previous["prices"] if previous is not None else [],
+            result["prices"]
+        )
+        if changes:
+            changed.append({
+                "code": code,
+                "province": result["province"],
+                "lastUpdate": result["lastUpdate"],
+                "changes": changes
+            })
+    return changed
@@ -31,3 +31,34 @@ class ProvinceNotFoundError(BaseError):
     to any existing province in the Opet system.
     """
     pass
+
+
+class CircuitOpenError(BaseError):
+    """Raised when a request is not sent because the circuit breaker is open.
+
+    The Opet API failed repeatedly, so requests fail fast for a while
+    instead of waiting for timeouts.
+    """
+    pass
+
+
+class SnapshotError(BaseError):
+    """Raised when an offline price snapshot cannot be read.
+
+    The file may be missing, truncated or written by an incompatible
+    version, or it may not contain the requested province's prices.
+    """
+    pass
+
+
+class BudgetExceededError(BaseError):
+    """Raised when an Opet API call is not sent because the call budget of
+    the transport is spent.
+
+    Attributes:
+        retry_after: Seconds until the budget allows another call.
+    """
+
+    def __init__(self, message: str, retry_after: float = 0.0) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
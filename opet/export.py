@@ -0,0 +1,79 @@
+"""Row formats for streaming exports of price results.
+
+An export is a stream of `(code, outcome)` pairs, as yielded by
+`OpetApiClient.iter_all_prices`, where `outcome` is a price result or the
+exception raised while fetching it. Each pair is encoded on its own, so an
+export can be written out as soon as a province is fetched without holding
+the whole table in memory.
+
+Every price becomes one row with the columns of `EXPORT_FIELDS`, where
+`province` is the normalized plate code. NDJSON reports failed provinces as
+`{"province": ..., "error": ...}` lines; CSV leaves them out.
+"""
+
+import csv
+import io
+from opet.serialization import dumps
+from typing import Any, Callable, Dict, Tuple
+
+
+EXPORT_FIELDS: Tuple[str, ...] = (
+    "province", "product", "amount", "lastUpdate"
+)
+
+
+def _error_message(error: BaseException) -> str:
+    return str(error) or type(error).__name__
+
+
+def ndjson_header() -> str:
+    """Returns the text written before the first NDJSON row."""
+    return ""
+
+
+def ndjson_rows(code: str, outcome: Any) -> str:
+    """Encodes the prices of a province as NDJSON lines."""
+    if isinstance(outcome, BaseException):
+        return dumps(
+            {"province": code, "error": _error_message(outcome)}, "compact"
+        ) + "\n"
+    last_update = outcome["lastUpdate"]
+    return "".join(
+        dumps(
+            {
+                "province": code,
+                "product": price["name"],
+                "amount": price["amount"],
+                "lastUpdate": last_update
+            },
+            "compact"
+        ) + "\n"
+        for price in outcome["prices"]
+    )
+
+
+def csv_header() -> str:
+    """Returns the CSV header line."""
+    return ",".join(EXPORT_FIELDS) + "\r\n"
+
+
+def csv_rows(code: str, outcome: Any) -> str:
+    """Encodes the prices of a province as CSV lines."""
+    if isinstance(outcome, BaseException):
+        return ""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    last_update = outcome["lastUpdate"]
+    writer.writerows(
+        (code, price["name"], price["amount"], last_update)
+        for price in outcome["prices"]
+    )
+    return buffer.getvalue()
+
+
+EXPORT_FORMATS: Dict[
+    str, Tuple[Callable[[], str], Callable[[str, Any], str]]
+] = {
+    "ndjson": (ndjson_header, ndjson_rows),
+    "csv": (csv_header, csv_rows)
+}
@@ -0,0 +1,210 @@
+"""Local price history for the Opet API clients.
+
+Opet only publishes current prices. `PriceHistory` keeps the prices seen by
+a client in a small SQLite database so that trends can be charted later.
+The history is a change log: a price is stored when it differs from the
+previous price of the same province and product, keyed by the
+`lastUpdateDate` it was published with. Recording an unchanged snapshot
+again stores nothing.
+
+Rows are clustered by province, product and `lastUpdateDate`, so range
+queries read only the rows they return.
+"""
+
+import os
+import sqlite3
+import threading
+from opet.provinces import default_cache_dir
+from typing import Any, Dict, List, Mapping, Optional
+try:
+    from typing import TypedDict
+except ImportError:  # Python < 3.8
+    from typing_extensions import TypedDict
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS prices (
+    province TEXT NOT NULL,
+    product_id INTEGER NOT NULL REFERENCES products (id),
+    last_update TEXT NOT NULL,
+    amount REAL NOT NULL,
+    PRIMARY KEY (province, product_id, last_update)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS prices_by_time ON prices (last_update);
+"""
+
+
+class HistoryRecord(TypedDict):
+    """A stored price."""
+    province: str
+    product: str
+    amount: float
+    lastUpdate: str
+
+
+def default_history_path() -> str:
+    """Returns the default database location in `default_cache_dir()`."""
+    return os.path.join(default_cache_dir(), "history.sqlite3")
+
+
+class PriceHistory:
+    """SQLite-backed change log of fuel prices.
+
+    Instances may be shared between threads. Province codes are stored
+    normalized, as returned by `opet.api.normalize_plate_code`.
+
+    Attributes:
+        path: Location of the database, or ":memory:".
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """Opens the database, creating it and its directory if missing.
+
+        Args:
+            path: Database location. Defaults to `default_history_path()`.
+        """
+        self.path: str = path or default_history_path()
+        if self.path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            self.path, timeout=10.0, check_same_thread=False
+        )
+        with self._lock, self._db:
+            self._db.executescript(_SCHEMA)
+        self._products: Dict[str, int] = dict(
+            self._db.execute("SELECT name, id FROM products")
+        )
+
+    def _product_id(self, name: str) -> int:
+        """Returns the id of a product name, adding it when new."""
+        product_id = self._products.get(name)
+        if product_id is None:
+            self._db.execute(
+                "INSERT OR IGNORE INTO products (name) VALUES (?)", (name,)
+            )
+            product_id = self._db.execute(
+                "SELECT id FROM products WHERE name = ?", (name,)
+            ).fetchone()[0]
+            self._products[name] = product_id
+        return product_id
+
+    def _latest(self, province: str) -> Dict[int, Any]:
+        """Returns the most recent amount of each product of a province."""
+        rows = self._db.execute(
+            "SELECT product_id, amount FROM prices AS p WHERE province = ? "
+            "AND last_update = (SELECT MAX(last_update) FROM prices "
+            "WHERE province = p.province AND product_id = p.product_id)",
+            (province,)
+        )
+        return dict(rows)
+
+    def record(self, province_id: str, result: Mapping[str, Any]) -> int:
+        """Stores the prices of a price result that changed.
+
+        Args:
+            province_id: Normalized plate code of the province.
+            result: A `FormattedPriceResult`.
+
+        Returns:
+            The number of prices stored.
+        """
+        return self.record_many({province_id: result})
+
+    def record_many(self, results: Mapping[str, Mapping[str, Any]]) -> int:
+        """Stores the changed prices of many provinces in one transaction.
+
+        Args:
+            results: Price results keyed by normalized plate code, such as
+                     the `results` of a `BulkPriceResult`.
+
+        Returns:
+            The number of prices stored.
+        """
+        stored = 0
+        with self._lock, self._db:
+            for province, result in results.items():
+                latest = self._latest(province)
+                rows = []
+                for price in result["prices"]:
+                    product_id = self._product_id(price["name"])
+                    if latest.get(product_id) != price["amount"]:
+                        rows.append((
+                            province, product_id, result["lastUpdate"],
+                            price["amount"]
+                        ))
+                cursor = self._db.executemany(
+                    "INSERT OR IGNORE INTO prices "
+                    "(province, product_id, last_update, amount) "
+                    "VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                stored += max(cursor.rowcount, 0)
+        return stored
+
+    def query(
+        self,
+        province_id: str,
+        product: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[HistoryRecord]:
+        """Returns the price changes of a province, oldest first.
+
+        Args:
+            province_id: Normalized plate code of the province.
+            product: Only return this product.
+            since: Earliest `lastUpdateDate` to include, in the same ISO
+                   format Opet uses, e.g. "2024-01-01" or
+                   "2024-01-01T06:00:00".
+            until: Latest `lastUpdateDate` to include. A date alone covers
+                   the whole day.
+            limit: Return at most this many of the most recent changes.
+        """
+        sql = (
+            "SELECT p.province, n.name, p.amount, p.last_update "
+            "FROM prices AS p JOIN products AS n ON n.id = p.product_id "
+            "WHERE p.province = ?"
+        )
+        params: List[Any] = [province_id]
+        if product is not None:
+            sql += " AND n.name = ?"
+            params.append(product)
+        if since is not None:
+            sql += " AND p.last_update >= ?"
+            params.append(since)
+        if until is not None:
+            sql += " AND p.last_update <= ?"
+            params.append(until if "T" in until else until + "T\uffff")
+        sql += " ORDER BY p.last_update DESC, n.name DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [
+            {
+                "province": province,
+                "product": name,
+                "amount": amount,
+                "lastUpdate": last_update
+            }
+            for province, name, amount, last_update in reversed(rows)
+        ]
+
+    def close(self) -> None:
+        """Closes the database."""
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "PriceHistory":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -4,13 +4,16 @@ This module provides a CLI tool powered by Click to interact with the
 OpetApiClient and display fuel price information for a specified province.
 """
 
-from opet.api import OpetApiClient
 from opet.exceptions import BaseError
+from typing import TYPE_CHECKING, Any, Optional
 import click
 import sys
 
+if TYPE_CHECKING:
+    from opet.api import OpetApiClient
 
-@click.command()
+
+@click.group(invoke_without_command=True)
 @click.option(
     "--il",
     "province_id",
@@ -22,16 +25,177 @@ import sys
     ),
     metavar="PLATE_CODE"
 )
+@click.option(
+    "--all",
+    "all_provinces",
+    is_flag=True,
+    help="Fetch fuel prices for every province at once."
+)
+@click.option(
+    "--concurrency",
+    default=8,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Maximum number of parallel requests used by --all."
+)
+@click.option(
+    "--export",
+    "export_format",
+    type=click.Choice(["ndjson", "csv"]),
+    default=None,
+    help=(
+        "Stream the prices of every province as NDJSON or CSV rows, "
+        "writing each province as soon as it is fetched."
+    )
+)
+@click.option(
+    "--record",
+    is_flag=True,
+    help="Store the fetched prices in the local price history."
+)
+@click.option(
+    "--history",
+    "show_history",
+    is_flag=True,
+    help="Show the stored price changes of the province given with --il."
+)
+@click.option(
+    "--product",
+    default=None,
+    help="Only show this product with --history."
+)
+@click.option(
+    "--since",
+    default=None,
+    help="Earliest update to show with --history, e.g. 2024-01-01.",
+    metavar="DATE"
+)
+@click.option(
+    "--until",
+    default=None,
+    help="Latest update to show with --history, e.g. 2024-01-31.",
+    metavar="DATE"
+)
+@click.option(
+    "--history-db",
+    default=None,
+    help=(
+        "Price history database. Defaults to history.sqlite3 in the "
+        "opet cache directory."
+    ),
+    metavar="PATH"
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    help=(
+        "Answer --il and --all from the snapshot saved by `opet-cli "
+        "snapshot` instead of the network."
+    )
+)
+@click.option(
+    "--snapshot",
+    "snapshot_path",
+    default=None,
+    help=(
+        "Snapshot file to answer from; implies --offline. Defaults to "
+        "prices.snapshot in the opet cache directory."
+    ),
+    metavar="PATH"
+)
 @click.option(
     "--api",
     is_flag=True,
     help="Start the API server instead of running the CLI."
 )
-def cli(province_id: str, api: bool) -> None:
+@click.option(
+    "--host",
+    default="0.0.0.0",
+    show_default=True,
+    help="Address the API server listens on."
+)
+@click.option(
+    "--port",
+    default=8000,
+    show_default=True,
+    type=click.IntRange(min=1, max=65535),
+    help="Port the API server listens on."
+)
+@click.option(
+    "--workers",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help=(
+        "Number of API server processes. With more than one, the workers "
+        "share one price snapshot and only one of them polls Opet."
+    )
+)
+@click.pass_context
+def cli(
+    ctx: click.Context,
+    province_id: str,
+    all_provinces: bool,
+    concurrency: int,
+    export_format: Optional[str],
+    record: bool,
+    show_history: bool,
+    product: Optional[str],
+    since: Optional[str],
+    until: Optional[str],
+    history_db: Optional[str],
+    offline: bool,
+    snapshot_path: Optional[str],
+    api: bool,
+    host: str,
+    port: int,
+    workers: int
+) -> None:
     """Starts the API server."""
+    if ctx.invoked_subcommand is not None:
+        return
+    offline = offline or snapshot_path is not None
+    if offline and (export_format or record or show_history):
+        click.echo(
+            "Error: --offline only works with --il and --all", err=True
+        )
+        sys.exit(1)
     if api:
-        import uvicorn
-        uvicorn.run("opet.server.app:app", host="0.0.0.0", port=8000)
+        _run_server(host, port, workers)
+        return
+    if show_history:
+        if province_id is None:
+            click.echo("Error: --history requires --il", err=True)
+            sys.exit(1)
+        _show_history(province_id, product, since, until, history_db)
+        return
+    history = _open_history(history_db) if record else None
+    if export_format is not None:
+        from opet.api import OpetApiClient
+        try:
+            _export(OpetApiClient(history=history), export_format, concurrency)
+        except BaseError as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(1)
+        except Exception as e:
+            click.echo(f"An unexpected error occurred: {e}", err=True)
+            sys.exit(1)
+        return
+    if all_provinces:
+        try:
+            client = _client(history, offline, snapshot_path)
+            bulk = dict(client.get_all_prices(max_concurrency=concurrency))
+            if offline:
+                # Like --il, tell how old the answer is.
+                bulk["snapshot"] = client.snapshot_info()
+            from opet.utils import to_json
+            click.echo(to_json(bulk))
+        except BaseError as e:
+            click.echo(f"Error: {e}", err=True)
+            sys.exit(1)
+        except Exception as e:
+            click.echo(f"An unexpected error occurred: {e}", err=True)
+            sys.exit(1)
         return
     if province_id is None:
         click.echo(
@@ -40,7 +204,7 @@ def cli(province_id: str, api: bool) -> None:
         )
         sys.exit(1)
     try:
-        client = OpetApiClient()
+        client = _client(history, offline, snapshot_path)
         price_json_output: str = client.price(province_id)
         click.echo(price_json_output)
     except BaseError as e:
@@ -51,5 +215,124 @@ def cli(province_id: str, api: bool) -> None:
         sys.exit(1)
 
 
+@cli.command()
+@click.option(
+    "--output",
+    "-o",
+    default=None,
+    help=(
+        "Where to save the snapshot. Defaults to prices.snapshot in the "
+        "opet cache directory."
+    ),
+    metavar="PATH"
+)
+@click.option(
+    "--concurrency",
+    default=8,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Maximum number of parallel requests."
+)
+def snapshot(output: Optional[str], concurrency: int) -> None:
+    """Saves every province's prices for --offline lookups."""
+    from opet.api import OpetApiClient
+    from opet.offline import default_snapshot_path, write_snapshot
+    path = output or default_snapshot_path()
+    try:
+        client = OpetApiClient()
+        provinces = client.get_provinces()
+        client.catalog.update(provinces)
+        bulk = client.get_all_prices(max_concurrency=concurrency)
+        for code, message in bulk["errors"].items():
+            click.echo(f"Error: province {code}: {message}", err=True)
+    except BaseError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+    except Exception as e:
+        click.echo(f"An unexpected error occurred: {e}", err=True)
+        sys.exit(1)
+    if not bulk["results"]:
+        click.echo("Error: no prices could be fetched", err=True)
+        sys.exit(1)
+    try:
+        count = write_snapshot(path, bulk, provinces)
+    except OSError as e:
+        click.echo(f"Error: cannot write snapshot: {e}", err=True)
+        sys.exit(1)
+    click.echo(f"Saved the prices of {count} provinces to {path}")
+
+
+def _client(
+    history: Any, offline: bool, snapshot_path: Optional[str]
+) -> Any:
+    """Returns the online client, or the snapshot client with --offline."""
+    if not offline:
+        from opet.api import OpetApiClient
+        return OpetApiClient(history=history)
+    from opet.offline import OfflineOpetApiClient
+    return OfflineOpetApiClient(snapshot_path)
+
+
+def _run_server(host: str, port: int, workers: int) -> None:
+    """Starts the API server; see `opet.server.run.serve`."""
+    from opet.server.run import serve
+    serve(host, port, workers)
+
+
+def _export(
+    client: "OpetApiClient", export_format: str, concurrency: int
+) -> None:
+    """Writes the prices of every province as they are fetched.
+
+    Provinces that fail are reported on stderr.
+    """
+    from opet.export import EXPORT_FORMATS
+    header, rows = EXPORT_FORMATS[export_format]
+    click.echo(header(), nl=False)
+    for code, outcome in client.iter_all_prices(max_concurrency=concurrency):
+        if isinstance(outcome, BaseException):
+            click.echo(f"Error: province {code}: {outcome}", err=True)
+        click.echo(rows(code, outcome), nl=False)
+
+
+def _open_history(path: Optional[str]) -> Any:
+    """Opens the price history database, exiting on failure."""
+    # Imported here so that commands without history skip sqlite3.
+    from opet.history import PriceHistory
+    try:
+        return PriceHistory(path)
+    except Exception as e:
+        click.echo(f"Error: cannot open price history: {e}", err=True)
+        sys.exit(1)
+
+
+def _show_history(
+    province_id: str,
+    product: Optional[str],
+    since: Optional[str],
+    until: Optional[str],
+    path: Optional[str]
+) -> None:
+    """Prints the stored price changes of a province as JSON."""
+    from opet.api import normalize_plate_code
+    from opet.utils import to_json
+    province = normalize_plate_code(province_id)
+    with _open_history(path) as history:
+        records = history.query(
+            province, product=product, since=since, until=until
+        )
+    click.echo(to_json({
+        "province": province,
+        "records": [
+            {
+                "product": item["product"],
+                "amount": item["amount"],
+                "lastUpdate": item["lastUpdate"]
+            }
+            for item in records
+        ]
+    }))
+
+
 if __name__ == '__main__':
     cli()
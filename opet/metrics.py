@@ -0,0 +1,408 @@
+"""In-process metrics for the Opet API clients and server.
+
+The clients record the latency and status of every upstream call and count
+the errors they raise in a process-wide `MetricsRegistry`. The server adds
+request latency per route and exposes everything at `/metrics` in the
+Prometheus text format.
+
+To forward measurements to another system, register a hook. It is called
+with the metric name, its labels and the observed value on every
+observation:
+
+    from opet.metrics import REGISTRY
+
+    REGISTRY.add_hook(lambda name, labels, value: statsd.timing(...))
+
+Hooks run on the hot path and should return quickly. Exceptions raised by
+hooks are ignored.
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import (
+    Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+)
+from urllib.parse import urlsplit
+
+
+Hook = Callable[[str, Dict[str, str], float], None]
+
+# Upper bounds in seconds, suited to calls taking a few ms up to timeouts.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return (value.replace("\\", "\\\\").replace("\n", "\\n")
+            .replace('"', '\\"'))
+
+
+def _format_labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(
+        f'{name}="{_escape(value)}"' for name, value in pairs
+    ) + "}"
+
+
+class Metric:
+    """Base class of the metric types; holds one value per label set.
+
+    Attributes:
+        name: Metric name as exported.
+        help: One-line description.
+        label_names: Names of the labels every observation must give.
+    """
+
+    kind = "untyped"
+
+    def __init__(
+        self,
+        registry: "MetricsRegistry",
+        name: str,
+        help: str,
+        label_names: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.label_names: Tuple[str, ...] = tuple(label_names)
+        self._registry = registry
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Mapping[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.label_names):
+            raise ValueError(
+                f"{self.name} expects labels {self.label_names}, "
+                f"got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _notify(self, key: Tuple[str, ...], value: float) -> None:
+        self._registry._notify(
+            self.name, dict(zip(self.label_names, key)), value
+        )
+
+    def _samples(self) -> Iterator[str]:
+        """Yields the exposition lines of the values."""
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield (f"{self.name}"
+                   f"{_format_labels(list(zip(self.label_names, key)))} "
+                   f"{_format_value(value)}")
+
+    def render(self) -> str:
+        """Returns the metric in the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {_escape(self.help)}",
+            f"# TYPE {self.name} {self.kind}"
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines) + "\n"
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Adds `amount` to the counter of the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+        self._notify(key, amount)
+
+    def value(self, **labels: Any) -> float:
+        """Returns the counter of the given labels."""
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(Metric):
+    """A value that is set to the current state."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        """Sets the gauge of the given labels."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+        self._notify(key, value)
+
+    def value(self, **labels: Any) -> Optional[float]:
+        """Returns the gauge of the given labels, or None if never set."""
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+
+class _Timer:
+    """Context manager that observes the seconds spent in its block."""
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: Dict[str, Any]):
+        self.histogram = histogram
+        self.labels = labels
+        self.start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.histogram.observe(
+            time.perf_counter() - self.start, **self.labels
+        )
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        registry: "MetricsRegistry",
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(registry, name, help, label_names)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Records one observation for the given labels."""
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts, then the sum and the total count.
+                state = self._values[key] = [0.0] * (len(self.buckets) + 3)
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+        self._notify(key, value)
+
+    def time(self, **labels: Any) -> _Timer:
+        """Returns a context manager observing the seconds of its block."""
+        return _Timer(self, labels)
+
+    def count(self, **labels: Any) -> int:
+        """Returns the number of observations for the given labels."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+        return 0 if state is None else int(state[-1])
+
+    def total(self, **labels: Any) -> float:
+        """Returns the sum of the observations for the given labels."""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+        return 0.0 if state is None else state[-2]
+
+    def _samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+        for key, state in items:
+            pairs = list(zip(self.label_names, key))
+            cumulative = 0.0
+            for bound, count in zip(bounds, state[:len(bounds)]):
+                cumulative += count
+                labels = _format_labels(pairs + [("le", bound)])
+                yield (f"{self.name}_bucket{labels} "
+                       f"{_format_value(cumulative)}")
+            labels = _format_labels(pairs)
+            yield f"{self.name}_sum{labels} {_format_value(state[-2])}"
+            yield f"{self.name}_count{labels} {_format_value(state[-1])}"
+
+
+class MetricsRegistry:
+    """A named set of metrics and the hooks observing them."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Metric] = {}
+        self._hooks: List[Hook] = []
+
+    def _get_or_create(
+        self, cls: type, name: str, help: str, label_names: Sequence[str],
+        **kwargs: Any
+    ) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(
+                    self, name, help, label_names, **kwargs
+                )
+            elif type(metric) is not cls:
+                raise ValueError(f"{name} is already a {metric.kind}")
+            return metric
+
+    def counter(
+        self, name: str, help: str, label_names: Sequence[str] = ()
+    ) -> Counter:
+        """Returns the counter called `name`, creating it if needed."""
+        return self._get_or_create(Counter, name, help, label_names)
+
+    def gauge(
+        self, name: str, help: str, label_names: Sequence[str] = ()
+    ) -> Gauge:
+        """Returns the gauge called `name`, creating it if needed."""
+        return self._get_or_create(Gauge, name, help, label_names)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Returns the histogram called `name`, creating it if needed."""
+        return self._get_or_create(
+            Histogram, name, help, label_names, buckets=buckets
+        )
+
+    def add_hook(self, hook: Hook) -> None:
+        """Calls `hook(name, labels, value)` on every observation."""
+        with self._lock:
+            self._hooks = self._hooks + [hook]
+
+    def remove_hook(self, hook: Hook) -> None:
+        """Stops calling a hook added with `add_hook`."""
+        with self._lock:
+            self._hooks = [h for h in self._hooks if h is not hook]
+
+    def _notify(self, name: str, labels: Dict[str, str], value: float) -> None:
+        for hook in self._hooks:
+            try:
+                hook(name, labels, value)
+            except Exception:
+                pass
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text format."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return "".join(metric.render() for metric in metrics)
+
+
+REGISTRY = MetricsRegistry()
+
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    "opet_upstream_request_seconds",
+    "Seconds spent on Opet API calls, including retries.",
+    ("endpoint",)
+)
+UPSTREAM_RESPONSES = REGISTRY.counter(
+    "opet_upstream_responses_total",
+    "Opet API calls by final status code, or 'error' without a response.",
+    ("endpoint", "status")
+)
+ERRORS = REGISTRY.counter(
+    "opet_errors_total",
+    "Errors raised by the client, by exception type.",
+    ("type",)
+)
+STALE_RESULTS = REGISTRY.counter(
+    "opet_stale_results_total",
+    "Last known good price results served after an upstream failure."
+)
+BUDGET_REJECTED = REGISTRY.counter(
+    "opet_upstream_budget_rejected_total",
+    "Opet API calls not sent because the call budget was spent."
+)
+CACHE_STATS = REGISTRY.gauge(
+    "opet_cache",
+    "Price cache counters and hit ratio, sampled when metrics are read.",
+    ("cache", "stat")
+)
+TRANSPORT_STATS = REGISTRY.gauge(
+    "opet_transport",
+    "Upstream requests, opened and reused connections and coalesced calls, "
+    "sampled when metrics are read.",
+    ("stat",)
+)
+BREAKER_STATE = REGISTRY.gauge(
+    "opet_circuit_breaker_state",
+    "1 for the current circuit breaker state, 0 for the others.",
+    ("state",)
+)
+BREAKER_STATS = REGISTRY.gauge(
+    "opet_circuit_breaker",
+    "Circuit breaker failures, rejected calls and openings, sampled when "
+    "metrics are read.",
+    ("stat",)
+)
+
+BREAKER_STATES: Tuple[str, ...] = ("closed", "open", "half_open")
+
+
+def endpoint_of(url: str) -> str:
+    """Returns the Opet API endpoint name of a URL, e.g. "prices"."""
+    return urlsplit(url).path.rstrip("/").rsplit("/", 1)[-1] or "/"
+
+
+def record_upstream(url: str, status: str, seconds: float) -> None:
+    """Records the outcome and latency of an upstream call."""
+    endpoint = endpoint_of(url)
+    UPSTREAM_SECONDS.observe(seconds, endpoint=endpoint)
+    UPSTREAM_RESPONSES.inc(endpoint=endpoint, status=status)
+
+
+def record_error(error: BaseException) -> None:
+    """Counts an error raised by the client."""
+    ERRORS.inc(type=type(error).__name__)
+
+
+def record_stale() -> None:
+    """Counts a stale price result served instead of an error."""
+    STALE_RESULTS.inc()
+
+
+def record_budget_rejected() -> None:
+    """Counts an upstream call refused by the call budget."""
+    BUDGET_REJECTED.inc()
+
+
+def record_cache(name: str, stats: Mapping[str, int]) -> None:
+    """Samples the counters of a cache, adding its hit ratio."""
+    for stat, value in stats.items():
+        CACHE_STATS.set(value, cache=name, stat=stat)
+    lookups = stats.get("hits", 0) + stats.get("misses", 0)
+    CACHE_STATS.set(
+        stats.get("hits", 0) / lookups if lookups else 0.0,
+        cache=name, stat="hit_ratio"
+    )
+
+
+def record_transport(
+    stats: Mapping[str, int], breaker: Optional[Mapping[str, Any]] = None
+) -> None:
+    """Samples the counters of a transport and of its circuit breaker."""
+    for stat, value in stats.items():
+        TRANSPORT_STATS.set(value, stat=stat)
+    if breaker is None:
+        return
+    for state in BREAKER_STATES:
+        BREAKER_STATE.set(
+            1.0 if breaker["state"] == state else 0.0, state=state
+        )
+    for stat, value in breaker.items():
+        if stat != "state":
+            BREAKER_STATS.set(value, stat=stat)
@@ -0,0 +1,391 @@
+"""Offline price snapshots answered from a memory-mapped file.
+
+Batch jobs that look up many provinces one process at a time pay for a
+client and three upstream round trips per call. `write_snapshot` captures
+the provinces, `lastUpdate` and every province's prices in one file;
+`OfflineOpetApiClient` then answers `price()` from it without touching the
+network.
+
+The file is laid out so that a lookup reads only what it needs:
+
+    header   magic, version, creation time, province count, metadata size
+    metadata compact JSON with `lastUpdate` and the province records
+    index    one fixed-size `(code, offset, length)` entry per province,
+             sorted by plate code
+    data     the compact JSON price result of every province
+
+`SnapshotFile` maps the file into memory and binary searches the index,
+so a lookup decodes a single price result and costs microseconds.
+
+    client = OfflineOpetApiClient("prices.snapshot")
+    print(client.price("34"))
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+from opet.api import (
+    BulkPriceResult,
+    FormattedPriceResult,
+    FuelPrice,
+    LastUpdateInfo,
+    Province,
+    filter_prices,
+    normalize_plate_code,
+    project_result,
+    validate_fields
+)
+from opet.exceptions import ProvinceNotFoundError, SnapshotError
+from opet.metrics import record_error
+from opet.products import FuelTypes
+from opet.provinces import default_cache_dir
+from opet.serialization import dumps_bytes
+from opet.utils import to_json
+from typing import (
+    Any, Callable, Dict, Iterable, List, Optional, Tuple, cast
+)
+try:
+    from typing import TypedDict
+except ImportError:  # Python < 3.8
+    from typing_extensions import TypedDict
+
+MAGIC = b"OPETSNAP"
+VERSION = 1
+# magic, version, creation time (Unix seconds), province count,
+# metadata size
+HEADER = struct.Struct("<8sHxxdII")
+# plate code (NUL padded), data offset, data length
+ENTRY = struct.Struct("<8sII")
+
+
+class SnapshotInfo(TypedDict):
+    """When a snapshot was taken and how old it is.
+
+    `createdAt` is an ISO 8601 UTC time and `age` is in seconds.
+    """
+    createdAt: str
+    age: int
+    lastUpdate: str
+
+
+def default_snapshot_path() -> str:
+    """Returns `prices.snapshot` in `default_cache_dir()`."""
+    return os.path.join(default_cache_dir(), "prices.snapshot")
+
+
+def write_snapshot(
+    path: str,
+    bulk: BulkPriceResult,
+    provinces: Iterable[Province],
+    created_at: Optional[float] = None
+) -> int:
+    """Writes the results of a bulk request as a snapshot file.
+
+    The file is written atomically, so readers never see a partial
+    snapshot. Stale results are included as they are.
+
+    Args:
+        path: Where to write the snapshot.
+        bulk: Prices of the provinces, e.g. from `get_all_prices`.
+        provinces: Province records, e.g. from `get_provinces`.
+        created_at: Unix time of the capture. Defaults to now.
+
+    Returns:
+        The number of provinces written.
+    """
+    blobs: List[Tuple[bytes, bytes]] = []
+    for code, result in bulk["results"].items():
+        key = normalize_plate_code(code).encode("ascii")
+        if len(key) > 8:
+            raise ValueError(f"Plate code {code!r} is too long.")
+        blobs.append((key, dumps_bytes(result, "compact", "auto")))
+    blobs.sort()
+    metadata = dumps_bytes({
+        "lastUpdate": bulk["lastUpdate"],
+        "provinces": [
+            {"code": str(item["code"]), "name": item["name"]}
+            for item in provinces
+        ]
+    }, "compact", "auto")
+    offset = HEADER.size + len(metadata) + ENTRY.size * len(blobs)
+    index = bytearray()
+    for key, blob in blobs:
+        index += ENTRY.pack(key, offset, len(blob))
+        offset += len(blob)
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        time.time() if created_at is None else created_at,
+        len(blobs),
+        len(metadata)
+    )
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(metadata)
+        f.write(index)
+        for _, blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, path)
+    return len(blobs)
+
+
+class SnapshotFile:
+    """Read-only, memory-mapped view of a snapshot file.
+
+    Opening reads only the header. Lookups binary search the index in
+    place; the metadata is decoded on first use.
+
+    Attributes:
+        path: Location of the snapshot.
+        created_at: Unix time the snapshot was taken.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Maps the snapshot file into memory.
+
+        Raises:
+            SnapshotError: If the file is missing or not a snapshot.
+        """
+        self.path = path
+        try:
+            with open(path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f"Cannot open snapshot {path}: {e}") from e
+        try:
+            magic, version, created_at, count, metadata_size = (
+                HEADER.unpack_from(self._map, 0)
+            )
+        except struct.error:
+            magic, version = b"", 0
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise SnapshotError(f"{path} is not an opet price snapshot.")
+        self.created_at: float = created_at
+        self._count: int = count
+        self._metadata_end = HEADER.size + metadata_size
+        self._index_end = self._metadata_end + ENTRY.size * count
+        if self._index_end > len(self._map):
+            self._map.close()
+            raise SnapshotError(f"Snapshot {path} is truncated.")
+        self._metadata: Optional[Dict[str, Any]] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, code: object) -> bool:
+        return isinstance(code, str) and self._find(code) is not None
+
+    def __enter__(self) -> "SnapshotFile":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmaps the file."""
+        self._map.close()
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Returns the decoded `lastUpdate` and province records."""
+        if self._metadata is None:
+            self._metadata = json.loads(
+                self._map[HEADER.size:self._metadata_end]
+            )
+        return self._metadata
+
+    @property
+    def last_update(self) -> str:
+        """Returns the `lastUpdateDate` the snapshot was taken at."""
+        return cast(str, self.metadata["lastUpdate"])
+
+    @property
+    def provinces(self) -> List[Province]:
+        """Returns the province records captured with the snapshot."""
+        return cast(List[Province], self.metadata["provinces"])
+
+    def codes(self) -> List[str]:
+        """Returns the plate codes with prices, in index order."""
+        return [
+            ENTRY.unpack_from(
+                self._map, self._metadata_end + i * ENTRY.size
+            )[0].rstrip(b"\0").decode("ascii")
+            for i in range(self._count)
+        ]
+
+    def _find(self, code: str) -> Optional[Tuple[int, int]]:
+        """Returns the `(offset, length)` of a province's data, or None."""
+        try:
+            key = normalize_plate_code(code).encode("ascii").ljust(8, b"\0")
+        except UnicodeEncodeError:
+            return None
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            entry, offset, length = ENTRY.unpack_from(
+                self._map, self._metadata_end + middle * ENTRY.size
+            )
+            if entry < key:
+                low = middle + 1
+            elif entry > key:
+                high = middle
+            else:
+                return offset, length
+        return None
+
+    def get(self, code: str) -> Optional[FormattedPriceResult]:
+        """Returns the price result of a province, or None if missing."""
+        found = self._find(code)
+        if found is None:
+            return None
+        offset, length = found
+        return cast(
+            FormattedPriceResult,
+            json.loads(self._map[offset:offset + length])
+        )
+
+    def age(self, now: Optional[float] = None) -> float:
+        """Returns the seconds elapsed since the snapshot was taken."""
+        return max(0.0, (time.time() if now is None else now)
+                   - self.created_at)
+
+
+class OfflineOpetApiClient:
+    """Opet client answering from a snapshot file, without the network.
+
+    Offers the lookup methods of `opet.api.OpetApiClient` with the same
+    results. `price` additionally reports the snapshot's age under
+    `snapshot`, so callers can tell how old the prices are.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        clock: Callable[[], float] = time.time
+    ) -> None:
+        """Opens the snapshot.
+
+        Args:
+            path: Snapshot file. Defaults to `default_snapshot_path()`.
+            clock: Wall-clock time source, replaceable in tests.
+
+        Raises:
+            SnapshotError: If the file is missing or not a snapshot.
+        """
+        self.snapshot = SnapshotFile(path or default_snapshot_path())
+        self._clock = clock
+
+    def __enter__(self) -> "OfflineOpetApiClient":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Closes the snapshot file."""
+        self.snapshot.close()
+
+    def snapshot_info(self) -> SnapshotInfo:
+        """Returns when the snapshot was taken and how old it is."""
+        return {
+            "createdAt": time.strftime(
+                "%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.snapshot.created_at)
+            ),
+            "age": int(self.snapshot.age(self._clock())),
+            "lastUpdate": self.snapshot.last_update
+        }
+
+    def get_last_update(self) -> LastUpdateInfo:
+        """Returns the last update time the snapshot was taken at."""
+        return {"lastUpdateDate": self.snapshot.last_update}
+
+    def get_provinces(self) -> List[Province]:
+        """Returns the provinces captured with the snapshot."""
+        return self.snapshot.provinces
+
+    def get_price(
+        self, province_id: str, products: Optional[FuelTypes] = None
+    ) -> List[FuelPrice]:
+        """Returns fuel prices for a province; see `price_result`."""
+        return self.price_result(province_id, products)["prices"]
+
+    def price_result(
+        self,
+        province_id: str,
+        products: Optional[FuelTypes] = None,
+        fields: Optional[Iterable[str]] = None
+    ) -> FormattedPriceResult:
+        """Returns the price result of a province from the snapshot.
+
+        `products` and `fields` work as in `OpetApiClient.price_result`.
+
+        Raises:
+            ProvinceNotFoundError: If the province is unknown.
+            SnapshotError: If the snapshot has no prices for the province.
+            ValueError: If `fields` contains an unknown field.
+        """
+        if fields is not None:
+            validate_fields(fields)
+        result = self.snapshot.get(province_id)
+        if result is None:
+            raise self._missing(province_id)
+        return project_result(filter_prices(result, products), fields)
+
+    def _missing(self, province_id: str) -> Exception:
+        """Returns the error for a province without prices."""
+        code = normalize_plate_code(province_id)
+        if any(item["code"] == code for item in self.snapshot.provinces):
+            return SnapshotError(
+                f"The snapshot has no prices for province {province_id}."
+            )
+        error = ProvinceNotFoundError(
+            f"No province found with plate code {province_id} "
+            "in the system."
+        )
+        record_error(error)
+        return error
+
+    def price(
+        self,
+        province_id: str,
+        products: Optional[FuelTypes] = None,
+        fields: Optional[Iterable[str]] = None
+    ) -> str:
+        """Returns prices as JSON for a province, with the snapshot age."""
+        return to_json({
+            "results": self.price_result(province_id, products, fields),
+            "snapshot": self.snapshot_info()
+        })
+
+    def get_all_prices(
+        self, codes: Optional[Iterable[str]] = None, **_: Any
+    ) -> BulkPriceResult:
+        """Returns the prices of many provinces from the snapshot.
+
+        Provinces without prices are reported in `errors`. Keyword
+        arguments of `OpetApiClient.get_all_prices` are accepted and
+        ignored.
+        """
+        bulk: BulkPriceResult = {
+            "lastUpdate": self.snapshot.last_update,
+            "results": {},
+            "errors": {}
+        }
+        if codes is None:
+            codes = self.snapshot.codes()
+        for code in codes:
+            normalized_id = normalize_plate_code(str(code))
+            result = self.snapshot.get(normalized_id)
+            if result is None:
+                bulk["errors"][normalized_id] = str(self._missing(str(code)))
+            else:
+                bulk["results"][normalized_id] = result
+        return bulk
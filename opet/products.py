@@ -0,0 +1,94 @@
+"""Product name index used to filter price results by fuel type.
+
+Opet sells the same dozen products in every province, so filtering 81
+price lists by a fuel type compares the same few names over and over.
+`ProductIndex` folds each product name once, when it is first parsed, and
+remembers which names the most recently used fuel types match. Filtering
+a price list is then one set lookup per product.
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple, Union
+
+FuelTypes = Union[str, Iterable[str]]
+
+
+def fuel_type_key(fuel_types: Optional[FuelTypes]) -> Tuple[str, ...]:
+    """Returns the folded, de-duplicated fuel types as a sorted tuple.
+
+    A string is treated as a single fuel type. Empty values are dropped;
+    an empty tuple means "every product".
+    """
+    if fuel_types is None:
+        return ()
+    if isinstance(fuel_types, str):
+        fuel_types = (fuel_types,)
+    return tuple(sorted({
+        fuel_type.strip().casefold() for fuel_type in fuel_types
+        if fuel_type.strip()
+    }))
+
+
+class ProductIndex:
+    """Known product names and the names each fuel type matches.
+
+    A product matches a fuel type if its name contains the fuel type,
+    ignoring case, so "motorin" matches both "Motorin UltraForce" and
+    "Motorin EcoForce".
+
+    Fuel types come from callers, so only the matches of the
+    `max_cached` most recently used fuel type keys are kept.
+    """
+
+    def __init__(self, max_cached: int = 256) -> None:
+        self.max_cached = max_cached
+        self._lock = threading.Lock()
+        self._folded: Dict[str, str] = {}
+        self._matches: "OrderedDict[Tuple[str, ...], FrozenSet[str]]" = (
+            OrderedDict()
+        )
+
+    def __len__(self) -> int:
+        return len(self._folded)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._folded
+
+    def add(self, name: str) -> str:
+        """Registers a product name and returns its interned copy.
+
+        Interning lets cached and stored results share one copy of each
+        name.
+        """
+        name = sys.intern(name)
+        if name not in self._folded:
+            with self._lock:
+                self._folded[name] = name.casefold()
+                self._matches.clear()
+        return name
+
+    def matching(self, fuel_types: Tuple[str, ...]) -> FrozenSet[str]:
+        """Returns the known names matching any of the folded fuel types.
+
+        `fuel_types` is a key built by `fuel_type_key`. Results are
+        remembered until a new product name is added or the key is
+        evicted as the least recently used one.
+        """
+        with self._lock:
+            matches = self._matches.get(fuel_types)
+            if matches is None:
+                matches = frozenset(
+                    name for name, folded in self._folded.items()
+                    if any(fuel_type in folded for fuel_type in fuel_types)
+                )
+                self._matches[fuel_types] = matches
+                if len(self._matches) > self.max_cached:
+                    self._matches.popitem(last=False)
+            else:
+                self._matches.move_to_end(fuel_types)
+        return matches
+
+
+PRODUCT_INDEX = ProductIndex()
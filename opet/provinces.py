@@ -0,0 +1,182 @@
+"""Province catalog for the Opet API clients.
+
+The clients need the plate code to province name table before they can
+answer a price request. Instead of fetching `/provinces` whenever a client
+is created, `ProvinceCatalog` loads it lazily from a small on-disk snapshot
+and falls back to the bundled list of the 81 provinces of Turkey. The
+snapshot is refreshed from the API only when it is older than `max_age`
+and a price is actually requested.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+FALLBACK_PROVINCES: Tuple[Tuple[str, str], ...] = (
+    ("1", "Adana"), ("2", "Adıyaman"), ("3", "Afyonkarahisar"),
+    ("4", "Ağrı"), ("5", "Amasya"), ("6", "Ankara"), ("7", "Antalya"),
+    ("8", "Artvin"), ("9", "Aydın"), ("10", "Balıkesir"),
+    ("11", "Bilecik"), ("12", "Bingöl"), ("13", "Bitlis"), ("14", "Bolu"),
+    ("15", "Burdur"), ("16", "Bursa"), ("17", "Çanakkale"),
+    ("18", "Çankırı"), ("19", "Çorum"), ("20", "Denizli"),
+    ("21", "Diyarbakır"), ("22", "Edirne"), ("23", "Elazığ"),
+    ("24", "Erzincan"), ("25", "Erzurum"), ("26", "Eskişehir"),
+    ("27", "Gaziantep"), ("28", "Giresun"), ("29", "Gümüşhane"),
+    ("30", "Hakkari"), ("31", "Hatay"), ("32", "Isparta"), ("33", "Mersin"),
+    ("34", "İstanbul"), ("35", "İzmir"), ("36", "Kars"),
+    ("37", "Kastamonu"), ("38", "Kayseri"), ("39", "Kırklareli"),
+    ("40", "Kırşehir"), ("41", "Kocaeli"), ("42", "Konya"),
+    ("43", "Kütahya"), ("44", "Malatya"), ("45", "Manisa"),
+    ("46", "Kahramanmaraş"), ("47", "Mardin"), ("48", "Muğla"),
+    ("49", "Muş"), ("50", "Nevşehir"), ("51", "Niğde"), ("52", "Ordu"),
+    ("53", "Rize"), ("54", "Sakarya"), ("55", "Samsun"), ("56", "Siirt"),
+    ("57", "Sinop"), ("58", "Sivas"), ("59", "Tekirdağ"), ("60", "Tokat"),
+    ("61", "Trabzon"), ("62", "Tunceli"), ("63", "Şanlıurfa"),
+    ("64", "Uşak"), ("65", "Van"), ("66", "Yozgat"), ("67", "Zonguldak"),
+    ("68", "Aksaray"), ("69", "Bayburt"), ("70", "Karaman"),
+    ("71", "Kırıkkale"), ("72", "Batman"), ("73", "Şırnak"),
+    ("74", "Bartın"), ("75", "Ardahan"), ("76", "Iğdır"), ("77", "Yalova"),
+    ("78", "Karabük"), ("79", "Kilis"), ("80", "Osmaniye"), ("81", "Düzce")
+)
+
+
+def default_cache_dir() -> str:
+    """Returns the directory where opet keeps its local files.
+
+    `OPET_CACHE_DIR` takes precedence, then `XDG_CACHE_HOME/opet`, then
+    `~/.cache/opet`.
+    """
+    path = os.environ.get("OPET_CACHE_DIR")
+    if path:
+        return path
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "opet")
+
+
+class ProvinceCatalog:
+    """Lazily loaded, disk-backed plate code to province name table.
+
+    Attributes:
+        path: Location of the JSON snapshot.
+        max_age: Seconds after which the snapshot should be refreshed.
+        retry_delay: Seconds to wait after a failed refresh before trying
+                     again.
+        source: Where the current data came from: "snapshot", "fallback"
+                or "network". None until loaded.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_age: float = 7 * 24 * 60 * 60,
+        retry_delay: float = 15 * 60,
+        clock: Callable[[], float] = time.time
+    ) -> None:
+        """Creates the catalog without reading anything.
+
+        Args:
+            path: Snapshot location. Defaults to `provinces.json` in
+                  `default_cache_dir()`.
+            max_age: Seconds after which the snapshot should be refreshed.
+            retry_delay: Seconds to wait after a failed refresh before
+                         trying again.
+            clock: Wall-clock time source, replaceable in tests.
+        """
+        self.path: str = path or os.path.join(
+            default_cache_dir(), "provinces.json"
+        )
+        self.max_age: float = max_age
+        self.retry_delay: float = retry_delay
+        self.source: Optional[str] = None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._provinces: List[Dict[str, str]] = []
+        self._map: Dict[str, str] = {}
+        self._fetched_at: Optional[float] = None
+        # Clock time before which a failed refresh is not retried
+        self._retry_at: Optional[float] = None
+
+    def _set(
+        self,
+        provinces: List[Any],
+        fetched_at: Optional[float],
+        source: str
+    ) -> None:
+        self._provinces = [
+            {"code": str(item["code"]), "name": item["name"]}
+            for item in provinces
+        ]
+        self._map = {item["code"]: item["name"] for item in self._provinces}
+        self._fetched_at = fetched_at
+        self.source = source
+
+    def _ensure_loaded(self) -> None:
+        if self.source is not None:
+            return
+        with self._lock:
+            if self.source is not None:
+                return
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    snapshot = json.load(f)
+                self._set(
+                    snapshot["provinces"], snapshot["fetchedAt"], "snapshot"
+                )
+            except (OSError, ValueError, KeyError, TypeError):
+                self._set(
+                    [{"code": c, "name": n} for c, n in FALLBACK_PROVINCES],
+                    None,
+                    "fallback"
+                )
+
+    @property
+    def provinces(self) -> List[Dict[str, str]]:
+        """Returns the province records."""
+        self._ensure_loaded()
+        return self._provinces
+
+    @property
+    def map(self) -> Dict[str, str]:
+        """Returns the plate code to province name table."""
+        self._ensure_loaded()
+        return self._map
+
+    def needs_refresh(self) -> bool:
+        """Returns True if the data is missing from disk or too old.
+
+        A failed refresh is not retried until `retry_delay` has passed.
+        """
+        self._ensure_loaded()
+        if self._retry_at is not None and self._clock() < self._retry_at:
+            return False
+        return (self._fetched_at is None
+                or self._clock() - self._fetched_at > self.max_age)
+
+    def update(self, provinces: List[Any]) -> None:
+        """Replaces the data with a fresh `/provinces` response.
+
+        The snapshot is written atomically. Failing to write it is not an
+        error; the data is still used for the lifetime of the process.
+        """
+        fetched_at = self._clock()
+        with self._lock:
+            self._set(provinces, fetched_at, "network")
+            self._retry_at = None
+            snapshot = {"fetchedAt": fetched_at, "provinces": self._provinces}
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+    def refresh_failed(self) -> None:
+        """Records a failed refresh so that it is not retried too soon."""
+        self._retry_at = self._clock() + self.retry_delay
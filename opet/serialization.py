@@ -0,0 +1,157 @@
+"""JSON encoding with a pluggable backend and output mode.
+
+Two output modes are supported:
+
+- "pretty": indented by two spaces. This is the default of `to_json` and
+  the CLI, for people reading the output.
+- "compact": no whitespace. The server uses it, for machines.
+
+Two backends are supported:
+
+- "json": the standard library, always available.
+- "orjson": much faster, used when it is installed.
+
+The default backend is "auto", which picks orjson when it can be imported
+and the standard library otherwise. Both backends keep non-ASCII
+characters as they are and produce the same text for the data this
+package handles.
+
+The defaults come from the `OPET_JSON_BACKEND` and `OPET_JSON_MODE`
+environment variables and can be changed with `configure`.
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+BACKENDS = ("auto", "json", "orjson")
+MODES = ("pretty", "compact")
+
+Encoder = Callable[[Any, bool], bytes]
+
+
+def _stdlib_encoder(data: Any, pretty: bool) -> bytes:
+    if pretty:
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+    else:
+        text = json.dumps(
+            data, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        )
+    return text.encode("utf-8")
+
+
+def _orjson_encoder() -> Optional[Encoder]:
+    try:
+        import orjson
+    except ImportError:
+        return None
+    indent = orjson.OPT_INDENT_2
+
+    def encode(data: Any, pretty: bool) -> bytes:
+        return orjson.dumps(data, option=indent if pretty else 0)
+
+    return encode
+
+
+_settings: Dict[str, str] = {}
+_encoders: Dict[str, Encoder] = {}
+
+
+def configure(
+    backend: Optional[str] = None, mode: Optional[str] = None
+) -> None:
+    """Sets the default backend and output mode.
+
+    Raises:
+        ValueError: If the backend or mode is unknown, or the backend is
+                    not installed.
+    """
+    if backend is not None:
+        _encoder(backend)
+        _settings["backend"] = backend
+    if mode is not None:
+        _settings["mode"] = _check_mode(mode)
+
+
+def _check_mode(mode: str) -> str:
+    """Returns `mode`, raising ValueError if it is unknown."""
+    if mode not in MODES:
+        raise ValueError(
+            f"Unknown JSON mode '{mode}'; expected one of {MODES}."
+        )
+    return mode
+
+
+def default_backend() -> str:
+    """Returns the configured backend name, "auto" by default."""
+    return _settings.get("backend") or (
+        os.environ.get("OPET_JSON_BACKEND") or "auto"
+    )
+
+
+def default_mode() -> str:
+    """Returns the configured output mode, "pretty" by default."""
+    return _settings.get("mode") or (
+        os.environ.get("OPET_JSON_MODE") or "pretty"
+    )
+
+
+def available_backends() -> List[str]:
+    """Returns the backends that can be used in this environment."""
+    names = ["json"]
+    if _orjson_encoder() is not None:
+        names.append("orjson")
+    return names
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """Returns the concrete backend `backend`, or the default, stands for."""
+    name = backend or default_backend()
+    if name == "auto":
+        return "orjson" if "orjson" in available_backends() else "json"
+    return name
+
+
+def _encoder(backend: Optional[str]) -> Encoder:
+    requested = backend or default_backend()
+    encoder = _encoders.get(requested)
+    if encoder is not None:
+        return encoder
+    name = resolve_backend(requested)
+    if name == "json":
+        encoder = _stdlib_encoder
+    elif name == "orjson":
+        encoder = _orjson_encoder()
+        if encoder is None:
+            raise ValueError("The orjson backend is not installed.")
+    else:
+        raise ValueError(
+            f"Unknown JSON backend '{name}'; expected one of {BACKENDS}."
+        )
+    _encoders[requested] = encoder
+    return encoder
+
+
+def dumps_bytes(
+    data: Any, mode: Optional[str] = None, backend: Optional[str] = None
+) -> bytes:
+    """Encodes `data` as UTF-8 JSON.
+
+    Args:
+        data: Dictionaries, lists and scalars to encode.
+        mode: "pretty" or "compact"; defaults to `default_mode()`.
+        backend: "auto", "json" or "orjson"; defaults to
+                 `default_backend()`.
+
+    Raises:
+        ValueError: If the mode or backend is unknown.
+    """
+    pretty = _check_mode(mode or default_mode()) == "pretty"
+    return _encoder(backend)(data, pretty)
+
+
+def dumps(
+    data: Any, mode: Optional[str] = None, backend: Optional[str] = None
+) -> str:
+    """Encodes `data` as a JSON string; see `dumps_bytes`."""
+    return dumps_bytes(data, mode, backend).decode("utf-8")
@@ -0,0 +1,146 @@
+"""Ani yük artışlarında istekleri erkenden geri çeviren kabul denetimi."""
+
+import math
+import time
+from collections import OrderedDict
+from opet.budget import TokenBucket
+from opet.metrics import REGISTRY
+from opet.server.responses import BackendJSONResponse
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+REJECTED = REGISTRY.counter(
+    "opet_http_rejected_total",
+    "Requests shed by admission control, by reason.",
+    ("reason",)
+)
+IN_FLIGHT = REGISTRY.gauge(
+    "opet_http_in_flight",
+    "Requests being served under the admission concurrency cap."
+)
+
+Message = Dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+
+class AdmissionMiddleware:
+    """İstemci başına hız sınırı ve eşzamanlı istek tavanı uygulayan ASGI
+    ara katmanı.
+
+    Yalnızca `paths` ile başlayan ve `exempt` ile başlamayan yollar
+    denetlenir; değişiklik akışı gibi uzun süren bağlantılar tavanı
+    doldurmasın diye muaf tutulur. Hızını aşan istemci `429`, tavan doluyken
+    gelen istek `503` alır; ikisinde de `Retry-After` başlığı gönderilir.
+    Sınırlar her süreç için ayrı uygulanır.
+
+    Attributes:
+        in_flight: Şu an işlenen denetimli istek sayısı.
+    """
+
+    def __init__(
+        self,
+        app: Callable[..., Awaitable[None]],
+        rate: float = 0.0,
+        burst: Optional[float] = None,
+        max_in_flight: int = 0,
+        retry_after: int = 1,
+        paths: Tuple[str, ...] = ("/fuel/",),
+        exempt: Tuple[str, ...] = ("/fuel/changes",),
+        max_clients: int = 10000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """Ara katmanı oluşturur.
+
+        Args:
+            app: Sarılan ASGI uygulaması.
+            rate: İstemci başına saniyede izin verilen istek; 0 ise hız
+                  sınırı yoktur.
+            burst: İstemcinin art arda yapabileceği en fazla istek;
+                   verilmezse `rate` kadardır.
+            max_in_flight: Aynı anda işlenen en fazla istek; 0 ise tavan
+                           yoktur.
+            retry_after: Tavan doluyken önerilen bekleme saniyesi.
+            paths: Denetlenen yol önekleri.
+            exempt: Denetlenmeyen yol önekleri.
+            max_clients: Kovası tutulan en fazla istemci; en eskisi silinir.
+            clock: Monoton zaman kaynağı, testlerde değiştirilebilir.
+        """
+        self.app = app
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.paths = paths
+        self.exempt = exempt
+        self.max_clients = max_clients
+        self.in_flight = 0
+        self._clock = clock
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def _controlled(self, path: str) -> bool:
+        """Yol denetime tabi mi."""
+        return path.startswith(self.paths) and not path.startswith(
+            self.exempt
+        )
+
+    def _bucket(self, client: str) -> TokenBucket:
+        """İstemcinin kovasını döner; yoksa dolu bir kova oluşturur."""
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst, self._clock)
+            self._buckets[client] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        return bucket
+
+    async def _reject(
+        self,
+        scope: Dict[str, Any],
+        receive: Receive,
+        send: Send,
+        status: int,
+        reason: str,
+        retry_after: float
+    ) -> None:
+        """İsteği uygulamaya iletmeden geri çevirir."""
+        REJECTED.inc(reason=reason)
+        detail = (
+            "Too many requests; slow down." if status == 429
+            else "The server is busy; try again later."
+        )
+        response = BackendJSONResponse(
+            {"detail": detail},
+            status_code=status,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+        await response(scope, receive, send)
+
+    async def __call__(
+        self, scope: Dict[str, Any], receive: Receive, send: Send
+    ) -> None:
+        """İsteği kabul ederse uygulamaya iletir."""
+        if scope["type"] != "http" or not self._controlled(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        if self.rate > 0:
+            client = scope.get("client")
+            wait = self._bucket(client[0] if client else "").take()
+            if wait:
+                await self._reject(
+                    scope, receive, send, 429, "rate_limit", wait
+                )
+                return
+        if 0 < self.max_in_flight <= self.in_flight:
+            await self._reject(
+                scope, receive, send, 503, "overload", self.retry_after
+            )
+            return
+        self.in_flight += 1
+        IN_FLIGHT.set(self.in_flight)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            IN_FLIGHT.set(self.in_flight)
@@ -1,20 +1,127 @@
 """Opet API Server uygulaması."""
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from opet.async_api import AsyncOpetApiClient
+from opet.async_transport import AsyncHttpTransport
+from opet.history import PriceHistory
+from opet.server.admission import AdmissionMiddleware
+from opet.server.compression import CompressionMiddleware
+from opet.server.controllers.changes import ChangesController
 from opet.server.controllers.fuel import FuelController
+from opet.server.controllers.metrics import MetricsController
+from opet.server.feed import ChangeFeed
+from opet.server.metrics import MetricsMiddleware
+from opet.server.providers.opet import OpetProvider
+from opet.server.providers.registry import ProviderRegistry
+from opet.server.refresher import SnapshotRefresher
+from opet.server.responses import BackendJSONResponse
+from opet.server.settings import Settings
+from opet.server.shared import SharedSnapshotStore
+
+
+settings = Settings.from_env()
+
+history = None
+if settings.history_path:
+    history = PriceHistory(settings.history_path)
+
+# Kontrolcüleri oluştur
+# Opet API'sine yapılan çağrılar `OPET_UPSTREAM_RATE` ile sınırlanır
+transport = AsyncHttpTransport(
+    max_calls_per_second=settings.upstream_rate or None
+)
+provider = OpetProvider(
+    AsyncOpetApiClient(transport=transport, history=history),
+    max_concurrency=settings.max_concurrency,
+    prerender=settings.prerender
+)
+# Dağıtıcı karşılaştırması için sağlayıcı kaydı; başka dağıtıcılar
+# `registry.register(...)` ile eklenebilir.
+registry = ProviderRegistry(default_timeout=settings.vendor_timeout)
+registry.register(provider)
+# Birden fazla worker varsa anlık görüntü süreçler arasında paylaşılır
+store = None
+if settings.shared_snapshot_path:
+    store = SharedSnapshotStore(settings.shared_snapshot_path)
+refresher = None
+if settings.refresh_enabled or store is not None:
+    refresher = SnapshotRefresher(
+        provider.client,
+        poll_interval=settings.poll_interval,
+        stale_after=settings.stale_after,
+        max_concurrency=settings.max_concurrency,
+        store=store
+    )
+fuel_controller = FuelController(
+    provider,
+    refresher,
+    cache_max_age=settings.cache_max_age,
+    history=history,
+    registry=registry
+)
+metrics_controller = MetricsController(provider, refresher)
+
+# Değişiklik akışı tek bir yenileyiciyi dinler; yenileme kapalıysa akış
+# için ayrı bir yenileyici yalnızca abone varken çalışır.
+feed_refresher = refresher
+if feed_refresher is None:
+    feed_refresher = SnapshotRefresher(
+        provider.client,
+        poll_interval=settings.poll_interval,
+        stale_after=settings.stale_after,
+        max_concurrency=settings.max_concurrency
+    )
+change_feed = ChangeFeed(feed_refresher, manage_refresher=refresher is None)
+changes_controller = ChangesController(change_feed)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Arka plan yenileyicisini uygulama ile birlikte başlatıp durdurur."""
+    if refresher is not None:
+        refresher.start()
+    yield
+    await change_feed.close()
+    if refresher is not None:
+        await refresher.stop()
+    await provider.client.aclose()
+    if history is not None:
+        history.close()
+    if store is not None:
+        store.close()
 
 
 app = FastAPI(
     title="Opet Yakıt Fiyatları API",
     description="Opet yakıt fiyatlarına erişim sağlayan API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=BackendJSONResponse
 )
 
-# Kontrolcüleri oluştur
-fuel_controller = FuelController()
+# Büyük yanıtları sıkıştır; ölçümler sıkıştırmayı da kapsasın diye önce
+# eklenir ve metriklerin içinde çalışır
+if settings.gzip_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.gzip_min_size,
+        compresslevel=6
+    )
+# Yük artışlarında istekleri kuyruğa almadan geri çevir
+app.add_middleware(
+    AdmissionMiddleware,
+    rate=settings.rate_limit,
+    burst=settings.rate_burst,
+    max_in_flight=settings.max_in_flight
+)
+# İstek sürelerini ölç
+app.add_middleware(MetricsMiddleware)
 
 # Route'ları ekle
 app.include_router(fuel_controller.router)
+app.include_router(changes_controller.router)
+app.include_router(metrics_controller.router)
 
 
 @app.get("/")
@@ -0,0 +1,70 @@
+"""Büyük yanıtları gzip ile sıkıştıran ara katman."""
+
+from opet.server.conditional import gzip_etag
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+
+# Olaylar biriktirilmeden iletilmesi gereken içerik türleri
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+
+
+class _Responder(GZipResponder):
+    """`UNCOMPRESSED_TYPES` yanıtlarını sıkıştırmadan geçiren yanıtlayıcı.
+
+    Sıkıştırılan yanıtların ETag'i `gzip_etag` ile ayrıştırılır. İstemci bu
+    ETag ile geldiğinde verilen 304 yanıtı da aynı ETag'i taşır.
+    """
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if_none_match = Headers(scope=scope).get("if-none-match", "")
+
+        async def send_tagged(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("etag")
+                if etag is not None and (
+                    message["status"] == 304
+                    and gzip_etag(etag) in if_none_match
+                    or not self.content_encoding_set
+                    and headers.get("content-encoding") == "gzip"
+                ):
+                    headers["ETag"] = gzip_etag(etag)
+            await send(message)
+
+        await super().__call__(scope, receive, send_tagged)
+
+    async def send_with_gzip(self, message: Message) -> None:
+        await super().send_with_gzip(message)
+        if message["type"] == "http.response.start":
+            content_type = Headers(raw=message["headers"]).get(
+                "content-type", ""
+            )
+            if content_type.startswith(UNCOMPRESSED_TYPES):
+                # Starlette zaten kodlanmış yanıtlara dokunmaz
+                self.content_encoding_set = True
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """`Accept-Encoding: gzip` gönderen istemcilere büyük yanıtları
+    sıkıştırır.
+
+    `minimum_size` bayttan küçük yanıtlar ve SSE akışları sıkıştırılmaz;
+    akışlar gzip tamponunda bekletilirse olaylar istemciye geç ulaşır.
+    """
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] == "http":
+            headers = Headers(scope=scope)
+            if "gzip" in headers.get("Accept-Encoding", ""):
+                responder = _Responder(
+                    self.app, self.minimum_size,
+                    compresslevel=self.compresslevel
+                )
+                await responder(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
@@ -0,0 +1,99 @@
+"""Koşullu HTTP yanıtları (ETag / Last-Modified / 304) için yardımcılar."""
+
+import hashlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Mapping, Optional
+
+# Opet'in `lastUpdateDate` değerleri saat dilimi içermez; Türkiye saatidir.
+ISTANBUL = timezone(timedelta(hours=3))
+
+# gzip ile kodlanmış gövdelerin ETag'lerine eklenen sonek
+GZIP_SUFFIX = "-gzip"
+
+
+def make_etag(body: bytes) -> str:
+    """Yanıt gövdesinden güçlü bir ETag üretir."""
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def gzip_etag(etag: str) -> str:
+    """ETag'in gzip ile kodlanmış gövdeye ait sürümünü döner.
+
+    Aynı içeriğin iki farklı bayt gösterimi aynı güçlü ETag'i taşımaz.
+    """
+    if etag.endswith('"'):
+        return etag[:-1] + GZIP_SUFFIX + '"'
+    return etag
+
+
+def _strip_encoding(tag: str) -> str:
+    """ETag'den `gzip_etag` ile eklenen soneki kaldırır."""
+    if tag.endswith(GZIP_SUFFIX + '"'):
+        return tag[:-len(GZIP_SUFFIX) - 1] + '"'
+    return tag
+
+
+def parse_last_update(last_update: Optional[str]) -> Optional[datetime]:
+    """`lastUpdateDate` değerini saat dilimli bir zamana çevirir.
+
+    Çözümlenemeyen değerler için None döner.
+    """
+    if not last_update:
+        return None
+    try:
+        value = datetime.fromisoformat(last_update.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=ISTANBUL)
+    return value.replace(microsecond=0)
+
+
+def http_date(value: datetime) -> str:
+    """Zamanı `Last-Modified` başlığı biçiminde döner."""
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """`If-None-Match` başlığı ETag ile eşleşiyor mu (zayıf karşılaştırma).
+
+    gzip ile kodlanmış yanıtların ETag'leri de kimlik gövdesininkiyle
+    eşleşir.
+    """
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [
+        _strip_encoding(tag.strip()) for tag in if_none_match.split(",")
+    ]
+    return any(
+        tag[2:] == etag if tag.startswith("W/") else tag == etag
+        for tag in candidates
+    )
+
+
+def is_not_modified(
+    headers: Mapping[str, str],
+    etag: str,
+    last_modified: Optional[datetime]
+) -> bool:
+    """İstemcinin kopyası hâlâ geçerliyse True döner.
+
+    RFC 9110'a uygun olarak `If-None-Match` varsa `If-Modified-Since`
+    yok sayılır.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since is None:
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified <= since
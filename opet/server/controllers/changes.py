@@ -0,0 +1,85 @@
+"""Fiyat değişikliklerini Server-Sent Events ile sunan kontrolcü."""
+
+import asyncio
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from opet.changes import ProvinceChange
+from opet.serialization import dumps
+from opet.server.controllers.fuel import split_values
+from opet.server.feed import ChangeFeed
+from typing import AsyncIterator, List, Optional
+
+# İstemcinin bağlantı koparsa yeniden denemeden önce bekleyeceği süre (ms)
+RETRY_MS = 5000
+
+
+def format_event(event: ProvinceChange) -> str:
+    """Değişikliği bir SSE `price-change` olayı olarak biçimlendirir."""
+    data = dumps(event, "compact")
+    return (
+        f"event: price-change\n"
+        f"id: {event['lastUpdate']}\n"
+        f"data: {data}\n\n"
+    )
+
+
+class ChangesController:
+    """`/fuel/changes` altında fiyat değişikliklerini akıtan kontrolcü.
+
+    Her abone yalnızca kendi il ve yakıt türü süzgeçlerine uyan olayları
+    alır. Bağlantı boştayken `heartbeat` saniyede bir yorum satırı
+    gönderilir.
+    """
+
+    def __init__(self, feed: ChangeFeed, heartbeat: float = 15.0):
+        """Kontrolcüyü başlatır."""
+        self.feed = feed
+        self.heartbeat = heartbeat
+        self.router = APIRouter(prefix="/fuel", tags=["fuel"])
+        self.router.add_api_route(
+            "/changes",
+            self.changes,
+            response_class=StreamingResponse,
+            methods=["GET"]
+        )
+
+    async def changes(
+        self,
+        province: Optional[str] = Query(
+            None, description="Virgülle ayrılmış plaka kodları, ör. 34,6"
+        ),
+        fuel_type: Optional[str] = Query(
+            None, description="Virgülle ayrılmış yakıt türleri, ör. motorin"
+        )
+    ) -> StreamingResponse:
+        """Değişen her il için eski ve yeni fiyatları olay olarak akıtır."""
+        return StreamingResponse(
+            self.stream(split_values(province), split_values(fuel_type)),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    async def stream(
+        self,
+        provinces: Optional[List[str]] = None,
+        fuel_types: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        """Abone olur ve olayları SSE satırları olarak döner.
+
+        Abonelik ilk satırla birlikte açılır ve akış kapanınca bırakılır.
+        Abone olaylara yetişemezse akış kapanır; istemci yeniden bağlanır.
+        """
+        subscription = self.feed.subscribe(provinces, fuel_types)
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            while not subscription.overflowed:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), self.heartbeat
+                    )
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield format_event(event)
+        finally:
+            await self.feed.unsubscribe(subscription)
@@ -1,21 +1,148 @@
 """Yakıt fiyatları için kontrolcü."""
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from opet.api import (
+    BulkPriceResult,
+    FormattedPriceResult,
+    RESULT_FIELDS,
+    filter_prices,
+    normalize_plate_code,
+    project_result,
+    validate_fields
+)
+from opet.exceptions import (
+    BudgetExceededError, CircuitOpenError, ProvinceNotFoundError
+)
+from opet.export import EXPORT_FORMATS
+from opet.history import PriceHistory
+from opet.server.conditional import (
+    http_date,
+    is_not_modified,
+    make_etag,
+    parse_last_update
+)
 from opet.server.models.fuel import (
+    BulkPriceResponse,
+    CheapestResponse,
+    FuelPriceRequest,
+    HistoryResponse,
     Province,
     PriceResponse,
-    LastUpdate
+    LastUpdate,
+    StatsResponse,
+    VendorPriceResponse
+)
+from opet.server.providers.opet import OpetProvider, render_json
+from opet.server.providers.registry import ProviderRegistry
+from opet.server.refresher import PriceSnapshot, SnapshotRefresher
+from opet.stats import PriceStats
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+# Dışa aktarma biçimlerinin içerik türleri
+EXPORT_MEDIA_TYPES: Dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8"
+}
+
+# Toplu fiyat isteğinde en fazla kaç il istenebilir
+MAX_BATCH_SIZE = 100
+
+FUEL_TYPE_DESCRIPTION = (
+    "Virgülle ayrılmış yakıt türleri; adı bunlardan birini içeren ürünler "
+    "döner, ör. motorin"
+)
+FIELDS_DESCRIPTION = (
+    f"Virgülle ayrılmış alanlar: {', '.join(RESULT_FIELDS)}"
 )
-from opet.server.providers.opet import OpetProvider
-from typing import List
+
+
+def split_values(value: Optional[str]) -> Optional[List[str]]:
+    """Virgülle ayrılmış sorgu parametresini listeye çevirir."""
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """`fields` parametresini doğrular; geçersiz alan için 422 döner."""
+    if fields is None:
+        return None
+    try:
+        return validate_fields(split_values(fields) or ())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _shape(
+    result: FormattedPriceResult,
+    fuel_type: Optional[str],
+    fields: Optional[Tuple[str, ...]]
+) -> FormattedPriceResult:
+    """Sonucu yakıt türüne göre süzer ve istenen alanlara indirir."""
+    return project_result(
+        filter_prices(result, split_values(fuel_type)), fields
+    )
+
+
+async def _snapshot_outcomes(
+    snapshot: PriceSnapshot
+) -> AsyncIterator[Tuple[str, Any]]:
+    """Anlık görüntüdeki sonuçları `(kod, sonuç)` olarak döner."""
+    for item in snapshot.results.items():
+        yield item
 
 
 class FuelController:
-    """Yakıt fiyatları için kontrolcü sınıfı."""
+    """Yakıt fiyatları için kontrolcü sınıfı.
+
+    Bir `SnapshotRefresher` verilirse istekler onun bellekteki anlık
+    görüntüsünden yanıtlanır ve yanıtlara görüntünün yaşı eklenir.
+
+    Yanıtlar `ETag`, `Last-Modified` ve `Cache-Control` başlıklarını taşır;
+    `If-None-Match` ya da `If-Modified-Since` ile gelen isteklere içerik
+    değişmediyse gövdesiz 304 döner.
 
-    def __init__(self):
-        """Kontrolcüyü başlatır."""
-        self.provider = OpetProvider()
+    Bir `PriceHistory` verilirse `/fuel/history/{province_id}` geçmiş
+    fiyatları döner.
+
+    `/fuel/compare/{province_id}`, `registry` içindeki tüm dağıtıcıları
+    eşzamanlı olarak sorgular. Kayıt verilmezse yalnızca `provider` ile
+    oluşturulur.
+
+    `/fuel/stats` ve `/fuel/cheapest/{product}` ülke geneli özetleri
+    istemcinin `stats` dizininden yanıtlar. Dizin, fiyatlar çekildikçe ve
+    yenileyici her yeni görüntü aldığında yalnızca değişen illerle
+    güncellenir; yeni bir `lastUpdate` eski illeri dizinden çıkarır.
+    """
+
+    def __init__(
+        self,
+        provider: Optional[OpetProvider] = None,
+        refresher: Optional[SnapshotRefresher] = None,
+        cache_max_age: int = 60,
+        history: Optional[PriceHistory] = None,
+        registry: Optional[ProviderRegistry] = None
+    ):
+        """Kontrolcüyü başlatır.
+
+        `cache_max_age`, `Cache-Control` başlığındaki `max-age` değeridir.
+        """
+        self.provider = provider if provider is not None else OpetProvider()
+        self.refresher = refresher
+        self.cache_max_age = cache_max_age
+        self.history = history
+        if registry is None:
+            registry = ProviderRegistry()
+            registry.register(self.provider)
+        self.registry = registry
+        if refresher is not None:
+            # Paylaşılan depodan okunan görüntüler istemciden geçmez.
+            stats = self.provider.client.stats
+            refresher.add_listener(
+                lambda previous, snapshot: stats.update_many(snapshot.results)
+            )
         self.router = APIRouter(prefix="/fuel", tags=["fuel"])
 
         # Route'ları tanımla
@@ -25,6 +152,18 @@ class FuelController:
             response_model=List[Province],
             methods=["GET"]
         )
+        self.router.add_api_route(
+            "/prices",
+            self.get_all_prices,
+            response_model=BulkPriceResponse,
+            methods=["GET"]
+        )
+        self.router.add_api_route(
+            "/prices",
+            self.post_prices,
+            response_model=BulkPriceResponse,
+            methods=["POST"]
+        )
         self.router.add_api_route(
             "/prices/{province_id}",
             self.get_prices,
@@ -37,18 +176,493 @@ class FuelController:
             response_model=LastUpdate,
             methods=["GET"]
         )
+        self.router.add_api_route(
+            "/export",
+            self.export,
+            response_class=StreamingResponse,
+            methods=["GET"]
+        )
+        self.router.add_api_route(
+            "/history/{province_id}",
+            self.get_history,
+            response_model=HistoryResponse,
+            methods=["GET"]
+        )
+        self.router.add_api_route(
+            "/stats",
+            self.get_stats,
+            response_model=StatsResponse,
+            methods=["GET"]
+        )
+        self.router.add_api_route(
+            "/cheapest/{product}",
+            self.get_cheapest,
+            response_model=CheapestResponse,
+            methods=["GET"]
+        )
+        self.router.add_api_route(
+            "/vendors",
+            self.get_vendors,
+            response_model=List[str],
+            methods=["GET"]
+        )
+        self.router.add_api_route(
+            "/compare/{province_id}",
+            self.compare_prices,
+            response_model=VendorPriceResponse,
+            methods=["GET"]
+        )
+
+    def _snapshot(self) -> Optional[PriceSnapshot]:
+        """Yenileyici varsa bellekteki anlık görüntüyü döner."""
+        if self.refresher is None:
+            return None
+        return self.refresher.snapshot
+
+    def _snapshot_headers(self) -> Dict[str, str]:
+        """Anlık görüntünün yaşını ve bayat olup olmadığını bildiren başlıklar.
+
+        `X-Snapshot-Age` saniye cinsinden yaşı, `X-Snapshot-Stale` ise
+        görüntünün upstream ile `stale_after` süresinden uzun süredir
+        doğrulanamadığını bildirir.
+        """
+        if self.refresher is None or self.refresher.snapshot is None:
+            return {}
+        return {
+            "X-Snapshot-Age": str(int(self.refresher.age() or 0)),
+            "X-Snapshot-Stale": str(self.refresher.is_stale()).lower()
+        }
+
+    def _respond(
+        self,
+        request: Request,
+        body: bytes,
+        last_update: Optional[str],
+        stale: bool = False
+    ) -> Response:
+        """JSON gövdesini önbellek başlıklarıyla ya da 304 olarak döner.
+
+        `stale` verilirse yanıt `X-Stale: true` başlığını taşır.
+        """
+        etag = make_etag(body)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={self.cache_max_age}"
+        }
+        headers.update(self._snapshot_headers())
+        if stale:
+            headers["X-Stale"] = "true"
+        last_modified = parse_last_update(last_update)
+        if last_modified is not None:
+            headers["Last-Modified"] = http_date(last_modified)
+        if is_not_modified(request.headers, etag, last_modified):
+            return Response(status_code=304, headers=headers)
+        return Response(
+            content=body, media_type="application/json", headers=headers
+        )
 
-    async def get_provinces(self) -> List[Province]:
+    async def get_provinces(self, request: Request) -> Response:
         """Tüm illeri listeler."""
-        return self.provider.get_provinces()
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            return self._respond(
+                request, render_json(snapshot.provinces), None
+            )
+        provinces = await self.provider.get_provinces()
+        return self._respond(request, render_json(provinces), None)
+
+    async def get_prices(
+        self,
+        province_id: str,
+        request: Request,
+        fuel_type: Optional[str] = Query(
+            None, description=FUEL_TYPE_DESCRIPTION
+        ),
+        fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+    ) -> Response:
+        """Belirli bir il için yakıt fiyatlarını döner.
 
-    async def get_prices(self, province_id: str) -> PriceResponse:
-        """Belirli bir il için yakıt fiyatlarını döner."""
+        Sonuç anlık görüntüde ya da istemci önbelleğinde varsa 304 yanıtı
+        upstream'e hiç gidilmeden verilir. Upstream hata verirse son bilinen
+        fiyatlar `stale` işaretiyle döner; hiç fiyat yoksa 503 döner.
+        `fuel_type` ve `fields` yanıtı istenen ürün ve alanlara indirir.
+        """
+        selected = _parse_fields(fields)
+        snapshot = self._snapshot()
+        result = snapshot.get(province_id) if snapshot is not None else None
         try:
-            return self.provider.get_prices(province_id)
-        except Exception as e:
+            if result is None:
+                result = await self.provider.get_prices(province_id)
+        except ProvinceNotFoundError as e:
             raise HTTPException(status_code=404, detail=str(e))
+        except Exception as e:
+            raise self._unavailable(e)
+        if fuel_type or selected is not None:
+            body = render_json(_shape(result, fuel_type, selected))
+        else:
+            body = self.provider.render(result)
+        return self._respond(
+            request,
+            body,
+            result["lastUpdate"],
+            stale=bool(result.get("stale"))
+        )
+
+    def _unavailable(self, error: Exception) -> HTTPException:
+        """Upstream hatası için 503 yanıtı oluşturur.
+
+        Devre kesici açıksa ya da çağrı bütçesi tükendiyse `Retry-After`
+        başlığı eklenir.
+        """
+        headers = None
+        breaker = getattr(self.provider.client.transport, "breaker", None)
+        if isinstance(error, CircuitOpenError) and breaker is not None:
+            retry_after = breaker.retry_after()
+            if retry_after is not None:
+                headers = {"Retry-After": str(int(retry_after) + 1)}
+        elif isinstance(error, BudgetExceededError):
+            headers = {"Retry-After": str(int(error.retry_after) + 1)}
+        return HTTPException(
+            status_code=503,
+            detail=str(error) or type(error).__name__,
+            headers=headers
+        )
 
-    async def get_last_update(self) -> LastUpdate:
+    async def get_all_prices(
+        self,
+        request: Request,
+        ids: Optional[str] = Query(
+            None, description="Virgülle ayrılmış plaka kodları, ör. 34,6,35"
+        ),
+        fuel_type: Optional[str] = Query(
+            None, description=FUEL_TYPE_DESCRIPTION
+        ),
+        fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+    ) -> Response:
+        """Tüm iller ya da `ids` ile verilen iller için fiyatları döner.
+
+        Fiyatı alınamayan iller `errors` alanında listelenir. `fuel_type`
+        ve `fields` sonuçları istenen ürün ve alanlara indirir.
+        """
+        selected = _parse_fields(fields)
+        if ids is not None:
+            codes = split_values(ids) or []
+            bulk = await self._batch(
+                [(code, fuel_type) for code in codes], selected
+            )
+            return self._respond_bulk(request, bulk)
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            bulk = {
+                "lastUpdate": snapshot.last_update,
+                "results": snapshot.results,
+                "errors": {}
+            }
+        else:
+            try:
+                bulk = await self.provider.get_all_prices()
+            except Exception as e:
+                raise self._unavailable(e)
+        if fuel_type or selected is not None:
+            bulk = {
+                **bulk,
+                "results": {
+                    code: _shape(result, fuel_type, selected)
+                    for code, result in bulk["results"].items()
+                }
+            }
+        return self._respond_bulk(request, bulk)
+
+    async def post_prices(
+        self,
+        request: Request,
+        body: List[FuelPriceRequest],
+        fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+    ) -> Response:
+        """İstekteki iller için fiyatları tek yanıtta döner.
+
+        Her il kendi `fuel_type` filtresini taşıyabilir; fiyatı alınamayan
+        iller `errors` alanında listelenir.
+        """
+        bulk = await self._batch(
+            [(item.province_id, item.fuel_type) for item in body],
+            _parse_fields(fields)
+        )
+        return self._respond_bulk(request, bulk)
+
+    async def _batch(
+        self,
+        requests: List[Tuple[str, Optional[str]]],
+        fields: Optional[Tuple[str, ...]] = None
+    ) -> BulkPriceResult:
+        """`(plaka kodu, yakıt türü)` çiftlerinin fiyatlarını toplar.
+
+        Anlık görüntüde bulunan iller oradan alınır; kalanlar tek bir
+        `/lastupdate` sorgusuyla eşzamanlı olarak çekilir. Sonuçlar
+        `fields` alanlarına indirilir.
+        """
+        wanted: Dict[str, Optional[str]] = {}
+        for code, fuel_type in requests:
+            wanted[normalize_plate_code(code.strip())] = fuel_type
+        if not wanted:
+            raise HTTPException(
+                status_code=422, detail="En az bir plaka kodu verilmeli."
+            )
+        if len(wanted) > MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=422,
+                detail=f"En fazla {MAX_BATCH_SIZE} il istenebilir."
+            )
+        snapshot = self._snapshot()
+        bulk: BulkPriceResult = {
+            "lastUpdate": snapshot.last_update if snapshot else "",
+            "results": {},
+            "errors": {}
+        }
+        missing = []
+        for code in wanted:
+            result = snapshot.get(code) if snapshot is not None else None
+            if result is None:
+                missing.append(code)
+            else:
+                bulk["results"][code] = result
+        if missing:
+            try:
+                fetched = await self.provider.get_prices_batch(missing)
+            except Exception as e:
+                raise self._unavailable(e)
+            if snapshot is None:
+                bulk["lastUpdate"] = fetched["lastUpdate"]
+            bulk["results"].update(fetched["results"])
+            bulk["errors"].update(fetched["errors"])
+        # Sonuçlar istekteki sırayla döner
+        results = bulk["results"]
+        bulk["results"] = {
+            code: _shape(results[code], fuel_type, fields)
+            for code, fuel_type in wanted.items() if code in results
+        }
+        return bulk
+
+    def _respond_bulk(
+        self, request: Request, bulk: BulkPriceResult
+    ) -> Response:
+        """Toplu fiyat sonucunu önbellek başlıklarıyla döner."""
+        stale = any(r.get("stale") for r in bulk["results"].values())
+        return self._respond(
+            request, render_json(bulk), bulk["lastUpdate"], stale=stale
+        )
+
+    async def get_last_update(self, request: Request) -> Response:
         """Son güncelleme zamanını döner."""
-        return self.provider.get_last_update()
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            info = {"lastUpdateDate": snapshot.last_update}
+        else:
+            try:
+                info = await self.provider.get_last_update()
+            except Exception as e:
+                raise self._unavailable(e)
+        return self._respond(
+            request, render_json(info), info["lastUpdateDate"]
+        )
+
+    async def export(
+        self,
+        export_format: str = Query(
+            "ndjson", alias="format", pattern="^(ndjson|csv)$"
+        )
+    ) -> StreamingResponse:
+        """Tüm illerin fiyatlarını NDJSON ya da CSV satırları olarak akıtır.
+
+        Her fiyat bir satırdır (`province`, `product`, `amount`,
+        `lastUpdate`). İller alındıkça yazılır; tablo bellekte toplanmaz.
+        """
+        header, rows = EXPORT_FORMATS[export_format]
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            outcomes = _snapshot_outcomes(snapshot)
+        else:
+            outcomes = self.provider.iter_all_prices()
+
+        async def body() -> AsyncIterator[str]:
+            first = header()
+            if first:
+                yield first
+            async for code, outcome in outcomes:
+                chunk = rows(code, outcome)
+                if chunk:
+                    yield chunk
+
+        return StreamingResponse(
+            body(),
+            media_type=EXPORT_MEDIA_TYPES[export_format],
+            headers=self._snapshot_headers()
+        )
+
+    async def get_history(
+        self,
+        province_id: str,
+        request: Request,
+        product: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: Optional[int] = Query(None, ge=1)
+    ) -> Response:
+        """Bir ilin fiyat değişikliklerini eskiden yeniye döner.
+
+        `since` ve `until`, `lastUpdateDate` biçiminde tarih ya da zamandır;
+        `limit` verilirse en yeni kayıtlar döner. SQLite sorgusu olay
+        döngüsünü bekletmemek için bir iş parçacığında çalışır.
+        """
+        if self.history is None:
+            raise HTTPException(
+                status_code=404, detail="Fiyat geçmişi etkin değil."
+            )
+        province = normalize_plate_code(province_id)
+        history = self.history
+        records = await asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: history.query(
+                province, product=product, since=since, until=until,
+                limit=limit
+            )
+        )
+        body = render_json({
+            "province": province,
+            "records": [
+                {
+                    "product": record["product"],
+                    "amount": record["amount"],
+                    "lastUpdate": record["lastUpdate"]
+                }
+                for record in records
+            ]
+        })
+        last_update = records[-1]["lastUpdate"] if records else None
+        return self._respond(request, body, last_update)
+
+    async def get_vendors(self) -> List[str]:
+        """Kayıtlı dağıtıcıların adlarını döner."""
+        return self.registry.names()
+
+    async def compare_prices(
+        self,
+        province_id: str,
+        request: Request,
+        fuel_type: Optional[str] = Query(
+            None, description=FUEL_TYPE_DESCRIPTION
+        )
+    ) -> Response:
+        """Bir ilin fiyatlarını tüm dağıtıcılardan toplayıp tek yanıtta döner.
+
+        `results` dağıtıcı adına göre sonuçları, `prices` ise tüm fiyatları
+        kaynaklarıyla birlikte ürün adına ve fiyata göre sıralı verir.
+        Yanıt vermeyen dağıtıcılar `errors` alanında listelenir. Hiçbir
+        dağıtıcı fiyat veremezse il bulunamadığında 404, diğer durumlarda
+        503 döner.
+        """
+        results, errors = await self.registry.get_prices(province_id)
+        if not results:
+            if errors and all(
+                isinstance(e, ProvinceNotFoundError) for e in errors.values()
+            ):
+                raise HTTPException(
+                    status_code=404, detail=str(next(iter(errors.values())))
+                )
+            raise HTTPException(
+                status_code=503,
+                detail="; ".join(
+                    f"{name}: {str(e) or type(e).__name__}"
+                    for name, e in errors.items()
+                ) or "Kayıtlı dağıtıcı yok."
+            )
+        fuel_types = split_values(fuel_type)
+        results = {
+            name: filter_prices(result, fuel_types)
+            for name, result in results.items()
+        }
+        prices = sorted(
+            (
+                {"vendor": name, "name": price["name"],
+                 "amount": price["amount"]}
+                for name, result in results.items()
+                for price in result["prices"]
+            ),
+            key=lambda price: (price["name"], price["amount"])
+        )
+        body = render_json({
+            "province": normalize_plate_code(province_id),
+            "results": results,
+            "prices": prices,
+            "errors": {
+                name: str(e) or type(e).__name__
+                for name, e in errors.items()
+            }
+        })
+        stale = any(result.get("stale") for result in results.values())
+        return self._respond(request, body, None, stale=stale)
+
+    async def _client_stats(self) -> PriceStats:
+        """İstemcinin fiyat özetleri dizinini döner.
+
+        Anlık görüntü varsa dizin ondan tamamlanır; görüntü tüm illeri
+        kapsadığından upstream'e istek gönderilmez. Yoksa istemci eksik
+        illeri ve yeni bir güncellemeden sonra tüm illeri çeker.
+        """
+        client = self.provider.client
+        snapshot = self._snapshot()
+        if snapshot is not None:
+            if not client.stats.covers(snapshot.table.codes):
+                client.stats.update_many(snapshot.results)
+            return client.stats
+        try:
+            await client.price_stats()
+        except Exception as e:
+            raise self._unavailable(e)
+        return client.stats
+
+    async def get_stats(
+        self,
+        request: Request,
+        fuel_type: Optional[str] = Query(
+            None, description=FUEL_TYPE_DESCRIPTION
+        )
+    ) -> Response:
+        """Ürünlerin ülke geneli fiyat özetlerini döner.
+
+        Her ürün için iller arasındaki en düşük, en yüksek, ortalama ve
+        ortanca fiyat verilir.
+        """
+        index = await self._client_stats()
+        body = render_json({
+            "lastUpdate": index.last_update,
+            "products": index.all_stats(split_values(fuel_type))
+        })
+        return self._respond(request, body, index.last_update)
+
+    async def get_cheapest(
+        self,
+        product: str,
+        request: Request,
+        limit: int = Query(5, ge=1, le=81),
+        order: str = Query("asc", pattern="^(asc|desc)$")
+    ) -> Response:
+        """Ürünün en ucuz olduğu illeri döner.
+
+        `product` tam ürün adı ya da "motorin" gibi bir yakıt türüdür.
+        `order=desc` en pahalı illeri döner. Ürün bulunamazsa 404 döner.
+        """
+        index = await self._client_stats()
+        results = index.cheapest(
+            product, limit, most_expensive=order == "desc"
+        )
+        if not results:
+            raise HTTPException(
+                status_code=404, detail=f"'{product}' ürünü bulunamadı."
+            )
+        body = render_json({
+            "product": product,
+            "lastUpdate": index.last_update,
+            "results": results
+        })
+        return self._respond(request, body, index.last_update)
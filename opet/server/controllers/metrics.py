@@ -0,0 +1,63 @@
+"""Ölçümler için kontrolcü."""
+
+from fastapi import APIRouter, Response
+from opet.metrics import (
+    REGISTRY,
+    MetricsRegistry,
+    record_cache,
+    record_transport
+)
+from opet.server.providers.opet import OpetProvider
+from opet.server.refresher import SnapshotRefresher
+from typing import Optional
+
+SNAPSHOT_AGE = REGISTRY.gauge(
+    "opet_snapshot_age_seconds",
+    "Seconds since the snapshot was last confirmed with Opet."
+)
+
+# Prometheus metin biçiminin içerik türü
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsController:
+    """`/metrics` altında ölçümleri Prometheus biçiminde sunan kontrolcü."""
+
+    def __init__(
+        self,
+        provider: OpetProvider,
+        refresher: Optional[SnapshotRefresher] = None,
+        registry: MetricsRegistry = REGISTRY
+    ):
+        """Kontrolcüyü başlatır."""
+        self.provider = provider
+        self.refresher = refresher
+        self.registry = registry
+        self.router = APIRouter(tags=["metrics"])
+        self.router.add_api_route(
+            "/metrics",
+            self.get_metrics,
+            response_class=Response,
+            methods=["GET"]
+        )
+
+    async def get_metrics(self) -> Response:
+        """Ölçümleri döner.
+
+        Önbellek ve bağlantı sayaçları, devre kesicinin durumu ve anlık
+        görüntünün yaşı okuma anında alınır.
+        """
+        client = self.provider.client
+        record_cache("prices", client.cache.stats())
+        breaker = getattr(client.transport, "breaker", None)
+        record_transport(
+            client.transport.stats(),
+            breaker.stats() if breaker is not None else None
+        )
+        if self.refresher is not None:
+            age = self.refresher.age()
+            if age is not None:
+                SNAPSHOT_AGE.set(age)
+        return Response(
+            content=self.registry.render(), media_type=CONTENT_TYPE
+        )
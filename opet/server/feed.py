@@ -0,0 +1,136 @@
+"""Fiyat değişikliklerini abonelere dağıtan değişiklik akışı.
+
+`ChangeFeed`, tek bir `SnapshotRefresher`ı dinler. Görüntü her
+değiştiğinde önceki görüntüyle farkını çıkarır ve değişen her il için bir
+olayı abonelere dağıtır. Abone sayısı ne olursa olsun upstream'e yalnızca
+yenileyicinin sorguları gider.
+"""
+
+import asyncio
+from opet.api import normalize_plate_code
+from opet.changes import ProvinceChange, diff_results
+from opet.products import PRODUCT_INDEX, FuelTypes, fuel_type_key
+from opet.server.refresher import PriceSnapshot, SnapshotRefresher
+from typing import FrozenSet, List, Optional
+
+
+class Subscription:
+    """Tek bir abonenin süzgeçleri ve bekleyen olayları.
+
+    Attributes:
+        provinces: İzlenen plaka kodları; None ise tüm iller.
+        fuel_types: İzlenen yakıt türleri; boşsa tüm ürünler.
+        overflowed: Abone olayları yetişemeyecek kadar yavaş okuduysa True.
+                    Akış kapatılır; istemci yeniden bağlanmalıdır.
+    """
+
+    def __init__(
+        self,
+        provinces: Optional[List[str]] = None,
+        fuel_types: Optional[FuelTypes] = None,
+        queue_size: int = 256
+    ):
+        """Aboneliği oluşturur."""
+        self.provinces: Optional[FrozenSet[str]] = (
+            frozenset(normalize_plate_code(code) for code in provinces)
+            if provinces else None
+        )
+        self.fuel_types = fuel_type_key(fuel_types)
+        self.overflowed = False
+        self.queue: "asyncio.Queue[ProvinceChange]" = asyncio.Queue(
+            queue_size
+        )
+
+    def select(self, event: ProvinceChange) -> Optional[ProvinceChange]:
+        """Olayı süzgeçlere göre daraltır; abonenin ilgisi yoksa None döner."""
+        if self.provinces is not None and event["code"] not in self.provinces:
+            return None
+        if not self.fuel_types:
+            return event
+        for change in event["changes"]:
+            if change["product"] not in PRODUCT_INDEX:
+                PRODUCT_INDEX.add(change["product"])
+        matches = PRODUCT_INDEX.matching(self.fuel_types)
+        changes = [
+            change for change in event["changes"]
+            if change["product"] in matches
+        ]
+        if not changes:
+            return None
+        return {**event, "changes": changes}
+
+    def offer(self, event: ProvinceChange) -> None:
+        """Olay abonenin süzgeçlerine uyuyorsa kuyruğa ekler."""
+        selected = self.select(event)
+        if selected is None or self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(selected)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class ChangeFeed:
+    """Görüntü farklarını abonelere dağıtan yayıncı.
+
+    `manage_refresher` açıksa yenileyici ilk abone geldiğinde başlatılır ve
+    son abone ayrıldığında durdurulur; böylece kimse dinlemiyorken upstream
+    sorgulanmaz.
+    """
+
+    def __init__(
+        self,
+        refresher: SnapshotRefresher,
+        manage_refresher: bool = False,
+        queue_size: int = 256
+    ):
+        """Akışı oluşturur ve yenileyiciye dinleyici olarak eklenir."""
+        self.refresher = refresher
+        self.manage_refresher = manage_refresher
+        self.queue_size = queue_size
+        self._subscribers: List[Subscription] = []
+        refresher.add_listener(self.on_snapshot)
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def on_snapshot(
+        self, previous: Optional[PriceSnapshot], snapshot: PriceSnapshot
+    ) -> None:
+        """Yeni görüntünün farkını abonelere dağıtır.
+
+        İlk görüntüde karşılaştırılacak bir önceki durum olmadığından olay
+        üretilmez.
+        """
+        if previous is None or not self._subscribers:
+            return
+        events = diff_results(previous.results, snapshot.results)
+        for subscription in self._subscribers:
+            for event in events:
+                subscription.offer(event)
+
+    def subscribe(
+        self,
+        provinces: Optional[List[str]] = None,
+        fuel_types: Optional[FuelTypes] = None
+    ) -> Subscription:
+        """Yeni bir abonelik açar."""
+        subscription = Subscription(provinces, fuel_types, self.queue_size)
+        self._subscribers = self._subscribers + [subscription]
+        if self.manage_refresher:
+            self.refresher.start()
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription) -> None:
+        """Aboneliği kapatır."""
+        self._subscribers = [
+            item for item in self._subscribers if item is not subscription
+        ]
+        if self.manage_refresher and not self._subscribers:
+            await self.refresher.stop()
+
+    async def close(self) -> None:
+        """Tüm abonelikleri bırakır ve yönetilen yenileyiciyi durdurur."""
+        self._subscribers = []
+        if self.manage_refresher:
+            await self.refresher.stop()
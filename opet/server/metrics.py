@@ -0,0 +1,54 @@
+"""Sunucu istek süresi ölçümleri."""
+
+import time
+from opet.metrics import REGISTRY
+from typing import Any, Awaitable, Callable, Dict
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    "opet_http_request_seconds",
+    "Seconds spent serving HTTP requests, by route.",
+    ("route", "method", "status")
+)
+
+Message = Dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+
+class MetricsMiddleware:
+    """Her isteğin süresini route şablonuna göre ölçen ASGI ara katmanı.
+
+    Süre, yanıtın son baytı gönderildiğinde ölçülür; akış yanıtlarında
+    akışın tamamını kapsar. Eşleşmeyen yollar `unmatched` olarak sayılır.
+    """
+
+    def __init__(self, app: Callable[..., Awaitable[None]]):
+        """Ara katmanı oluşturur."""
+        self.app = app
+
+    async def __call__(
+        self, scope: Dict[str, Any], receive: Receive, send: Send
+    ) -> None:
+        """İsteği ölçerek uygulamaya iletir."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status = "500"
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start,
+                route=getattr(route, "path", "unmatched"),
+                method=scope["method"],
+                status=status
+            )
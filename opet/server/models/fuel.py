@@ -1,7 +1,8 @@
 """Yakıt fiyatları için veri modelleri."""
 
+from opet.table import PriceTable
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 
 class FuelPrice(BaseModel):
@@ -21,6 +22,84 @@ class PriceResponse(BaseModel):
     province: str
     lastUpdate: str
     prices: List[FuelPrice]
+    stale: Optional[bool] = None
+
+    @classmethod
+    def from_table(
+        cls, table: PriceTable, province_id: str
+    ) -> "PriceResponse":
+        """Fiyat tablosundaki bir ilin yanıt modelini oluşturur.
+
+        Tersi için `PriceTable.from_results` modelin `model_dump()`
+        çıktısıyla çağrılabilir.
+        """
+        return cls.model_validate(table.result(province_id))
+
+
+class BulkPriceResponse(BaseModel):
+    """Birden fazla il için fiyat yanıt modeli."""
+    lastUpdate: str
+    results: Dict[str, PriceResponse]
+    errors: Dict[str, str]
+
+
+class VendorFuelPrice(BaseModel):
+    """Kaynağı belirtilmiş yakıt fiyatı modeli."""
+    vendor: str
+    name: str
+    amount: float
+
+
+class VendorPriceResponse(BaseModel):
+    """Bir ilin tüm dağıtıcılardaki fiyatları için yanıt modeli."""
+    province: str
+    results: Dict[str, PriceResponse]
+    prices: List[VendorFuelPrice]
+    errors: Dict[str, str]
+
+
+class ProductStats(BaseModel):
+    """Bir ürünün tüm illerdeki fiyat özeti."""
+    product: str
+    count: int
+    min: float
+    max: float
+    mean: float
+    median: float
+
+
+class StatsResponse(BaseModel):
+    """Ürün fiyat özetleri yanıt modeli."""
+    lastUpdate: Optional[str] = None
+    products: List[ProductStats]
+
+
+class RankedPrice(BaseModel):
+    """Bir ürünün bir ildeki fiyatı."""
+    code: str
+    province: str
+    product: str
+    amount: float
+
+
+class CheapestResponse(BaseModel):
+    """En ucuz ya da en pahalı iller yanıt modeli."""
+    product: str
+    lastUpdate: Optional[str] = None
+    results: List[RankedPrice]
+
+
+class HistoryEntry(BaseModel):
+    """Fiyat geçmişi kaydı modeli."""
+    product: str
+    amount: float
+    lastUpdate: str
+
+
+class HistoryResponse(BaseModel):
+    """Fiyat geçmişi yanıt modeli."""
+    province: str
+    records: List[HistoryEntry]
 
 
 class FuelPriceRequest(BaseModel):
@@ -0,0 +1,26 @@
+"""Fiyat sağlayıcıların ortak arayüzü."""
+
+from abc import ABC, abstractmethod
+from opet.api import FormattedPriceResult
+
+
+class PriceProvider(ABC):
+    """Bir akaryakıt dağıtıcısının il fiyatlarını sunan sağlayıcı.
+
+    Alt sınıflar `name` değerini verir ve `get_prices` metodunu uygular;
+    uygulamayan bir alt sınıf oluşturulurken `TypeError` yükseltir.
+    Sağlayıcılar `ProviderRegistry` ile kaydedilip birlikte sorgulanır.
+
+    Attributes:
+        name: Yanıtlarda fiyatların kaynağı olarak görünen dağıtıcı adı.
+    """
+
+    name: str = ""
+
+    @abstractmethod
+    async def get_prices(self, province_id: str) -> FormattedPriceResult:
+        """Belirli bir il için yakıt fiyatlarını döner.
+
+        Raises:
+            ProvinceNotFoundError: Dağıtıcı bu ilde fiyat sunmuyorsa.
+        """
@@ -1,38 +1,109 @@
 """Opet API'si için veri sağlayıcı."""
 
-from opet.api import OpetApiClient
-from opet.server.models.fuel import (
-    Province,
-    PriceResponse,
-    LastUpdate
+from opet.api import (
+    BulkPriceResult,
+    FormattedPriceResult,
+    LastUpdateInfo,
+    Province
 )
-from typing import List
-import json
+from opet.async_api import AsyncOpetApiClient
+from opet.serialization import dumps_bytes
+from opet.server.providers.base import PriceProvider
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 
-class OpetProvider:
+def render_json(data: Any) -> bytes:
+    """Veriyi boşluksuz JSON bayt dizisine çevirir.
+
+    Kodlayıcı `opet.serialization` ayarından gelir; orjson kuruluysa o
+    kullanılır.
+    """
+    return dumps_bytes(data, "compact")
+
+
+class OpetProvider(PriceProvider):
     """Opet API'si için veri sağlayıcı sınıfı."""
 
-    def __init__(self):
-        """API istemcisini başlatır."""
-        self.client = OpetApiClient()
+    name = "opet"
+
+    def __init__(
+        self,
+        client: Optional[AsyncOpetApiClient] = None,
+        max_concurrency: int = 16,
+        prerender: bool = False
+    ):
+        """API istemcisini başlatır.
 
-    def get_provinces(self) -> List[Province]:
+        İstemci asenkron çalışır; sağlayıcı oluşturulurken ağ isteği yapılmaz.
+        `max_concurrency`, toplu isteklerde aynı anda yapılacak en fazla
+        istek sayısıdır. `prerender` açıksa önbellekteki fiyat sonuçlarının
+        JSON karşılığı bir kez üretilip tekrar kullanılır.
+        """
+        self.client = client if client is not None else AsyncOpetApiClient()
+        self.max_concurrency = max_concurrency
+        self.prerender = prerender
+        # İl adı -> ((lastUpdate, stale), JSON baytları)
+        self._rendered: Dict[str, Tuple[Tuple[str, bool], bytes]] = {}
+
+    async def get_provinces(self) -> List[Province]:
         """Tüm illeri döner."""
-        provinces = self.client.get_provinces()
+        provinces = await self.client.get_provinces()
         return [
-            Province(
-                code=str(province["code"]),
-                name=province["name"]
-            ) for province in provinces
+            {"code": str(province["code"]), "name": province["name"]}
+            for province in provinces
         ]
 
-    def get_prices(self, province_id: str) -> PriceResponse:
-        """Belirli bir il için yakıt fiyatlarını döner."""
-        result = self.client.price(province_id)
-        parsed_result = json.loads(result)
-        return PriceResponse(**parsed_result["results"])
+    async def get_prices(self, province_id: str) -> FormattedPriceResult:
+        """Belirli bir il için yakıt fiyatlarını döner.
+
+        Sonuç sözlük olarak döner; yanıt hazırlanırken JSON'a yalnızca bir
+        kez çevrilir.
+        """
+        return await self.client.price_result(province_id)
+
+    def render(self, result: FormattedPriceResult) -> bytes:
+        """Fiyat sonucunu JSON bayt dizisine çevirir.
+
+        `prerender` açıksa baytlar il ve `lastUpdate` ile saklanır; ilin
+        yeni bir güncellemesi gelene kadar sonuç yeniden üretilmeden ya da
+        karşılaştırılmadan aynı baytlar döner. Bayat sonuçlar ayrı tutulur.
+        """
+        if not self.prerender:
+            return render_json(result)
+        version = (result["lastUpdate"], bool(result.get("stale")))
+        rendered = self._rendered.get(result["province"])
+        if rendered is not None and rendered[0] == version:
+            return rendered[1]
+        body = render_json(result)
+        self._rendered[result["province"]] = (version, body)
+        return body
+
+    async def get_all_prices(self) -> BulkPriceResult:
+        """Tüm iller için yakıt fiyatlarını döner."""
+        return await self.client.get_all_prices(
+            max_concurrency=self.max_concurrency
+        )
+
+    async def get_prices_batch(self, codes: List[str]) -> BulkPriceResult:
+        """Verilen illerin fiyatlarını eşzamanlı olarak döner.
+
+        `/lastupdate` bir kez sorulur; fiyatı alınamayan iller `errors`
+        alanında listelenir.
+        """
+        return await self.client.get_all_prices(
+            codes, max_concurrency=self.max_concurrency
+        )
+
+    async def iter_all_prices(self) -> AsyncIterator[Tuple[str, Any]]:
+        """Tüm illerin fiyatlarını alındıkça `(kod, sonuç)` olarak döner.
+
+        Fiyatı alınamayan illerde sonuç yerine oluşan hata döner.
+        """
+        async for item in self.client.iter_all_prices(
+            max_concurrency=self.max_concurrency
+        ):
+            yield item
 
-    def get_last_update(self) -> LastUpdate:
+    async def get_last_update(self) -> LastUpdateInfo:
         """Son güncelleme zamanını döner."""
-        return LastUpdate(**self.client.get_last_update())
+        return await self.client.get_last_update()
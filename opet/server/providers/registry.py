@@ -0,0 +1,105 @@
+"""Birden fazla dağıtıcıyı birlikte sorgulayan sağlayıcı kaydı."""
+
+import asyncio
+from opet.api import FormattedPriceResult
+from opet.exceptions import BaseError
+from opet.server.providers.base import PriceProvider
+from typing import Dict, List, Optional, Tuple
+
+
+class VendorTimeoutError(BaseError):
+    """Bir dağıtıcı kendi süresi içinde yanıt vermediğinde oluşur."""
+    pass
+
+
+class ProviderRegistry:
+    """Kayıtlı sağlayıcıları eşzamanlı olarak sorgulayan kayıt.
+
+    Her sağlayıcının kendi zaman aşımı vardır; yavaş bir dağıtıcı
+    süresi dolunca bırakılır ve diğerlerinin yanıtını bekletmez.
+
+    Attributes:
+        default_timeout: Zaman aşımı verilmeden kaydedilen sağlayıcıların
+                         saniye cinsinden süresi.
+    """
+
+    def __init__(self, default_timeout: float = 5.0):
+        """Boş bir kayıt oluşturur."""
+        self.default_timeout = default_timeout
+        self._providers: Dict[str, Tuple[PriceProvider, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._providers)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._providers
+
+    def register(
+        self, provider: PriceProvider, timeout: Optional[float] = None
+    ) -> None:
+        """Sağlayıcıyı `provider.name` adıyla kaydeder.
+
+        Raises:
+            ValueError: Aynı adla bir sağlayıcı zaten kayıtlıysa.
+        """
+        if not provider.name:
+            raise ValueError("Sağlayıcının bir adı olmalı.")
+        if provider.name in self._providers:
+            raise ValueError(f"'{provider.name}' zaten kayıtlı.")
+        self._providers[provider.name] = (
+            provider, self.default_timeout if timeout is None else timeout
+        )
+
+    def unregister(self, name: str) -> None:
+        """Sağlayıcıyı kayıttan çıkarır."""
+        self._providers.pop(name, None)
+
+    def get(self, name: str) -> PriceProvider:
+        """Adı verilen sağlayıcıyı döner.
+
+        Raises:
+            KeyError: Sağlayıcı kayıtlı değilse.
+        """
+        return self._providers[name][0]
+
+    def names(self) -> List[str]:
+        """Kayıtlı sağlayıcıların adlarını kayıt sırasıyla döner."""
+        return list(self._providers)
+
+    async def get_prices(
+        self, province_id: str
+    ) -> Tuple[Dict[str, FormattedPriceResult], Dict[str, BaseException]]:
+        """Bir ilin fiyatlarını tüm sağlayıcılardan eşzamanlı olarak alır.
+
+        Returns:
+            Sağlayıcı adına göre sonuçlar ve fiyatı alınamayan
+            sağlayıcıların hataları; ikisi de kayıt sırasındadır.
+        """
+        outcomes = await asyncio.gather(*(
+            self._fetch(provider, timeout, province_id)
+            for provider, timeout in self._providers.values()
+        ))
+        results: Dict[str, FormattedPriceResult] = {}
+        errors: Dict[str, BaseException] = {}
+        for name, outcome in zip(self._providers, outcomes):
+            if isinstance(outcome, BaseException):
+                errors[name] = outcome
+            else:
+                results[name] = outcome
+        return results, errors
+
+    @staticmethod
+    async def _fetch(
+        provider: PriceProvider, timeout: float, province_id: str
+    ) -> object:
+        """Sağlayıcının sonucunu ya da oluşan hatayı döner."""
+        try:
+            return await asyncio.wait_for(
+                provider.get_prices(province_id), timeout
+            )
+        except asyncio.TimeoutError:
+            return VendorTimeoutError(
+                f"{provider.name} {timeout:g} saniye içinde yanıt vermedi."
+            )
+        except Exception as e:
+            return e
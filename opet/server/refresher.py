@@ -0,0 +1,297 @@
+"""Fiyatları arka planda yenileyen görev ve bellekteki anlık görüntü."""
+
+import asyncio
+import time
+from opet.api import FormattedPriceResult, normalize_plate_code
+from opet.async_api import AsyncOpetApiClient
+from opet.table import PriceTable
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, List, Mapping, Optional, TypeVar,
+    Union
+)
+
+if TYPE_CHECKING:
+    from opet.server.shared import SharedSnapshotStore
+
+T = TypeVar("T")
+
+
+class PriceSnapshot:
+    """Tüm illerin fiyatlarını tutan, değiştirilmeyen anlık görüntü.
+
+    Fiyatlar tek bir `PriceTable` içinde tutulur; sözlükler yalnızca
+    `get` ve `results` ile yanıt hazırlanırken oluşturulur.
+
+    Son yenilemede fiyatı alınamayan illerin satırları önceki
+    `lastUpdate` değerini taşır; bu sonuçlar `stale` işaretiyle döner.
+
+    Attributes:
+        last_update: Opet'in `lastUpdateDate` değeri.
+        provinces: İl kayıtları.
+        table: Tüm illerin fiyatları.
+        refreshed_at: Fiyatların yenilendiği zaman.
+        checked_at: Upstream ile en son doğrulandığı zaman; yenileyici
+                    her başarılı sorguda günceller.
+    """
+
+    def __init__(
+        self,
+        last_update: str,
+        provinces: List[Dict[str, str]],
+        results: Union[PriceTable, Mapping[str, FormattedPriceResult]],
+        refreshed_at: float
+    ):
+        """Anlık görüntüyü oluşturur; sonuçlar tabloya dönüştürülür."""
+        self.last_update = last_update
+        self.provinces = provinces
+        self.table = (
+            results if isinstance(results, PriceTable)
+            else PriceTable.from_results(results, last_update)
+        )
+        self.refreshed_at = refreshed_at
+        self.checked_at = refreshed_at
+
+    def _mark(self, result: FormattedPriceResult) -> FormattedPriceResult:
+        """Görüntüden eski sonucu `stale` olarak işaretler."""
+        if result["lastUpdate"] != self.last_update:
+            result["stale"] = True
+        return result
+
+    @property
+    def results(self) -> Dict[str, FormattedPriceResult]:
+        """Plaka koduna göre fiyat sonuçlarını oluşturup döner."""
+        return {
+            code: self._mark(result)
+            for code, result in self.table.to_results().items()
+        }
+
+    def get(self, province_id: str) -> Optional[FormattedPriceResult]:
+        """Plaka koduna ait fiyat sonucunu döner."""
+        result = self.table.get(province_id)
+        return None if result is None else self._mark(result)
+
+    def outdated(self) -> List[str]:
+        """Fiyatı olmayan ya da görüntüden eski illerin plaka kodlarını
+        döner.
+        """
+        updates = dict(zip(self.table.codes, self.table.updates))
+        codes = (
+            normalize_plate_code(str(item["code"])) for item in self.provinces
+        )
+        return [
+            code for code in codes if updates.get(code) != self.last_update
+        ]
+
+
+# Görüntü değiştiğinde `(önceki, yeni)` görüntülerle çağrılır
+SnapshotListener = Callable[[Optional[PriceSnapshot], PriceSnapshot], None]
+
+
+class SnapshotRefresher:
+    """`/lastupdate` değerini izleyip değiştiğinde tüm illeri yenileyen görev.
+
+    Sunucu istekleri bu görevin tuttuğu anlık görüntüden yanıtlanır; istek
+    yolunda upstream çağrısı yapılmaz.
+
+    Bir `SharedSnapshotStore` verilirse yalnızca lider süreç upstream'i
+    sorgular ve görüntüyü depoya yazar; diğer süreçler görüntüyü
+    `sync_interval` aralıklarla depodan okur.
+
+    `add_listener` ile eklenen dinleyiciler görüntü her değiştiğinde
+    çağrılır.
+
+    Attributes:
+        snapshot: Son anlık görüntü; ilk yenilemeden önce None.
+        poll_interval: `/lastupdate` sorguları arasındaki saniye.
+        stale_after: Upstream ile bu kadar saniye doğrulanamayan görüntü
+                     bayat sayılır.
+        store: Süreçler arası paylaşılan depo ya da None.
+        sync_interval: Lider olmayan süreçlerin depoyu okuma aralığı.
+    """
+
+    def __init__(
+        self,
+        client: AsyncOpetApiClient,
+        poll_interval: float = 60.0,
+        stale_after: Optional[float] = None,
+        max_concurrency: int = 16,
+        clock: Callable[[], float] = time.time,
+        store: Optional["SharedSnapshotStore"] = None,
+        sync_interval: float = 1.0
+    ):
+        """Görevi oluşturur; yenileme `start` ile başlar."""
+        self.client = client
+        self.poll_interval = poll_interval
+        self.stale_after = (
+            stale_after if stale_after is not None else poll_interval * 3
+        )
+        self.max_concurrency = max_concurrency
+        self.snapshot: Optional[PriceSnapshot] = None
+        self.store = store
+        self.sync_interval = sync_interval
+        self._clock = clock
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._version = 0
+        self._listeners: List[SnapshotListener] = []
+
+    def add_listener(self, listener: SnapshotListener) -> None:
+        """Görüntü değiştiğinde `listener(önceki, yeni)` çağrılır."""
+        self._listeners = self._listeners + [listener]
+
+    def remove_listener(self, listener: SnapshotListener) -> None:
+        """`add_listener` ile eklenen dinleyiciyi çıkarır."""
+        self._listeners = [
+            item for item in self._listeners if item is not listener
+        ]
+
+    def _replace(self, snapshot: PriceSnapshot) -> None:
+        """Görüntüyü değiştirir ve dinleyicilere bildirir.
+
+        Dinleyici hataları yenilemeyi durdurmaz.
+        """
+        previous, self.snapshot = self.snapshot, snapshot
+        for listener in self._listeners:
+            try:
+                listener(previous, snapshot)
+            except Exception:
+                pass
+
+    def age(self) -> Optional[float]:
+        """Görüntünün upstream ile son doğrulanmasından beri geçen süre."""
+        if self.snapshot is None:
+            return None
+        return max(0.0, self._clock() - self.snapshot.checked_at)
+
+    def is_stale(self) -> bool:
+        """Görüntü yoksa ya da `stale_after` süresini aştıysa True döner."""
+        age = self.age()
+        return age is None or age > self.stale_after
+
+    async def refresh_once(self) -> bool:
+        """`/lastupdate` değerini sorgular, değiştiyse tüm illeri yeniler.
+
+        Her turda `/lastupdate` yalnızca bir kez istenir. Fiyatı alınamayan
+        illerin önceki değerleri korunur ve `stale` işaretiyle sunulur;
+        `lastUpdate` değişmese de bu iller sonraki turlarda yeniden
+        denenir.
+
+        Returns:
+            Fiyatlar yenilendiyse True.
+        """
+        info = await self.client.get_last_update()
+        last_update = info["lastUpdateDate"]
+        current = self.snapshot
+        codes: Optional[List[str]] = None
+        if current is not None and current.last_update == last_update:
+            current.checked_at = self._clock()
+            codes = current.outdated()
+            if not codes:
+                return False
+        bulk = await self.client.get_all_prices(
+            codes,
+            max_concurrency=self.max_concurrency,
+            last_update=last_update
+        )
+        # Bayat sonuçlar zaten görüntüdeki değerlerdir; yenisi sayılmaz.
+        fresh = {
+            code: result for code, result in bulk["results"].items()
+            if not result.get("stale")
+        }
+        if codes is not None and not fresh:
+            return False
+        results: Dict[str, FormattedPriceResult] = {}
+        if current is not None:
+            results.update(current.results)
+        results.update(fresh)
+        self._replace(PriceSnapshot(
+            bulk["lastUpdate"],
+            list(self.client.catalog.provinces),
+            results,
+            self._clock()
+        ))
+        return True
+
+    async def _in_thread(self, function: Callable[..., T], *args: Any) -> T:
+        """Depo çağrısını olay döngüsünü bekletmeden bir iş parçacığında
+        çalıştırır.
+
+        SQLite sorguları ve kilit dosyası işlemleri diske bağlıdır.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None, function, *args
+        )
+
+    async def sync_from_store(self) -> bool:
+        """Depoda daha yeni bir görüntü varsa onu yükler.
+
+        Görüntü değişmediyse yalnızca doğrulanma zamanı güncellenir.
+        Depo olay döngüsü dışında okunur; dinleyiciler döngüde çağrılır.
+
+        Returns:
+            Yeni bir görüntü yüklendiyse True.
+        """
+        if self.store is None:
+            return False
+        loaded = await self._in_thread(self.store.load, self._version)
+        if loaded is not None:
+            self._version = loaded[0]
+            self._replace(loaded[1])
+            return True
+        checked_at = await self._in_thread(self.store.checked_at)
+        if self.snapshot is not None and checked_at is not None:
+            self.snapshot.checked_at = checked_at
+        return False
+
+    async def tick(self) -> float:
+        """Bir yenileme turu çalıştırır.
+
+        Returns:
+            Bir sonraki tura kadar beklenecek saniye.
+        """
+        if self.store is None:
+            await self.refresh_once()
+            return self.poll_interval
+        if not await self._in_thread(self.store.try_lead):
+            await self.sync_from_store()
+            return self.sync_interval
+        if self.snapshot is None:
+            # Önceki liderin görüntüsüyle başla; değişmediyse yeniden
+            # çekilmez.
+            await self.sync_from_store()
+        if await self.refresh_once():
+            self._version = await self._in_thread(
+                self.store.publish, self.snapshot
+            )
+        elif self.snapshot is not None:
+            await self._in_thread(self.store.touch, self.snapshot.checked_at)
+        return self.poll_interval
+
+    async def run(self) -> None:
+        """Görev kapatılana kadar `poll_interval` aralıklarla yeniler.
+
+        Hatalar görevi durdurmaz; mevcut görüntü sunulmaya devam eder.
+        """
+        while True:
+            delay = self.poll_interval
+            try:
+                delay = await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            await asyncio.sleep(delay)
+
+    def start(self) -> None:
+        """Görevi çalışan olay döngüsünde başlatır."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        """Görevi durdurur."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
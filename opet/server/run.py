@@ -1,11 +1,38 @@
 """Starts the API server."""
 
-import uvicorn
+import os
 
 
-if __name__ == "__main__":
+def serve(
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    workers: int = 1,
+    reload: bool = False
+) -> None:
+    """Runs the API server with the given number of worker processes.
+
+    With more than one worker, `OPET_SHARED_SNAPSHOT` is set (unless it
+    already is) so that the workers share one price snapshot file.
+    uvicorn cannot reload code with several workers, so `reload` only
+    applies to a single one.
+    """
+    import uvicorn
+    if workers > 1 and not os.environ.get("OPET_SHARED_SNAPSHOT"):
+        from opet.provinces import default_cache_dir
+        os.environ["OPET_SHARED_SNAPSHOT"] = os.path.join(
+            default_cache_dir(), "snapshot.sqlite3"
+        )
     uvicorn.run(
         "opet.server.app:app",
-        host="0.0.0.0",
+        host=host,
+        port=port,
+        workers=workers,
+        reload=reload and workers == 1
+    )
+
+
+if __name__ == "__main__":
+    serve(
+        workers=int(os.environ.get("OPET_WORKERS") or 1),
         reload=True
     )
@@ -0,0 +1,126 @@
+"""Opet API Server ayarları."""
+
+import os
+from typing import Optional
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Ortam değişkenini mantıksal değer olarak okur."""
+    value = os.environ.get(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_float(name: str, default: float) -> float:
+    """Ortam değişkenini ondalık sayı olarak okur."""
+    value = os.environ.get(name)
+    return default if value is None or value == "" else float(value)
+
+
+def _env_int(name: str, default: int) -> int:
+    """Ortam değişkenini tam sayı olarak okur."""
+    value = os.environ.get(name)
+    return default if value is None or value == "" else int(value)
+
+
+class Settings:
+    """Sunucu ayarları.
+
+    Değerler `OPET_` ile başlayan ortam değişkenlerinden okunur.
+
+    Attributes:
+        refresh_enabled: Arka planda fiyatları yenileyen görev açık mı
+                         (`OPET_REFRESH`).
+        poll_interval: `/lastupdate` sorguları arasındaki saniye
+                       (`OPET_POLL_INTERVAL`).
+        stale_after: Anlık görüntünün bayat sayılacağı saniye
+                     (`OPET_STALE_AFTER`). Verilmezse `poll_interval`
+                     değerinin üç katıdır.
+        max_concurrency: Toplu isteklerde aynı anda yapılacak en fazla
+                         istek sayısı (`OPET_MAX_CONCURRENCY`).
+        prerender: Önbellekteki sonuçların JSON karşılığı tekrar
+                   kullanılsın mı (`OPET_PRERENDER`).
+        cache_max_age: Yanıtların `Cache-Control` başlığındaki `max-age`
+                       saniyesi (`OPET_CACHE_MAX_AGE`).
+        history_path: Fiyat geçmişinin tutulacağı SQLite dosyası
+                      (`OPET_HISTORY_PATH`). Verilmezse geçmiş tutulmaz.
+        shared_snapshot_path: Worker'lar arasında paylaşılan anlık görüntü
+                              dosyası (`OPET_SHARED_SNAPSHOT`). Verilirse
+                              arka plan yenileyicisi de açılır.
+        vendor_timeout: Dağıtıcılar karşılaştırılırken her birinin yanıt
+                        için beklendiği saniye (`OPET_VENDOR_TIMEOUT`).
+        gzip_enabled: `Accept-Encoding: gzip` gönderen istemcilere yanıtlar
+                      sıkıştırılsın mı (`OPET_GZIP`).
+        gzip_min_size: Sıkıştırılacak en küçük yanıt boyutu, bayt
+                       (`OPET_GZIP_MIN_SIZE`).
+        rate_limit: İstemci başına `/fuel/*` isteklerinin saniyedeki
+                    sınırı (`OPET_RATE_LIMIT`). 0 ise sınır yoktur.
+        rate_burst: İstemcinin art arda yapabileceği en fazla istek
+                    (`OPET_RATE_BURST`). Verilmezse `rate_limit` kadardır.
+        max_in_flight: Aynı anda işlenen en fazla `/fuel/*` isteği
+                       (`OPET_MAX_IN_FLIGHT`). 0 ise tavan yoktur.
+        upstream_rate: Opet API'sine saniyede yapılabilecek en fazla
+                       çağrı (`OPET_UPSTREAM_RATE`). 0 ise sınır yoktur.
+    """
+
+    def __init__(
+        self,
+        refresh_enabled: bool = False,
+        poll_interval: float = 60.0,
+        stale_after: Optional[float] = None,
+        max_concurrency: int = 16,
+        prerender: bool = False,
+        cache_max_age: int = 60,
+        history_path: Optional[str] = None,
+        shared_snapshot_path: Optional[str] = None,
+        vendor_timeout: float = 5.0,
+        gzip_enabled: bool = True,
+        gzip_min_size: int = 1000,
+        rate_limit: float = 0.0,
+        rate_burst: Optional[float] = None,
+        max_in_flight: int = 256,
+        upstream_rate: float = 0.0
+    ):
+        """Ayarları oluşturur."""
+        self.refresh_enabled = refresh_enabled
+        self.poll_interval = poll_interval
+        self.stale_after = (
+            stale_after if stale_after is not None else poll_interval * 3
+        )
+        self.max_concurrency = max_concurrency
+        self.prerender = prerender
+        self.cache_max_age = cache_max_age
+        self.history_path = history_path
+        self.shared_snapshot_path = shared_snapshot_path
+        self.vendor_timeout = vendor_timeout
+        self.gzip_enabled = gzip_enabled
+        self.gzip_min_size = gzip_min_size
+        self.rate_limit = rate_limit
+        self.rate_burst = rate_burst
+        self.max_in_flight = max_in_flight
+        self.upstream_rate = upstream_rate
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Ayarları ortam değişkenlerinden okur."""
+        poll_interval = _env_float("OPET_POLL_INTERVAL", 60.0)
+        return cls(
+            refresh_enabled=_env_bool("OPET_REFRESH", False),
+            poll_interval=poll_interval,
+            stale_after=_env_float("OPET_STALE_AFTER", poll_interval * 3),
+            max_concurrency=_env_int("OPET_MAX_CONCURRENCY", 16),
+            prerender=_env_bool("OPET_PRERENDER", False),
+            cache_max_age=_env_int("OPET_CACHE_MAX_AGE", 60),
+            history_path=os.environ.get("OPET_HISTORY_PATH") or None,
+            shared_snapshot_path=(
+                os.environ.get("OPET_SHARED_SNAPSHOT") or None
+            ),
+            vendor_timeout=_env_float("OPET_VENDOR_TIMEOUT", 5.0),
+            gzip_enabled=_env_bool("OPET_GZIP", True),
+            gzip_min_size=_env_int("OPET_GZIP_MIN_SIZE", 1000),
+            rate_limit=_env_float("OPET_RATE_LIMIT", 0.0),
+            rate_burst=_env_float("OPET_RATE_BURST", 0.0) or None,
+            max_in_flight=_env_int("OPET_MAX_IN_FLIGHT", 256),
+            upstream_rate=_env_float("OPET_UPSTREAM_RATE", 0.0)
+        )
@@ -0,0 +1,147 @@
+"""Sunucu süreçleri arasında paylaşılan anlık görüntü deposu.
+
+Birden fazla worker ile çalışırken her süreç kendi yenileyicisini
+çalıştırırsa upstream'e N kat istek gider. `SharedSnapshotStore`, son
+anlık görüntüyü yerel bir SQLite dosyasında tutar. Dosya kilidini alan tek
+süreç (lider) upstream'i sorgulayıp görüntüyü yayınlar; diğerleri yalnızca
+bu dosyayı okur. Lider kapanırsa kilit serbest kalır ve başka bir worker
+liderliği devralır.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from opet.server.refresher import PriceSnapshot
+from typing import Any, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: her süreç kendi başına yeniler
+    fcntl = None  # type: ignore[assignment]
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshot (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    version INTEGER NOT NULL,
+    last_update TEXT NOT NULL,
+    refreshed_at REAL NOT NULL,
+    checked_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+"""
+
+
+class SharedSnapshotStore:
+    """SQLite dosyasında tutulan, süreçler arası paylaşılan anlık görüntü.
+
+    Attributes:
+        path: SQLite dosyasının yolu. Liderlik kilidi `path + ".lock"`
+              dosyasında tutulur.
+    """
+
+    def __init__(self, path: str):
+        """Depoyu açar; dosya ve klasör yoksa oluşturur."""
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, timeout=10.0, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+        self._lock_file: Optional[Any] = None
+
+    def try_lead(self) -> bool:
+        """Liderlik kilidini almayı dener; lider bu süreçse True döner."""
+        if self._lock_file is not None:
+            return True
+        if fcntl is None:
+            return True
+        lock_file = open(self.path + ".lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    @property
+    def is_leader(self) -> bool:
+        """Bu süreç lider mi."""
+        return self._lock_file is not None or fcntl is None
+
+    def version(self) -> int:
+        """Yayınlanmış son görüntünün sürümünü döner; yoksa 0."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT version FROM snapshot WHERE id = 1"
+            ).fetchone()
+        return 0 if row is None else row[0]
+
+    def publish(self, snapshot: PriceSnapshot) -> int:
+        """Görüntüyü yayınlar ve yeni sürüm numarasını döner."""
+        payload = json.dumps(
+            {"provinces": snapshot.provinces, "results": snapshot.results},
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT version FROM snapshot WHERE id = 1"
+            ).fetchone()
+            version = 1 if row is None else row[0] + 1
+            self._db.execute(
+                "INSERT OR REPLACE INTO snapshot (id, version, last_update, "
+                "refreshed_at, checked_at, payload) "
+                "VALUES (1, ?, ?, ?, ?, ?)",
+                (version, snapshot.last_update, snapshot.refreshed_at,
+                 snapshot.checked_at, payload)
+            )
+        return version
+
+    def touch(self, checked_at: float) -> None:
+        """Görüntünün upstream ile yeniden doğrulandığını kaydeder."""
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE snapshot SET checked_at = ? WHERE id = 1",
+                (checked_at,)
+            )
+
+    def checked_at(self) -> Optional[float]:
+        """Görüntünün upstream ile son doğrulandığı zamanı döner."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT checked_at FROM snapshot WHERE id = 1"
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def load(
+        self, newer_than: int = 0
+    ) -> Optional[Tuple[int, PriceSnapshot]]:
+        """`newer_than` sürümünden yeni bir görüntü varsa onu döner."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT version, last_update, refreshed_at, checked_at, "
+                "payload FROM snapshot WHERE id = 1 AND version > ?",
+                (newer_than,)
+            ).fetchone()
+        if row is None:
+            return None
+        version, last_update, refreshed_at, checked_at, payload = row
+        data = json.loads(payload)
+        snapshot = PriceSnapshot(
+            last_update, data["provinces"], data["results"], refreshed_at
+        )
+        snapshot.checked_at = checked_at
+        return version, snapshot
+
+    def close(self) -> None:
+        """Veritabanını kapatır ve liderliği bırakır."""
+        with self._lock:
+            self._db.close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
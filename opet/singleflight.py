@@ -0,0 +1,154 @@
+"""Request coalescing for identical concurrent upstream calls.
+
+When many callers ask for the same URL at the same time, for example when a
+cached province expires under load, only the first caller (the leader)
+sends the request. The others wait for it and share its result or
+exception. `SingleFlight` does this for threads, `AsyncSingleFlight` for
+asyncio tasks.
+
+Shared results are the same objects for every caller and must not be
+modified.
+"""
+
+import threading
+from typing import (
+    TYPE_CHECKING, Any, Awaitable, Callable, Dict, Hashable, Optional
+)
+try:
+    from typing import TypedDict
+except ImportError:  # Python < 3.8
+    from typing_extensions import TypedDict
+
+if TYPE_CHECKING:
+    import asyncio
+
+
+class FlightStats(TypedDict):
+    """Single-flight counters."""
+    calls: int
+    coalesced: int
+    in_flight: int
+
+
+class _Call:
+    """An in-flight call that followers wait on."""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key across threads."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._total = 0
+        self._coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Runs `fn` unless a call with the same key is already running.
+
+        Args:
+            key: Identifies identical calls, such as the request URL.
+            fn: The call to make when no identical call is in flight.
+
+        Returns:
+            The result of `fn`, possibly produced for another caller.
+
+        Raises:
+            Any exception raised by `fn`, possibly for another caller.
+        """
+        with self._lock:
+            self._total += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+            else:
+                self._coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> FlightStats:
+        """Returns how many calls were made and how many were coalesced."""
+        with self._lock:
+            return {
+                "calls": self._total,
+                "coalesced": self._coalesced,
+                "in_flight": len(self._calls)
+            }
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent calls with the same key across asyncio tasks."""
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self._total = 0
+        self._coalesced = 0
+
+    async def do(
+        self, key: Hashable, fn: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Awaits `fn` unless a call with the same key is already running.
+
+        Args:
+            key: Identifies identical calls, such as the request URL.
+            fn: Returns the awaitable to run when no identical call is in
+                flight.
+
+        Returns:
+            The result of `fn`, possibly produced for another caller.
+
+        Raises:
+            Any exception raised by `fn`, possibly for another caller.
+        """
+        # Imported here so that the synchronous client does not pay for
+        # importing asyncio.
+        import asyncio
+
+        self._total += 1
+        task = self._calls.get(key)
+        if task is not None:
+            self._coalesced += 1
+        else:
+            # The call runs in its own task so that cancelling whichever
+            # caller started it does not cancel it for everybody else.
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: "asyncio.Future[Any]") -> None:
+        """Forgets a finished call."""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved when every caller has gone.
+            task.exception()
+
+    def stats(self) -> FlightStats:
+        """Returns how many calls were made and how many were coalesced."""
+        return {
+            "calls": self._total,
+            "coalesced": self._coalesced,
+            "in_flight": len(self._calls)
+        }
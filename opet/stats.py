@@ -0,0 +1,268 @@
+"""Nationwide price aggregates, updated as province prices change.
+
+`PriceStats` keeps the amounts of every product sorted across provinces.
+Updating a province only touches the products it sells, while a result of
+a newer `lastUpdate` drops the provinces indexed for the previous one.
+Queries then read the index directly: the minimum, maximum, mean and
+median of a product are O(1), and the N cheapest or most expensive
+provinces are O(N). No upstream request is needed for a query.
+
+    stats = PriceStats()
+    stats.update_many(client.get_all_prices()["results"])
+    stats.cheapest("motorin", 3)
+"""
+
+import heapq
+import threading
+from bisect import bisect_left, insort
+from itertools import islice
+from opet.products import PRODUCT_INDEX, FuelTypes, fuel_type_key
+from typing import (
+    TYPE_CHECKING, Dict, Iterable, Iterator, List, Mapping, Optional,
+    Tuple
+)
+try:
+    from typing import TypedDict
+except ImportError:  # Python < 3.8
+    from typing_extensions import TypedDict
+
+if TYPE_CHECKING:
+    from opet.api import FormattedPriceResult
+
+
+class ProductStats(TypedDict):
+    """Aggregates of one product over the provinces selling it."""
+    product: str
+    count: int
+    min: float
+    max: float
+    mean: float
+    median: float
+
+
+class RankedPrice(TypedDict):
+    """The price of a product in a province."""
+    code: str
+    province: str
+    product: str
+    amount: float
+
+
+_Entry = Tuple[str, Tuple[Tuple[str, float], ...]]
+
+
+def _tagged(
+    entries: List[Tuple[float, str]], product: str, reverse: bool
+) -> Iterator[Tuple[float, str, str]]:
+    """Yields `(amount, code, product)` in the order of `entries`."""
+    for amount, code in (reversed(entries) if reverse else entries):
+        yield amount, code, product
+
+
+class PriceStats:
+    """Per-product index of the prices of every province.
+
+    Safe to share between threads. Results are keyed by normalized plate
+    code, as in `BulkPriceResult`.
+
+    Attributes:
+        last_update: Latest `lastUpdate` of the indexed results, or None.
+    """
+
+    def __init__(
+        self, results: Optional[Mapping[str, "FormattedPriceResult"]] = None
+    ) -> None:
+        """Creates the index, optionally filled with `results`."""
+        self.last_update: Optional[str] = None
+        self._lock = threading.Lock()
+        # Plate code -> (province name, ((product, amount), ...))
+        self._results: Dict[str, _Entry] = {}
+        # Product name -> (amount, plate code) pairs in ascending order
+        self._sorted: Dict[str, List[Tuple[float, str]]] = {}
+        self._totals: Dict[str, float] = {}
+        if results is not None:
+            self.update_many(results)
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    def __contains__(self, code: object) -> bool:
+        return code in self._results
+
+    def update(self, code: str, result: "FormattedPriceResult") -> bool:
+        """Indexes the prices of a province, replacing its previous ones.
+
+        Only the province name and the amounts are kept, as tuples. A
+        result newer than `last_update` clears the index first, so that
+        prices of different updates are never aggregated together.
+
+        Returns:
+            False if the same prices are already indexed for `code`, in
+            which case only `last_update` may change.
+        """
+        entry: _Entry = (
+            result["province"],
+            tuple((price["name"], price["amount"])
+                  for price in result["prices"])
+        )
+        with self._lock:
+            if self.last_update is None:
+                self.last_update = result["lastUpdate"]
+            elif result["lastUpdate"] > self.last_update:
+                self._clear()
+                self.last_update = result["lastUpdate"]
+            if self._results.get(code) == entry:
+                return False
+            self._remove(code)
+            self._results[code] = entry
+            for name, amount in entry[1]:
+                insort(self._sorted.setdefault(name, []), (amount, code))
+                self._totals[name] = self._totals.get(name, 0.0) + amount
+            return True
+
+    def update_many(
+        self, results: Mapping[str, "FormattedPriceResult"]
+    ) -> int:
+        """Indexes many provinces; returns how many of them changed.
+
+        The newest results are indexed first, so stale ones among them are
+        kept alongside.
+        """
+        ordered = sorted(
+            results.items(), key=lambda item: item[1]["lastUpdate"],
+            reverse=True
+        )
+        return sum(self.update(code, result) for code, result in ordered)
+
+    def revalidate(self, last_update: str) -> None:
+        """Clears the index unless it was built for `last_update`.
+
+        Args:
+            last_update: The current `lastUpdateDate` of the upstream API.
+        """
+        with self._lock:
+            if self.last_update != last_update:
+                self._clear()
+                self.last_update = last_update
+
+    def covers(self, codes: Iterable[str]) -> bool:
+        """Returns True if every province in `codes` is indexed."""
+        with self._lock:
+            return all(code in self._results for code in codes)
+
+    def remove(self, code: str) -> None:
+        """Removes a province from the index."""
+        with self._lock:
+            self._remove(code)
+
+    def _clear(self) -> None:
+        self._results.clear()
+        self._sorted.clear()
+        self._totals.clear()
+
+    def _remove(self, code: str) -> None:
+        entry = self._results.pop(code, None)
+        if entry is None:
+            return
+        for name, amount in entry[1]:
+            entries = self._sorted[name]
+            index = bisect_left(entries, (amount, code))
+            del entries[index]
+            if entries:
+                self._totals[name] -= amount
+            else:
+                del self._sorted[name]
+                del self._totals[name]
+
+    def products(self) -> List[str]:
+        """Returns the indexed product names in alphabetical order."""
+        with self._lock:
+            return sorted(self._sorted)
+
+    def match(self, product: str) -> List[str]:
+        """Returns the indexed products a name or fuel type refers to.
+
+        An exact product name, ignoring case, is preferred. Otherwise every
+        product whose name contains `product` is returned, as in
+        `opet.api.select_prices`.
+        """
+        folded = product.casefold()
+        names = self.products()
+        exact = [name for name in names if name.casefold() == folded]
+        if exact:
+            return exact
+        key = fuel_type_key(product)
+        if not key:
+            return []
+        for name in names:
+            if name not in PRODUCT_INDEX:
+                PRODUCT_INDEX.add(name)
+        matches = PRODUCT_INDEX.matching(key)
+        return [name for name in names if name in matches]
+
+    def stats(self, product: str) -> Optional[ProductStats]:
+        """Returns the aggregates of a product, or None if not indexed."""
+        with self._lock:
+            entries = self._sorted.get(product)
+            if not entries:
+                return None
+            count = len(entries)
+            middle = count // 2
+            if count % 2:
+                median = entries[middle][0]
+            else:
+                median = (entries[middle - 1][0] + entries[middle][0]) / 2
+            return {
+                "product": product,
+                "count": count,
+                "min": entries[0][0],
+                "max": entries[-1][0],
+                "mean": round(self._totals[product] / count, 4),
+                "median": median
+            }
+
+    def all_stats(
+        self, fuel_types: Optional[FuelTypes] = None
+    ) -> List[ProductStats]:
+        """Returns the aggregates of every product, alphabetically.
+
+        With `fuel_types`, only the products they refer to (see `match`)
+        are included.
+        """
+        if fuel_types is None:
+            names = self.products()
+        else:
+            if isinstance(fuel_types, str):
+                fuel_types = (fuel_types,)
+            names = sorted({
+                name for fuel_type in fuel_types
+                for name in self.match(fuel_type)
+            })
+        found = (self.stats(name) for name in names)
+        return [stats for stats in found if stats is not None]
+
+    def cheapest(
+        self, product: str, n: int = 5, most_expensive: bool = False
+    ) -> List[RankedPrice]:
+        """Returns the `n` provinces where a product is cheapest.
+
+        `product` is resolved with `match`, so a fuel type such as
+        "motorin" ranks every diesel product together. With
+        `most_expensive` the most expensive provinces are returned instead.
+        """
+        names = self.match(product)
+        with self._lock:
+            ranked = [
+                _tagged(self._sorted[name], name, most_expensive)
+                for name in names if name in self._sorted
+            ]
+            merged = heapq.merge(*ranked, reverse=most_expensive)
+            return [
+                {
+                    "code": code,
+                    "province": self._results[code][0],
+                    "product": name,
+                    "amount": amount
+                }
+                for amount, code, name in islice(merged, n)
+            ]
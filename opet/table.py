@@ -0,0 +1,214 @@
+"""Compact storage for the prices of many provinces.
+
+A price result stores every price as its own dictionary, so holding every
+province, or many snapshots of them, repeats the same product names and
+dictionary overhead thousands of times. `PriceTable` keeps the interned
+product names once and the amounts in a flat `array` of doubles, one row
+per province and one column per product. Missing prices are stored as NaN.
+
+Tables are not modified after creation; they convert back to the
+`FuelPrice` and `FormattedPriceResult` shapes on demand. The price cache
+stores every entry as a one-row table and the server's snapshot holds all
+provinces in one table, so the dictionaries only exist while a response
+is being built. The savings come from large tables: in a one-row table
+the row and column indexes take most of the space.
+"""
+
+import math
+import sys
+from array import array
+from opet.api import (
+    BulkPriceResult,
+    FormattedPriceResult,
+    FuelPrice,
+    normalize_plate_code
+)
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence
+
+
+class PriceTable:
+    """Province × product matrix of fuel prices for one update.
+
+    Attributes:
+        last_update: Opet's `lastUpdateDate` of the prices.
+        updates: `lastUpdate` of every row. Rows kept from an earlier
+                 update, e.g. because a refresh failed for them, differ
+                 from `last_update`.
+        codes: Normalized plate codes, one per row.
+        names: Province names, one per row.
+        products: Interned product names, one per column.
+        amounts: Row-major amounts; NaN where a province has no price.
+    """
+
+    __slots__ = (
+        "last_update", "updates", "codes", "names", "products", "amounts",
+        "_rows", "_columns"
+    )
+
+    def __init__(
+        self,
+        last_update: str,
+        codes: Sequence[str],
+        names: Sequence[str],
+        products: Sequence[str],
+        amounts: "array[float]",
+        updates: Optional[Sequence[str]] = None
+    ) -> None:
+        """Creates a table from its columns.
+
+        `updates` defaults to `last_update` for every row.
+
+        Raises:
+            ValueError: If the sizes do not match.
+        """
+        if len(codes) != len(names):
+            raise ValueError("codes and names must have the same length")
+        if updates is not None and len(updates) != len(codes):
+            raise ValueError("updates must have one value per row")
+        if len(amounts) != len(codes) * len(products):
+            raise ValueError("amounts must have one value per cell")
+        self.last_update = last_update
+        self.updates = (
+            (last_update,) * len(codes) if updates is None
+            else tuple(updates)
+        )
+        self.codes = tuple(codes)
+        self.names = tuple(names)
+        self.products = tuple(sys.intern(name) for name in products)
+        self.amounts = amounts
+        self._rows = {code: row for row, code in enumerate(self.codes)}
+        self._columns = {name: col for col, name in enumerate(self.products)}
+
+    @classmethod
+    def from_results(
+        cls,
+        results: Mapping[str, FormattedPriceResult],
+        last_update: Optional[str] = None
+    ) -> "PriceTable":
+        """Builds a table from price results keyed by plate code.
+
+        Products are ordered by first appearance. Every row keeps the
+        `lastUpdate` of its result; `last_update` defaults to the latest
+        of them.
+        """
+        columns: Dict[str, int] = {}
+        for result in results.values():
+            for price in result["prices"]:
+                columns.setdefault(price["name"], len(columns))
+        amounts = array("d", [math.nan]) * (len(results) * len(columns))
+        codes: List[str] = []
+        names: List[str] = []
+        updates: List[str] = []
+        for row, (code, result) in enumerate(results.items()):
+            codes.append(normalize_plate_code(str(code)))
+            names.append(result["province"])
+            updates.append(result["lastUpdate"])
+            base = row * len(columns)
+            for price in result["prices"]:
+                amounts[base + columns[price["name"]]] = price["amount"]
+        if last_update is None:
+            last_update = max(updates, default="")
+        return cls(
+            last_update, codes, names, list(columns), amounts, updates
+        )
+
+    @classmethod
+    def from_bulk(cls, bulk: BulkPriceResult) -> "PriceTable":
+        """Builds a table from the results of `get_all_prices`."""
+        return cls.from_results(bulk["results"], bulk["lastUpdate"])
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __contains__(self, province_id: object) -> bool:
+        return (isinstance(province_id, str)
+                and normalize_plate_code(province_id) in self._rows)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        """Returns the size of the amount storage in bytes."""
+        return len(self.amounts) * self.amounts.itemsize
+
+    def _row(self, province_id: str) -> int:
+        try:
+            return self._rows[normalize_plate_code(province_id)]
+        except KeyError:
+            raise KeyError(province_id) from None
+
+    def amount(self, province_id: str, product: str) -> Optional[float]:
+        """Returns a price, or None if the province has no such product.
+
+        Raises:
+            KeyError: If the province is not in the table.
+        """
+        row = self._row(province_id)
+        col = self._columns.get(product)
+        if col is None:
+            return None
+        value = self.amounts[row * len(self.products) + col]
+        return None if math.isnan(value) else value
+
+    def column(self, product: str) -> Dict[str, float]:
+        """Returns the price of a product in every province that has it."""
+        col = self._columns.get(product)
+        if col is None:
+            return {}
+        width = len(self.products)
+        return {
+            code: value
+            for code, value in zip(self.codes, self.amounts[col::width])
+            if not math.isnan(value)
+        }
+
+    def prices(self, province_id: str) -> List[FuelPrice]:
+        """Returns the prices of a province as `FuelPrice` records.
+
+        Raises:
+            KeyError: If the province is not in the table.
+        """
+        width = len(self.products)
+        base = self._row(province_id) * width
+        return [
+            {"name": name, "amount": value}
+            for name, value in zip(
+                self.products, self.amounts[base:base + width]
+            )
+            if not math.isnan(value)
+        ]
+
+    def result(self, province_id: str) -> FormattedPriceResult:
+        """Returns the price result of a province.
+
+        Raises:
+            KeyError: If the province is not in the table.
+        """
+        row = self._row(province_id)
+        return {
+            "province": self.names[row],
+            "lastUpdate": self.updates[row],
+            "prices": self.prices(province_id)
+        }
+
+    def get(self, province_id: str) -> Optional[FormattedPriceResult]:
+        """Returns the price result of a province, or None if missing."""
+        if province_id not in self:
+            return None
+        return self.result(province_id)
+
+    def to_results(self) -> Dict[str, FormattedPriceResult]:
+        """Returns the price results of every province keyed by plate code."""
+        return {code: self.result(code) for code in self.codes}
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, PriceTable):
+            return NotImplemented
+        return (self.last_update == other.last_update
+                and self.to_results() == other.to_results())
+
+    def __repr__(self) -> str:
+        return (f"PriceTable(last_update={self.last_update!r}, "
+                f"provinces={len(self.codes)}, "
+                f"products={len(self.products)})")
@@ -0,0 +1,245 @@
+"""Pooled HTTP transport for the Opet API client application.
+
+This module provides `HttpTransport`, a thin wrapper around a
+`requests.Session` that keeps connections to the Opet API alive between
+calls. Reusing connections avoids a fresh TCP and TLS handshake for every
+provinces, lastupdate and prices request. The transport also applies
+connect/read timeouts, retries transient failures with backoff and keeps
+counters for opened and reused connections. Identical concurrent requests
+are coalesced into one upstream call.
+"""
+
+import threading
+import time
+from opet.breaker import CircuitBreaker
+from opet.budget import CallBudget
+from opet.exceptions import Http200Error
+from opet.metrics import record_error, record_upstream
+from opet.singleflight import SingleFlight
+from typing import Any, Dict, Optional, Tuple
+
+
+DEFAULT_HEADERS: Dict[str, str] = {
+    'User-Agent': (
+        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) '
+        'AppleWebKit/537.36 (KHTML, like Gecko) '
+        'Chrome/114.0.0.0 Safari/537.36'
+    ),
+    'Origin': 'https://www.opet.com.tr',
+    'Host': 'api.opet.com.tr',
+    'Channel': 'Web',
+    'Accept-Language': 'tr-TR'
+}
+
+# Status codes that are worth retrying; anything else is returned as is.
+RETRY_STATUS_CODES: Tuple[int, ...] = (429, 500, 502, 503, 504)
+
+
+class HttpTransport:
+    """Keep-alive HTTP transport with a configurable connection pool.
+
+    Attributes:
+        headers: Headers sent with every request. Built once and reused.
+        timeout: Default `(connect, read)` timeout tuple in seconds.
+        verify: Whether TLS certificates are verified.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 4,
+        pool_maxsize: int = 10,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        retries: int = 2,
+        backoff_factor: float = 0.3,
+        headers: Optional[Dict[str, str]] = None,
+        verify: bool = True,
+        coalesce: bool = True,
+        circuit_breaker: bool = True,
+        max_calls_per_second: Optional[float] = None
+    ) -> None:
+        """Creates the session and mounts a pooled, retrying adapter.
+
+        Args:
+            pool_connections: Number of per-host connection pools to cache.
+            pool_maxsize: Maximum number of connections kept per host.
+            connect_timeout: Seconds to wait for a connection to open.
+            read_timeout: Seconds to wait for the server to send data.
+            retries: How many times a failed request is retried.
+            backoff_factor: Backoff factor between retries, as used by
+                            `urllib3.util.retry.Retry`.
+            headers: Headers to send instead of `DEFAULT_HEADERS`.
+            verify: Whether TLS certificates are verified.
+            coalesce: Whether concurrent requests for the same URL share a
+                      single upstream call.
+            circuit_breaker: Whether requests fail fast with
+                             `CircuitOpenError` after repeated upstream
+                             failures. The breaker is the `breaker`
+                             attribute and can be replaced to tune it.
+            max_calls_per_second: Upstream call budget. Calls beyond it
+                                  fail fast with `BudgetExceededError`;
+                                  coalesced requests and retries count as
+                                  one call. The budget is the `budget`
+                                  attribute. None means no limit.
+        """
+        # requests is imported here so that importing this module stays cheap
+        # for code paths that never touch the network.
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.headers: Dict[str, str] = dict(
+            DEFAULT_HEADERS if headers is None else headers
+        )
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        self.verify: bool = verify
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False
+        )
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry
+        )
+        self.flight: Optional[SingleFlight] = (
+            SingleFlight() if coalesce else None
+        )
+        self.breaker: Optional[CircuitBreaker] = (
+            CircuitBreaker() if circuit_breaker else None
+        )
+        self.budget: Optional[CallBudget] = (
+            CallBudget(max_calls_per_second) if max_calls_per_second
+            else None
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+    def get(
+        self,
+        url: str,
+        timeout: Optional[Tuple[float, float]] = None
+    ) -> Any:
+        """Makes a GET request and returns the parsed JSON response.
+
+        Args:
+            url: The URL to send the GET request to.
+            timeout: Optional `(connect, read)` timeout overriding the
+                     transport default for this request only.
+
+        Returns:
+            The JSON response from the server, parsed into Python data
+            structures.
+
+        Raises:
+            Http200Error: If the HTTP status code of the response is not 200.
+            CircuitOpenError: If the circuit breaker is open.
+            BudgetExceededError: If the call budget is spent.
+            requests.exceptions.RequestException: For network errors or other
+                                                  issues during the request.
+        """
+        if self.flight is None:
+            return self._request(url, timeout)
+        return self.flight.do(url, lambda: self._request(url, timeout))
+
+    def _request(
+        self,
+        url: str,
+        timeout: Optional[Tuple[float, float]]
+    ) -> Any:
+        """Sends the GET request; see `get`."""
+        # The budget is checked first so that a refused call never takes
+        # the half-open breaker's probe.
+        if self.budget is not None:
+            self.budget.check()
+        if self.breaker is not None:
+            self.breaker.check()
+        start = time.perf_counter()
+        status: Optional[int] = None
+        try:
+            r = self.session.get(
+                url,
+                headers=self.headers,
+                timeout=self.timeout if timeout is None else timeout,
+                verify=self.verify
+            )
+            status = r.status_code
+        finally:
+            if self.breaker is not None:
+                self.breaker.record_response(status)
+            record_upstream(
+                url, str(status or "error"), time.perf_counter() - start
+            )
+        if r.status_code != 200:
+            error = Http200Error(
+                f"Request to '{url}' failed with status code "
+                f"{r.status_code}. Response: {r.text}"
+            )
+            record_error(error)
+            raise error
+        return r.json()
+
+    def stats(self) -> Dict[str, int]:
+        """Returns request and connection counters for this transport.
+
+        Every request either opens a new connection or reuses a pooled one,
+        so `requests == connections_opened + connections_reused`. Retried
+        attempts are counted as separate requests. `coalesced` counts calls
+        that shared another caller's in-flight request instead.
+        """
+        pools = self._adapter.poolmanager.pools
+        requests_made = 0
+        opened = 0
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_made += pool.num_requests
+            opened += pool.num_connections
+        return {
+            "requests": requests_made,
+            "connections_opened": opened,
+            "connections_reused": requests_made - opened,
+            "coalesced": (
+                self.flight.stats()["coalesced"] if self.flight else 0
+            )
+        }
+
+    def close(self) -> None:
+        """Closes the session and every pooled connection."""
+        self.session.close()
+
+    def __enter__(self) -> "HttpTransport":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+_default_transport: Optional[HttpTransport] = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport() -> HttpTransport:
+    """Returns the process-wide transport, creating it on first use."""
+    global _default_transport
+    if _default_transport is None:
+        with _default_transport_lock:
+            if _default_transport is None:
+                _default_transport = HttpTransport()
+    return _default_transport
+
+
+def set_default_transport(transport: Optional[HttpTransport]) -> None:
+    """Replaces the process-wide transport used by `opet.utils.http_get`.
+
+    Passing None drops the current transport; a new one with default
+    settings is created on the next request.
+    """
+    global _default_transport
+    with _default_transport_lock:
+        _default_transport = transport
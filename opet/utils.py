@@ -4,21 +4,22 @@ This module provides helper functions for making HTTP requests and converting
 data to JSON format, supporting the core operations of the Opet API client.
 """
 
-import requests
-from opet.exceptions import Http200Error
-import json
-from typing import Any, Dict, List, Union  # Added Union for to_json
+from opet.serialization import dumps
+from opet.transport import HttpTransport, get_default_transport
+from typing import Any, Dict, List, Optional, Union  # Union for to_json
 
 
-def http_get(url: str) -> Any:
+def http_get(url: str, transport: Optional[HttpTransport] = None) -> Any:
     """Makes a GET request to the specified URL and returns the JSON response.
 
-    This function encapsulates the common settings for HTTP GET requests to the
-    Opet API, including standard headers and error handling for non-200
-    responses.
+    This function is a thin wrapper around `HttpTransport.get`. Unless a
+    transport is given, the shared process-wide transport is used, so
+    consecutive calls reuse pooled keep-alive connections to the Opet API.
 
     Args:
         url: The URL to send the GET request to.
+        transport: Optional transport to send the request through instead of
+                   the shared default one.
 
     Returns:
         The JSON response from the server, parsed into Python data structures.
@@ -29,36 +30,25 @@ def http_get(url: str) -> Any:
         requests.exceptions.RequestException: For network errors or other
                                               issues during the request.
     """
-    headers: Dict[str, str] = {
-        'User-Agent': (
-            'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) '
-            'AppleWebKit/537.36 (KHTML, like Gecko) '
-            'Chrome/114.0.0.0 Safari/537.36'
-        ),
-        'Origin': 'https://www.opet.com.tr',
-        'Host': 'api.opet.com.tr',
-        'Channel': 'Web',
-        'Accept-Language': 'tr-TR'
-    }
-    r: requests.Response = requests.get(url, headers=headers, verify=True)
-    if r.status_code != 200:
-        raise Http200Error(
-            f"Request to '{url}' failed with status code {r.status_code}. "
-            f"Response: {r.text}"
-        )
-    return r.json()
+    if transport is None:
+        transport = get_default_transport()
+    return transport.get(url)
 
 
-def to_json(data: Union[Dict[Any, Any], List[Any]]) -> str:
+def to_json(
+    data: Union[Dict[Any, Any], List[Any]], mode: Optional[str] = None
+) -> str:
     """Converts a Python dictionary or list to a JSON string.
 
-    This function formats the JSON string with an indent for readability and
-    ensures that non-ASCII characters (like Turkish characters) are preserved.
+    By default the JSON string is indented for readability. Non-ASCII
+    characters (like Turkish characters) are preserved. The encoder and
+    the default mode are set in `opet.serialization`.
 
     Args:
         data: The Python dictionary or list to be converted to JSON.
+        mode: "pretty" or "compact"; defaults to the configured mode.
 
     Returns:
         A JSON string representation of the input data.
     """
-    return json.dumps(data, ensure_ascii=False, indent=2)
+    return dumps(data, mode)
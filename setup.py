@@ -14,8 +14,12 @@ setup(
         "fastapi==0.109.2",
         "uvicorn==0.27.1",
         "pydantic==2.6.1",
-        "typing-extensions==4.9.0"
+        "typing-extensions==4.9.0",
+        "httpx==0.28.1"
     ],
+    extras_require={
+        "fast": ["orjson==3.8.3"]
+    },
     description=(
         "A Python package that allows you to view fuel",
         "prices in Turkey based on cities."),
@@ -35,7 +39,7 @@ setup(
             'opet-cli=opet.main:cli',
         ],
     },
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
     package_dir={'opet': 'opet'},
     python_requires=">=3.0"
 )
@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Keeps on-disk snapshots written by tests out of the user's cache."""
+    monkeypatch.setenv("OPET_CACHE_DIR", str(tmp_path / "opet-cache"))
+    return tmp_path / "opet-cache"
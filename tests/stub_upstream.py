@@ -0,0 +1,135 @@
+"""Local stand-in for api.opet.com.tr used by tests.
+
+`StubUpstream` serves the three endpoints the client uses (`/provinces`,
+`/lastupdate` and `/prices`) from a threaded HTTP/1.1 server on localhost,
+with configurable latency and payload size.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+BASE_PATH = "/api/fuelprices"
+
+
+def make_products(count: int) -> List[Dict[str, Any]]:
+    """Builds `count` product records in the upstream price format."""
+    return [
+        {"productName": f"Product {i}", "amount": round(40.0 + i * 1.5, 2)}
+        for i in range(count)
+    ]
+
+
+class StubUpstream:
+    """Threaded HTTP server imitating the Opet fuel prices API.
+
+    Attributes:
+        latency: Seconds every response is delayed by.
+        provinces: Province records served by `/provinces`.
+        products: Price records served by `/prices` for every province.
+        last_update: Value served by `/lastupdate`.
+        fail_status: When set, every request is answered with this status.
+        hits: Number of requests received per endpoint name.
+        peak_in_flight: Highest number of requests handled at once.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        provinces: Optional[List[Dict[str, str]]] = None,
+        product_count: int = 8,
+        last_update: str = "2024-01-01T06:00:00"
+    ) -> None:
+        self.latency = latency
+        self.provinces = provinces if provinces is not None else [
+            {"code": str(code), "name": f"IL {code}"}
+            for code in range(1, 82)
+        ]
+        self.products = make_products(product_count)
+        self.last_update = last_update
+        self.fail_status: Optional[int] = None
+        self.hits: Dict[str, int] = {}
+        self.peak_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(
+            ("127.0.0.1", 0), self._handler_class()
+        )
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as `OpetApiClient.url`."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{BASE_PATH}"
+
+    def count(self, endpoint: str) -> int:
+        """Returns how many requests an endpoint has received."""
+        with self._lock:
+            return self.hits.get(endpoint, 0)
+
+    def start(self) -> "StubUpstream":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubUpstream":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def respond(self, endpoint: str, query: Dict[str, List[str]]) -> Any:
+        """Builds the JSON body for an endpoint."""
+        if endpoint == "provinces":
+            return self.provinces
+        if endpoint == "lastupdate":
+            return {"lastUpdateDate": self.last_update}
+        if endpoint == "prices":
+            code = query.get("ProvinceCode", [""])[0]
+            return [{"provinceCode": code, "prices": self.products}]
+        return None
+
+    def _handler_class(self) -> type:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                parts = urlsplit(self.path)
+                endpoint = parts.path[len(BASE_PATH):].strip("/")
+                with stub._lock:
+                    stub.hits[endpoint] = stub.hits.get(endpoint, 0) + 1
+                    stub._in_flight += 1
+                    stub.peak_in_flight = max(
+                        stub.peak_in_flight, stub._in_flight
+                    )
+                if stub.latency:
+                    time.sleep(stub.latency)
+                with stub._lock:
+                    stub._in_flight -= 1
+                body = stub.respond(endpoint, parse_qs(parts.query))
+                status = stub.fail_status or (200 if body is not None else 404)
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
@@ -1,6 +1,8 @@
 import pytest
 from opet.api import OpetApiClient
-from opet.exceptions import ProvinceNotFoundError
+from opet.exceptions import Http200Error, ProvinceNotFoundError
+from opet.products import ProductIndex
+from opet.provinces import ProvinceCatalog
 from opet.utils import to_json
 
 DEFAULT_PROVINCES_DATA = [
@@ -9,30 +11,75 @@ DEFAULT_PROVINCES_DATA = [
 
 
 @pytest.fixture
-def client_with_mock_http(mocker):
+def catalog(tmp_path):
+    """Fixture for a fresh province catalog holding the default data."""
+    province_catalog = ProvinceCatalog(path=str(tmp_path / "provinces.json"))
+    province_catalog.update(DEFAULT_PROVINCES_DATA)
+    return province_catalog
+
+
+@pytest.fixture
+def client_with_mock_http(mocker, catalog):
     """Fixture for OpetApiClient.
 
     Mocks 'opet.api.http_get' which is used by OpetApiClient.
-    The mock is configured with default province data for the __init__ call.
+    The client uses a fresh catalog with default province data, so it
+    makes no request for provinces.
     Returns the client instance and the mock for http_get.
     """
     mock_http_get = mocker.patch('opet.api.http_get')
     mock_http_get.return_value = DEFAULT_PROVINCES_DATA
-    api_client = OpetApiClient()
+    api_client = OpetApiClient(catalog=catalog)
     return api_client, mock_http_get
 
 
 def test_internal_province_loading(client_with_mock_http):
-    """Test that provinces are loaded during __init__."""
+    """Test that creating the client makes no request."""
     api_client, mock_http_get = client_with_mock_http
-    assert mock_http_get.call_count == 1
-    mock_http_get.assert_called_once_with(f"{api_client.url}/provinces")
+    assert mock_http_get.call_count == 0
     assert api_client._provinces_list == DEFAULT_PROVINCES_DATA
     assert api_client._provinces_map == {
         str(item['code']): item['name'] for item in DEFAULT_PROVINCES_DATA
     }
 
 
+def test_stale_catalog_refreshed_on_first_price(mocker, tmp_path):
+    """Test that a missing snapshot is fetched once, on the first price."""
+    mock_http_get = mocker.patch('opet.api.http_get')
+    path = tmp_path / "provinces.json"
+    api_client = OpetApiClient(catalog=ProvinceCatalog(path=str(path)))
+    assert api_client._provinces_map["34"] == "İstanbul"
+    assert mock_http_get.call_count == 0
+    mock_http_get.side_effect = [
+        DEFAULT_PROVINCES_DATA,
+        {'lastUpdateDate': '2023-01-01T10:00:00'},
+        [{'prices': []}]
+    ]
+    api_client.price("DEFAULT")
+    assert mock_http_get.call_args_list[0] == mocker.call(
+        f"{api_client.url}/provinces"
+    )
+    assert api_client.catalog.source == "network"
+    reloaded = ProvinceCatalog(path=str(path))
+    assert reloaded.map == {"DEFAULT": "Default Province Test"}
+    assert not reloaded.needs_refresh()
+
+
+def test_catalog_refresh_failure_uses_fallback(mocker):
+    """Test that an unreachable API falls back to the bundled provinces."""
+    mock_http_get = mocker.patch('opet.api.http_get')
+    mock_http_get.side_effect = [
+        OSError("unreachable"),
+        {'lastUpdateDate': '2023-01-01T10:00:00'},
+        [{'prices': []}]
+    ]
+    api_client = OpetApiClient()
+    result = api_client.price("034")
+    assert '"province": "İstanbul"' in result
+    assert api_client.catalog.source == "fallback"
+    assert not api_client.catalog.needs_refresh()
+
+
 def test_get_last_update(client_with_mock_http, mocker):
     """Test get_last_update method."""
     api_client, mock_http_get = client_with_mock_http
@@ -81,8 +128,6 @@ def test_get_price_success(client_with_mock_http, mocker):
 def test_price_success(client_with_mock_http, mocker):
     """Test price method for successful retrieval and formatting."""
     api_client, mock_http_get = client_with_mock_http
-    assert mock_http_get.call_count == 1
-    mock_http_get.assert_called_with(f"{api_client.url}/provinces")
     province_id_to_test = "DEFAULT"
     last_update_data = {'lastUpdateDate': '2023-01-01T10:00:00'}
     raw_prices_data = [
@@ -100,12 +145,11 @@ def test_price_success(client_with_mock_http, mocker):
     }
     expected_json_output = to_json(expected_output_structure)
     assert result_json_str == expected_json_output
-    assert mock_http_get.call_count == 1 + 2
+    assert mock_http_get.call_count == 2
     calls = mock_http_get.call_args_list
-    assert len(calls) == 3
-    assert calls[0] == mocker.call(f"{api_client.url}/provinces")
-    assert calls[1] == mocker.call(f"{api_client.url}/lastupdate")
-    assert calls[2] == mocker.call(
+    assert len(calls) == 2
+    assert calls[0] == mocker.call(f"{api_client.url}/lastupdate")
+    assert calls[1] == mocker.call(
         f"{api_client.url}/prices?ProvinceCode={province_id_to_test}"
         "&IncludeAllProducts=true"
     )
@@ -114,8 +158,6 @@ def test_price_success(client_with_mock_http, mocker):
 def test_price_province_not_found(client_with_mock_http, mocker):
     """Test price method when province ID is not found."""
     api_client, mock_http_get = client_with_mock_http
-    assert mock_http_get.call_count == 1
-    mock_http_get.assert_called_with(f"{api_client.url}/provinces")
     province_id_not_in_default = "NON_EXISTENT_ID"
     expected_error_message = (
         f"No province found with plate code {province_id_not_in_default} "
@@ -125,3 +167,150 @@ def test_price_province_not_found(client_with_mock_http, mocker):
     with pytest.raises(ProvinceNotFoundError, match=expected_error_message):
         api_client.price(province_id_not_in_default)
     assert mock_http_get.call_count == initial_call_count_after_init
+
+
+def test_client_uses_given_transport(mocker):
+    """Test that requests go through a transport passed to the client."""
+    mock_http_get = mocker.patch('opet.api.http_get')
+    transport = mocker.Mock()
+    api_client = OpetApiClient(transport=transport)
+    api_client.get_provinces()
+    mock_http_get.assert_called_once_with(
+        f"{api_client.url}/provinces", transport=transport
+    )
+
+
+def test_price_served_from_cache(client_with_mock_http):
+    """Test that a second price call makes no upstream request."""
+    api_client, mock_http_get = client_with_mock_http
+    mock_http_get.side_effect = [
+        {'lastUpdateDate': '2023-01-01T10:00:00'},
+        [{'prices': [{'productName': 'Petrol', 'amount': 20.0}]}]
+    ]
+    first = api_client.price("DEFAULT")
+    assert api_client.price("DEFAULT") == first
+    assert mock_http_get.call_count == 2
+    assert api_client.cache.stats()["hits"] == 1
+
+
+def test_price_cache_revalidation(client_with_mock_http, mocker):
+    """Test that an expired entry costs one /lastupdate call."""
+    api_client, mock_http_get = client_with_mock_http
+    mock_http_get.side_effect = [
+        {'lastUpdateDate': '2023-01-01T10:00:00'},
+        [{'prices': [{'productName': 'Petrol', 'amount': 20.0}]}],
+        {'lastUpdateDate': '2023-01-01T10:00:00'}
+    ]
+    api_client.price("DEFAULT")
+    api_client.cache._entries["DEFAULT"].stored_at -= 300
+    api_client.price("DEFAULT")
+    assert mock_http_get.call_args_list[-1] == mocker.call(
+        f"{api_client.url}/lastupdate"
+    )
+    assert mock_http_get.call_count == 3
+
+
+def test_get_all_prices(mocker, catalog):
+    """Test that a bulk fetch requests /lastupdate once per batch."""
+    catalog.update([
+        {'code': '1', 'name': 'One'},
+        {'code': '2', 'name': 'Two'},
+        {'code': '3', 'name': 'Three'}
+    ])
+    api_client = OpetApiClient(catalog=catalog)
+    last_update = {'lastUpdateDate': '2023-01-01T10:00:00'}
+
+    def fake_http_get(url):
+        if url.endswith("/lastupdate"):
+            return last_update
+        if "ProvinceCode=2" in url:
+            raise Http200Error("boom")
+        return [{'prices': [{'productName': 'Petrol', 'amount': 20.0}]}]
+
+    mocker.patch('opet.api.http_get', fake_http_get)
+    bulk = api_client.get_all_prices(["01", "2", "3", "99"])
+    assert bulk["lastUpdate"] == last_update["lastUpdateDate"]
+    assert sorted(bulk["results"]) == ["1", "3"]
+    assert bulk["results"]["1"] == {
+        "province": "One",
+        "lastUpdate": last_update["lastUpdateDate"],
+        "prices": [{"name": "Petrol", "amount": 20.0}]
+    }
+    assert bulk["errors"]["2"] == "boom"
+    assert "99" in bulk["errors"]
+    mocker.patch('opet.api.http_get', return_value=last_update)
+    again = api_client.get_all_prices(["1", "3"])
+    assert again["results"] == {
+        "1": bulk["results"]["1"], "3": bulk["results"]["3"]
+    }
+
+
+def test_price_result(client_with_mock_http):
+    """Test that price_result returns the structured result."""
+    api_client, mock_http_get = client_with_mock_http
+    mock_http_get.side_effect = [
+        {'lastUpdateDate': '2023-01-01T10:00:00'},
+        [{'prices': [{'productName': 'Petrol', 'amount': 20.0}]}]
+    ]
+    result = api_client.price_result("DEFAULT")
+    assert result == {
+        "province": DEFAULT_PROVINCES_DATA[0]['name'],
+        "lastUpdate": '2023-01-01T10:00:00',
+        "prices": [{"name": "Petrol", "amount": 20.0}]
+    }
+    assert api_client.price("DEFAULT") == to_json({"results": result})
+
+
+def test_price_result_filtered_and_projected(client_with_mock_http):
+    """Test product filtering and field projection on one fetched result."""
+    api_client, mock_http_get = client_with_mock_http
+    mock_http_get.side_effect = [
+        {'lastUpdateDate': '2023-01-01T10:00:00'},
+        [{'prices': [
+            {'productName': 'Kurşunsuz Benzin 95', 'amount': 42.0},
+            {'productName': 'Motorin UltraForce', 'amount': 44.0},
+            {'productName': 'Motorin EcoForce', 'amount': 43.5}
+        ]}]
+    ]
+    result = api_client.price_result("DEFAULT", products="motorin")
+    assert [p["name"] for p in result["prices"]] == [
+        "Motorin UltraForce", "Motorin EcoForce"
+    ]
+    result = api_client.price_result(
+        "DEFAULT", products=["BENZIN", "ecoforce"], fields=["prices"]
+    )
+    assert result == {"prices": [
+        {"name": "Kurşunsuz Benzin 95", "amount": 42.0},
+        {"name": "Motorin EcoForce", "amount": 43.5}
+    ]}
+    assert len(api_client.price_result("DEFAULT")["prices"]) == 3
+    assert mock_http_get.call_count == 2
+    with pytest.raises(ValueError):
+        api_client.price_result("DEFAULT", fields=["amount"])
+
+
+def test_product_index_matches_are_bounded():
+    """Test that only the most recently used fuel types are remembered."""
+    index = ProductIndex(max_cached=2)
+    index.add("Motorin UltraForce")
+    index.add("Kurşunsuz Benzin 95")
+    assert index.matching(("motorin",)) == {"Motorin UltraForce"}
+    index.matching(("benzin",))
+    index.matching(("motorin",))
+    assert index.matching(("lpg",)) == frozenset()
+    assert list(index._matches) == [("motorin",), ("lpg",)]
+    index.add("Motorin EcoForce")
+    assert len(index._matches) == 0
+    assert len(index.matching(("motorin",))) == 2
+
+
+def test_get_price_products(client_with_mock_http):
+    """Test that get_price keeps only the requested products."""
+    api_client, mock_http_get = client_with_mock_http
+    mock_http_get.return_value = [{"prices": [
+        {"productName": "Petrol", "amount": 20.0},
+        {"productName": "Diesel", "amount": 21.0}
+    ]}]
+    assert api_client.get_price("34", products="diesel") == [
+        {"name": "Diesel", "amount": 21.0}
+    ]
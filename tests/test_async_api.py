@@ -0,0 +1,136 @@
+import asyncio
+import json
+import pytest
+from opet.async_api import AsyncOpetApiClient
+from opet.exceptions import Http200Error, ProvinceNotFoundError
+from tests.stub_upstream import StubUpstream
+
+
+@pytest.fixture
+def upstream():
+    """Fixture for a local stub of the Opet API."""
+    with StubUpstream(product_count=2) as stub:
+        yield stub
+
+
+@pytest.fixture
+def client(upstream):
+    """Fixture for an AsyncOpetApiClient pointed at the stub."""
+    api_client = AsyncOpetApiClient()
+    api_client.url = upstream.url
+    return api_client
+
+
+def test_no_request_on_construction(upstream, client):
+    """Test that creating the client does not load provinces."""
+    assert upstream.hits == {}
+
+
+def test_get_last_update(upstream, client):
+    """Test get_last_update method."""
+    data = asyncio.run(client.get_last_update())
+    assert data == {"lastUpdateDate": upstream.last_update}
+
+
+def test_get_price(upstream, client):
+    """Test get_price method."""
+    data = asyncio.run(client.get_price("34"))
+    assert data == [
+        {"name": "Product 0", "amount": 40.0},
+        {"name": "Product 1", "amount": 41.5}
+    ]
+
+
+def test_price(upstream, client):
+    """Test price method loads provinces once and formats the result."""
+    async def run():
+        first = await client.price("06")
+        await client.price("34")
+        return first
+
+    result = json.loads(asyncio.run(run()))
+    assert result["results"]["province"] == "IL 6"
+    assert result["results"]["lastUpdate"] == upstream.last_update
+    assert len(result["results"]["prices"]) == 2
+    assert upstream.count("provinces") == 1
+    assert upstream.count("prices") == 2
+
+
+def test_price_province_not_found(upstream, client):
+    """Test price method when province ID is not found."""
+    with pytest.raises(ProvinceNotFoundError):
+        asyncio.run(client.price("99"))
+    assert upstream.count("prices") == 0
+
+
+def test_non_200_raises(upstream, client):
+    """Test that non-200 responses raise Http200Error after retries."""
+    upstream.fail_status = 503
+    client.transport.backoff_factor = 0
+    with pytest.raises(Http200Error):
+        asyncio.run(client.get_last_update())
+    assert upstream.count("lastupdate") == client.transport.retries + 1
+
+
+def test_get_all_prices_bounded_concurrency(upstream, client):
+    """Test that a bulk fetch respects max_concurrency."""
+    upstream.latency = 0.1
+    bulk = asyncio.run(client.get_all_prices(
+        [str(code) for code in range(1, 9)], max_concurrency=4
+    ))
+    assert sorted(bulk["results"], key=int) == [
+        str(code) for code in range(1, 9)
+    ]
+    assert bulk["errors"] == {}
+    assert upstream.count("lastupdate") == 1
+    assert upstream.count("prices") == 8
+    assert upstream.peak_in_flight == 4
+
+
+def test_concurrent_identical_requests_coalesce(upstream, client):
+    """Test that identical concurrent upstream calls are coalesced."""
+    upstream.latency = 0.1
+
+    async def run():
+        return await asyncio.gather(
+            *(client.get_price("34") for _ in range(10))
+        )
+
+    results = asyncio.run(run())
+    assert all(result == results[0] for result in results)
+    assert upstream.count("prices") == 1
+    assert client.transport.stats()["coalesced"] == 9
+
+
+def test_client_closed_with_its_loop(upstream, client):
+    """Test that the httpx client of a finished loop is closed."""
+    asyncio.run(client.get_last_update())
+    first = client.transport._client
+    assert first.is_closed
+    asyncio.run(client.get_last_update())
+    second = client.transport._client
+    assert second is not first and second.is_closed
+
+    async def run():
+        await client.get_last_update()
+        current = client.transport._client
+        await client.aclose()
+        return current
+
+    assert asyncio.run(run()).is_closed
+    assert client.transport._client is None
+
+
+def test_connection_counters(upstream, client):
+    """Test that sequential requests reuse one pooled connection."""
+    async def run():
+        for _ in range(3):
+            await client.get_last_update()
+
+    asyncio.run(run())
+    assert client.transport.stats() == {
+        "requests": 3,
+        "connections_opened": 1,
+        "connections_reused": 2,
+        "coalesced": 0
+    }
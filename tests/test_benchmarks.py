@@ -0,0 +1,28 @@
+from benchmarks import bench_client, bench_encoding
+from benchmarks.common import summarize
+from tests.stub_upstream import StubUpstream
+
+
+def test_summarize():
+    """Test latency percentiles in milliseconds."""
+    summary = summarize([i / 1000 for i in range(1, 101)])
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == 50.0
+    assert summary["p99_ms"] == 99.0
+    assert summary["max_ms"] == 100.0
+
+
+def test_client_benchmark_smoke():
+    """Test that the client benchmark runs against the stub."""
+    with StubUpstream(product_count=2) as stub:
+        results = bench_client.run(stub, iterations=2)
+    assert results["price_cached"]["count"] == 2
+    assert results["transport"]["connections_reused"] > 0
+
+
+def test_encoding_benchmark_smoke():
+    """Test that the encoding benchmark reports every combination."""
+    results = bench_encoding.run(provinces=3, products=2, number=1)
+    assert results["json_compact_gzip"]["bytes"] > 0
+    assert (results["json_compact_plain"]["bytes"]
+            < results["json_pretty_plain"]["bytes"])
@@ -0,0 +1,165 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from opet.api import OpetApiClient
+from opet.async_api import AsyncOpetApiClient
+from opet.async_transport import AsyncHttpTransport
+from opet.breaker import CircuitBreaker
+from opet.exceptions import CircuitOpenError, Http200Error
+from opet.server.controllers.fuel import FuelController
+from opet.server.providers.opet import OpetProvider
+from opet.transport import HttpTransport
+from tests.stub_upstream import StubUpstream
+
+
+class FakeClock:
+    """Manually advanced clock for cool-down tests."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def upstream():
+    """Fixture for a local stub of the Opet API."""
+    with StubUpstream(product_count=2) as stub:
+        yield stub
+
+
+def test_breaker_states():
+    """Test closed -> open -> half-open -> closed/open transitions."""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10,
+                             clock=clock)
+    breaker.record_response(500)
+    breaker.record_response(404)
+    breaker.record_response(None)
+    assert breaker.state == "closed"
+    breaker.record_response(503)
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    assert breaker.retry_after() == 10
+
+    clock.now += 10
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.stats() == {
+        "state": "closed", "failures": 0, "rejected": 3, "opened": 2
+    }
+
+
+def test_transport_fails_fast(upstream):
+    """Test that an open breaker stops calls from reaching the upstream."""
+    transport = HttpTransport(retries=0)
+    transport.breaker = CircuitBreaker(failure_threshold=3)
+    upstream.fail_status = 500
+    url = f"{upstream.url}/lastupdate"
+    for _ in range(3):
+        with pytest.raises(Http200Error):
+            transport.get(url)
+    with pytest.raises(CircuitOpenError):
+        transport.get(url)
+    assert upstream.count("lastupdate") == 3
+    transport.close()
+
+
+def test_async_cancellation_is_not_a_failure(upstream):
+    """Test that a caller giving up does not count against the upstream."""
+    upstream.latency = 0.5
+    transport = AsyncHttpTransport(retries=0, coalesce=False)
+    transport.breaker = CircuitBreaker(failure_threshold=1)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                transport.get(f"{upstream.url}/lastupdate"), 0.05
+            )
+        await transport.aclose()
+
+    asyncio.run(run())
+    assert transport.breaker.stats()["failures"] == 0
+    assert transport.breaker.state == "closed"
+
+
+def test_client_serves_stale_prices(upstream):
+    """Test that the last good prices are served while upstream fails."""
+    client = OpetApiClient(transport=HttpTransport(retries=0))
+    client.url = upstream.url
+    client.cache.ttl = 0
+    fresh = client.price_result("34")
+    assert "stale" not in fresh
+
+    upstream.fail_status = 500
+    stale = client.price_result("34")
+    assert stale["stale"] is True
+    assert stale["prices"] == fresh["prices"]
+    bulk = client.get_all_prices(["34", "6"])
+    assert bulk["results"]["34"]["stale"] is True
+    assert "6" in bulk["errors"]
+    with pytest.raises(Http200Error):
+        client.price_result("6")
+
+    strict = OpetApiClient(
+        transport=HttpTransport(retries=0), stale_if_error=False
+    )
+    strict.url = upstream.url
+    with pytest.raises(Http200Error):
+        strict.get_all_prices(["34"])
+
+
+def test_server_serves_stale_prices(upstream):
+    """Test stale 200 responses and 503 once nothing is known."""
+    client = AsyncOpetApiClient()
+    client.transport.retries = 0
+    client.transport.breaker = CircuitBreaker(failure_threshold=2)
+    client.url = upstream.url
+    client.cache.ttl = 0
+    app = FastAPI()
+    app.include_router(FuelController(OpetProvider(client)).router)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as http:
+            responses = {"fresh": await http.get("/fuel/prices/34")}
+            upstream.fail_status = 500
+            responses["stale"] = await http.get("/fuel/prices/34")
+            responses["failed"] = await http.get("/fuel/prices/6")
+            hits = dict(upstream.hits)
+            responses["open"] = await http.get("/fuel/prices/6")
+            responses["open_stale"] = await http.get("/fuel/prices/34")
+            responses["unknown"] = await http.get("/fuel/prices/99")
+            responses["last_update"] = await http.get("/fuel/last-update")
+            assert upstream.hits == hits
+            return responses
+
+    responses = asyncio.run(run())
+    fresh, stale = responses["fresh"], responses["stale"]
+    assert fresh.status_code == 200 and "X-Stale" not in fresh.headers
+    assert stale.status_code == 200
+    assert stale.headers["X-Stale"] == "true"
+    assert stale.json()["stale"] is True
+    assert stale.json()["prices"] == fresh.json()["prices"]
+    assert responses["failed"].status_code == 503
+    assert client.transport.breaker.state == "open"
+    assert responses["open"].status_code == 503
+    assert int(responses["open"].headers["Retry-After"]) > 0
+    assert responses["open_stale"].status_code == 200
+    assert responses["unknown"].status_code == 404
+    assert responses["last_update"].status_code == 503
+    assert int(responses["last_update"].headers["Retry-After"]) > 0
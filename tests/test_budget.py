@@ -0,0 +1,112 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from opet.async_api import AsyncOpetApiClient
+from opet.async_transport import AsyncHttpTransport
+from opet.budget import CallBudget, TokenBucket
+from opet.exceptions import BudgetExceededError
+from opet.server.admission import AdmissionMiddleware
+from opet.server.controllers.fuel import FuelController
+from opet.server.providers.opet import OpetProvider
+from opet.transport import HttpTransport
+from tests.stub_upstream import StubUpstream
+
+
+class FakeClock:
+    """Manually advanced clock for refill tests."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def upstream():
+    """Fixture for a local stub of the Opet API."""
+    with StubUpstream(product_count=2) as stub:
+        yield stub
+
+
+def test_token_bucket_refills():
+    """Test bursts, refusals with a wait time, and refilling."""
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+    assert [bucket.take() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.take() == 0.5
+    clock.now += 0.5
+    assert bucket.take() == 0.0
+    clock.now += 60
+    assert bucket.tokens == 3
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_call_budget_rejects():
+    """Test that a spent budget raises with the time to wait."""
+    clock = FakeClock()
+    budget = CallBudget(rate=1, clock=clock)
+    budget.check()
+    with pytest.raises(BudgetExceededError) as info:
+        budget.check()
+    assert info.value.retry_after == 1.0
+    assert budget.stats() == {
+        "rate": 1, "capacity": 1.0, "tokens": 0.0, "rejected": 1
+    }
+
+
+def test_transport_budget(upstream):
+    """Test that calls beyond the budget never reach the upstream."""
+    transport = HttpTransport(retries=0, max_calls_per_second=2)
+    url = f"{upstream.url}/lastupdate"
+    transport.get(url)
+    transport.get(url)
+    with pytest.raises(BudgetExceededError):
+        transport.get(url)
+    assert upstream.count("lastupdate") == 2
+    transport.close()
+
+
+def test_server_budget_and_admission(upstream):
+    """Test 429 per client, 503 at the cap and over the upstream budget."""
+    client = AsyncOpetApiClient(transport=AsyncHttpTransport(retries=0))
+    client.url = upstream.url
+    fuel = FastAPI()
+    fuel.include_router(FuelController(OpetProvider(client)).router)
+    clock = FakeClock()
+    app = AdmissionMiddleware(fuel, rate=3, clock=clock)
+    busy = AdmissionMiddleware(fuel, max_in_flight=1, retry_after=2)
+    busy.in_flight = 1
+
+    async def run():
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as http:
+            first = await http.get("/fuel/prices/34")
+            # /lastupdate takes the only token, /prices is refused
+            client.transport.budget = CallBudget(rate=1, clock=clock)
+            spent = await http.get("/fuel/prices/6")
+            await http.get("/fuel/prices/34")
+            limited = await http.get("/fuel/prices/34")
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=busy), base_url="http://test"
+        ) as http:
+            overloaded = await http.get("/fuel/prices/34")
+            exempt = await http.get("/fuel/changes/unknown")
+        return first, spent, limited, overloaded, exempt
+
+    first, spent, limited, overloaded, exempt = asyncio.run(run())
+    assert first.status_code == 200
+    assert spent.status_code == 503
+    assert int(spent.headers["Retry-After"]) >= 1
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "1"
+    assert overloaded.status_code == 503
+    assert overloaded.headers["Retry-After"] == "2"
+    assert overloaded.json() == {
+        "detail": "The server is busy; try again later."
+    }
+    assert exempt.status_code == 404
+    assert busy.in_flight == 1
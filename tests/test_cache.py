@@ -0,0 +1,72 @@
+from opet.cache import PriceCache
+
+
+class FakeClock:
+    """Manually advanced clock for TTL tests."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_result(last_update="2023-01-01T10:00:00"):
+    return {"province": "P", "lastUpdate": last_update, "prices": []}
+
+
+def test_hit_and_miss():
+    """Test that stored values are hits and unknown keys are misses."""
+    cache = PriceCache()
+    assert cache.get("34") is None
+    cache.put("34", make_result())
+    assert cache.get("34") == make_result()
+    assert cache.stats() == {
+        "hits": 1, "misses": 1, "evictions": 0, "revalidations": 0,
+        "size": 1
+    }
+
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first."""
+    cache = PriceCache(maxsize=2)
+    cache.put("1", make_result())
+    cache.put("2", make_result())
+    cache.get("1")
+    cache.put("3", make_result())
+    assert cache.get("2") is None
+    assert cache.get("1") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entry_revalidation():
+    """Test that revalidation renews entries with an unchanged lastUpdate."""
+    clock = FakeClock()
+    cache = PriceCache(ttl=10, clock=clock)
+    cache.put("1", make_result())
+    cache.put("2", make_result("old"))
+    clock.now = 11
+    assert cache.revalidation_due("1")
+    assert cache.get("1") is None
+    assert cache.revalidate("2023-01-01T10:00:00") == 1
+    assert not cache.revalidation_due("1")
+    assert cache.get("1") is not None
+    assert cache.get("2") is None
+
+
+def test_expired_entry_without_revalidation():
+    """Test that expired entries are dropped when revalidation is off."""
+    clock = FakeClock()
+    cache = PriceCache(ttl=10, revalidate=False, clock=clock)
+    cache.put("1", make_result())
+    clock.now = 10
+    assert not cache.revalidation_due("1")
+    assert cache.get("1") is None
+    assert len(cache) == 0
+
+
+def test_disabled_cache():
+    """Test that maxsize=0 stores nothing."""
+    cache = PriceCache(maxsize=0)
+    cache.put("1", make_result())
+    assert cache.get("1") is None
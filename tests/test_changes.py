@@ -0,0 +1,103 @@
+import asyncio
+import json
+from opet.async_api import AsyncOpetApiClient
+from opet.changes import diff_prices, diff_results
+from opet.server.controllers.changes import ChangesController
+from opet.server.feed import ChangeFeed
+from opet.server.refresher import SnapshotRefresher
+from tests.stub_upstream import StubUpstream
+
+
+def result(name, *prices):
+    return {
+        "province": name,
+        "lastUpdate": "2024-01-02T06:00:00",
+        "prices": [{"name": n, "amount": a} for n, a in prices]
+    }
+
+
+def test_diff_prices():
+    """Test that changed, added and removed products are listed."""
+    old = [{"name": "A", "amount": 1.0}, {"name": "B", "amount": 2.0},
+           {"name": "C", "amount": 3.0}]
+    new = [{"name": "A", "amount": 1.0}, {"name": "B", "amount": 2.5},
+           {"name": "D", "amount": 4.0}]
+    assert diff_prices(old, new) == [
+        {"product": "B", "old": 2.0, "new": 2.5},
+        {"product": "D", "old": None, "new": 4.0},
+        {"product": "C", "old": 3.0, "new": None}
+    ]
+
+
+def test_diff_results():
+    """Test that only provinces with changed prices are reported."""
+    same = result("IL 6", ("A", 1.0))
+    old = {"6": same, "34": result("IL 34", ("A", 1.0))}
+    new = {
+        "6": same,
+        "34": result("IL 34", ("A", 1.5)),
+        "35": result("IL 35", ("A", 1.0))
+    }
+    changes = diff_results(old, new)
+    assert [change["code"] for change in changes] == ["34", "35"]
+    assert changes[0] == {
+        "code": "34",
+        "province": "IL 34",
+        "lastUpdate": "2024-01-02T06:00:00",
+        "changes": [{"product": "A", "old": 1.0, "new": 1.5}]
+    }
+
+
+def test_feed_pushes_filtered_changes():
+    """Test that one refresher poll feeds every filtered subscriber."""
+    with StubUpstream(product_count=2) as upstream:
+        client = AsyncOpetApiClient()
+        client.url = upstream.url
+        refresher = SnapshotRefresher(client, poll_interval=60)
+        feed = ChangeFeed(refresher)
+        controller = ChangesController(feed)
+
+        async def run():
+            await refresher.refresh_once()
+            everything = controller.stream()
+            diesel = controller.stream(["034", "6"], ["product 1"])
+            assert (await everything.__anext__()).startswith("retry:")
+            assert (await diesel.__anext__()).startswith("retry:")
+            assert len(feed) == 2
+
+            upstream.products[1]["amount"] = 50.0
+            upstream.last_update = "2024-01-02T06:00:00"
+            await refresher.refresh_once()
+
+            first = await everything.__anext__()
+            chunk = await diesel.__anext__()
+            await everything.aclose()
+            await diesel.aclose()
+            return first, chunk
+
+        first, chunk = asyncio.run(run())
+        assert first.startswith("event: price-change\n")
+        lines = chunk.splitlines()
+        assert lines[1] == "id: 2024-01-02T06:00:00"
+        event = json.loads(lines[2][len("data: "):])
+        assert event["code"] in ("34", "6")
+        assert event["changes"] == [
+            {"product": "Product 1", "old": 41.5, "new": 50.0}
+        ]
+        assert len(feed) == 0
+
+
+def test_slow_subscriber_overflows():
+    """Test that a subscriber that falls behind is disconnected."""
+    client = AsyncOpetApiClient()
+    feed = ChangeFeed(SnapshotRefresher(client), queue_size=1)
+
+    async def run():
+        subscription = feed.subscribe()
+        event = {"code": "34", "province": "IL 34",
+                 "lastUpdate": "x", "changes": []}
+        subscription.offer(event)
+        subscription.offer(event)
+        return subscription
+
+    assert asyncio.run(run()).overflowed
@@ -0,0 +1,52 @@
+from datetime import datetime, timezone
+from opet.server.conditional import (
+    gzip_etag,
+    http_date,
+    is_not_modified,
+    make_etag,
+    parse_last_update
+)
+
+
+def test_parse_last_update_assumes_turkey_time():
+    """Test that naive lastUpdateDate values are read as UTC+3."""
+    value = parse_last_update("2024-01-01T06:00:00.123")
+    assert value == datetime(2024, 1, 1, 3, 0, tzinfo=timezone.utc)
+    assert http_date(value) == "Mon, 01 Jan 2024 03:00:00 GMT"
+    assert parse_last_update("not a date") is None
+
+
+def test_if_none_match():
+    """Test strong, weak, listed and wildcard ETag matches."""
+    etag = make_etag(b"body")
+    assert is_not_modified({"if-none-match": etag}, etag, None)
+    assert is_not_modified({"if-none-match": "W/" + etag}, etag, None)
+    assert is_not_modified({"if-none-match": f'"x", {etag}'}, etag, None)
+    assert is_not_modified({"if-none-match": "*"}, etag, None)
+    assert not is_not_modified({"if-none-match": '"x"'}, etag, None)
+
+
+def test_gzip_etag_matches_identity():
+    """Test that the ETag of a gzipped body revalidates the content."""
+    etag = make_etag(b"body")
+    assert gzip_etag(etag) == etag[:-1] + '-gzip"'
+    assert is_not_modified({"if-none-match": gzip_etag(etag)}, etag, None)
+    assert is_not_modified(
+        {"if-none-match": "W/" + gzip_etag(etag)}, etag, None
+    )
+
+
+def test_if_modified_since():
+    """Test If-Modified-Since and its precedence rules."""
+    modified = parse_last_update("2024-01-01T06:00:00")
+    same = http_date(modified)
+    assert is_not_modified({"if-modified-since": same}, '"e"', modified)
+    assert not is_not_modified(
+        {"if-modified-since": "Sun, 31 Dec 2023 00:00:00 GMT"},
+        '"e"',
+        modified
+    )
+    assert not is_not_modified(
+        {"if-modified-since": same, "if-none-match": '"x"'}, '"e"', modified
+    )
+    assert not is_not_modified({"if-modified-since": "bad"}, '"e"', modified)
@@ -0,0 +1,94 @@
+import asyncio
+import csv
+import io
+import json
+import pytest
+from opet.api import OpetApiClient
+from opet.async_api import AsyncOpetApiClient
+from opet.exceptions import Http200Error
+from opet.export import csv_header, csv_rows, ndjson_rows
+from tests.stub_upstream import StubUpstream
+
+RESULT = {
+    "province": "İstanbul",
+    "lastUpdate": "2024-01-01T06:00:00",
+    "prices": [
+        {"name": "Benzin, Kurşunsuz", "amount": 40.5},
+        {"name": "Motorin", "amount": 41.0}
+    ]
+}
+
+
+@pytest.fixture
+def upstream():
+    """Fixture for a stub upstream where province 35 always fails."""
+    with StubUpstream(product_count=2) as stub:
+        respond = stub.respond
+
+        def failing(endpoint, query):
+            if query.get("ProvinceCode") == ["35"]:
+                return None
+            return respond(endpoint, query)
+
+        stub.respond = failing
+        yield stub
+
+
+def test_ndjson_rows():
+    """Test that every price becomes one JSON line."""
+    lines = ndjson_rows("34", RESULT).splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"province": "34", "product": "Benzin, Kurşunsuz", "amount": 40.5,
+         "lastUpdate": "2024-01-01T06:00:00"},
+        {"province": "34", "product": "Motorin", "amount": 41.0,
+         "lastUpdate": "2024-01-01T06:00:00"}
+    ]
+    assert json.loads(ndjson_rows("35", Http200Error("boom"))) == {
+        "province": "35", "error": "boom"
+    }
+
+
+def test_csv_rows():
+    """Test that CSV rows are quoted and failures are left out."""
+    text = csv_header() + csv_rows("34", RESULT)
+    assert list(csv.DictReader(io.StringIO(text))) == [
+        {"province": "34", "product": "Benzin, Kurşunsuz", "amount": "40.5",
+         "lastUpdate": "2024-01-01T06:00:00"},
+        {"province": "34", "product": "Motorin", "amount": "41.0",
+         "lastUpdate": "2024-01-01T06:00:00"}
+    ]
+    assert csv_rows("35", Http200Error("boom")) == ""
+
+
+def test_iter_all_prices(upstream):
+    """Test that the sync iterator yields every province once."""
+    client = OpetApiClient()
+    client.url = upstream.url
+    client.price_result("6")
+
+    outcomes = dict(client.iter_all_prices(["6", "34", "35", "99"]))
+
+    assert set(outcomes) == {"6", "34", "35", "99"}
+    assert outcomes["34"]["province"] == "IL 34"
+    assert isinstance(outcomes["35"], Http200Error)
+    assert "99" in str(outcomes["99"])
+    assert upstream.count("prices") == 3
+    assert client.cache.get("34") == outcomes["34"]
+
+
+def test_async_iter_all_prices(upstream):
+    """Test that the async iterator yields every province once."""
+    client = AsyncOpetApiClient()
+    client.url = upstream.url
+
+    async def collect():
+        return {
+            code: outcome
+            async for code, outcome in client.iter_all_prices()
+        }
+
+    outcomes = asyncio.run(collect())
+
+    assert len(outcomes) == 81
+    assert isinstance(outcomes["35"], Http200Error)
+    assert outcomes["81"]["prices"][0]["name"] == "Product 0"
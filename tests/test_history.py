@@ -0,0 +1,107 @@
+import asyncio
+import pytest
+import threading
+from opet.api import OpetApiClient
+from opet.async_api import AsyncOpetApiClient
+from opet.history import PriceHistory
+from tests.stub_upstream import StubUpstream
+
+
+def make_result(last_update, *amounts):
+    """Builds a price result with one product per amount."""
+    return {
+        "province": "İstanbul",
+        "lastUpdate": last_update,
+        "prices": [
+            {"name": f"Product {i}", "amount": amount}
+            for i, amount in enumerate(amounts)
+        ]
+    }
+
+
+@pytest.fixture
+def history(tmp_path):
+    """Fixture for a price history in a temporary directory."""
+    with PriceHistory(str(tmp_path / "history.sqlite3")) as store:
+        yield store
+
+
+def test_record_stores_only_changes(history):
+    """Test that unchanged snapshots and prices are not stored again."""
+    assert history.record("34", make_result("2024-01-01T06:00", 40, 41)) == 2
+    assert history.record("34", make_result("2024-01-01T06:00", 40, 41)) == 0
+    assert history.record("34", make_result("2024-01-02T06:00", 40, 41)) == 0
+    assert history.record("34", make_result("2024-01-03T06:00", 42, 41)) == 1
+
+    assert history.query("34") == [
+        {"province": "34", "product": "Product 0", "amount": 40,
+         "lastUpdate": "2024-01-01T06:00"},
+        {"province": "34", "product": "Product 1", "amount": 41,
+         "lastUpdate": "2024-01-01T06:00"},
+        {"province": "34", "product": "Product 0", "amount": 42,
+         "lastUpdate": "2024-01-03T06:00"}
+    ]
+
+
+def test_query_filters(history):
+    """Test product, time range and limit filters."""
+    for day, amount in ((1, 40), (2, 41), (3, 42), (4, 43)):
+        history.record_many({
+            "34": make_result(f"2024-01-0{day}T06:00:00", amount),
+            "6": make_result(f"2024-01-0{day}T06:00:00", amount + 10)
+        })
+
+    def amounts(**kwargs):
+        return [r["amount"] for r in history.query("34", **kwargs)]
+
+    assert amounts() == [40, 41, 42, 43]
+    assert amounts(since="2024-01-02", until="2024-01-03") == [41, 42]
+    assert amounts(until="2024-01-02T00:00:00") == [40]
+    assert amounts(limit=2) == [42, 43]
+    assert amounts(product="Product 0") == [40, 41, 42, 43]
+    assert amounts(product="Missing") == []
+    assert history.query("7") == []
+
+
+def test_history_persists(tmp_path):
+    """Test that the history survives reopening the database."""
+    path = str(tmp_path / "nested" / "history.sqlite3")
+    with PriceHistory(path) as store:
+        store.record("34", make_result("2024-01-01T06:00:00", 40))
+    with PriceHistory(path) as store:
+        assert store.record("34", make_result("2024-01-02T06:00:00", 40)) == 0
+        assert len(store.query("34")) == 1
+
+
+def test_clients_feed_history(history):
+    """Test that both clients record the prices they fetch."""
+    with StubUpstream(product_count=2) as upstream:
+        client = OpetApiClient(history=history)
+        client.url = upstream.url
+        client.price_result("034")
+        client.price_result("34")
+        assert len(history.query("34")) == 2
+
+        async_client = AsyncOpetApiClient(history=history)
+        async_client.url = upstream.url
+        asyncio.run(async_client.get_all_prices(["6", "35"]))
+        assert len(history.query("6")) == 2
+        assert len(history.query("35")) == 2
+
+
+def test_async_client_writes_off_the_event_loop(history, mocker):
+    """Test that the async client records history in a worker thread."""
+    threads = []
+    record_many = history.record_many
+
+    def spy(results):
+        threads.append(threading.get_ident())
+        return record_many(results)
+
+    mocker.patch.object(history, "record_many", side_effect=spy)
+    with StubUpstream(product_count=1) as upstream:
+        client = AsyncOpetApiClient(history=history)
+        client.url = upstream.url
+        asyncio.run(client.price_result("34"))
+    assert threads and threading.get_ident() not in threads
+    assert len(history.query("34")) == 1
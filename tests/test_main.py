@@ -1,7 +1,10 @@
+import json
+import os
 import pytest
 from click.testing import CliRunner
 from opet.main import cli
 from opet.exceptions import ProvinceNotFoundError
+from tests.stub_upstream import StubUpstream
 
 
 @pytest.fixture
@@ -12,7 +15,7 @@ def runner():
 
 def test_cli_success(runner, mocker):
     """Test successful CLI execution."""
-    mock_client = mocker.patch('opet.main.OpetApiClient')
+    mock_client = mocker.patch('opet.api.OpetApiClient')
     mock_instance = mock_client.return_value
     mock_instance.price.return_value = '{"results": {"test": "data"}}'
 
@@ -27,7 +30,7 @@ def test_cli_success(runner, mocker):
 
 def test_cli_province_not_found(runner, mocker):
     """Test CLI behavior when province is not found."""
-    mock_client = mocker.patch('opet.main.OpetApiClient')
+    mock_client = mocker.patch('opet.api.OpetApiClient')
     mock_instance = mock_client.return_value
     mock_instance.price.side_effect = ProvinceNotFoundError(
         "Sistemde 99 plaka koduna ait bir il bulunamadı."
@@ -42,7 +45,7 @@ def test_cli_province_not_found(runner, mocker):
 
 def test_cli_general_exception(runner, mocker):
     """Test CLI behavior when an unexpected error occurs."""
-    mock_client = mocker.patch('opet.main.OpetApiClient')
+    mock_client = mocker.patch('opet.api.OpetApiClient')
     mock_instance = mock_client.return_value
     mock_instance.price.side_effect = Exception("Unexpected error")
 
@@ -50,3 +53,123 @@ def test_cli_general_exception(runner, mocker):
 
     assert result.exit_code == 1
     assert "An unexpected error occurred: Unexpected error" in result.output
+
+
+def test_cli_all_provinces(runner, mocker):
+    """Test fetching every province with --all."""
+    mock_client = mocker.patch('opet.api.OpetApiClient')
+    mock_instance = mock_client.return_value
+    mock_instance.get_all_prices.return_value = {
+        "lastUpdate": "2023-01-01T10:00:00", "results": {}, "errors": {}
+    }
+
+    result = runner.invoke(cli, ['--all', '--concurrency', '4'])
+
+    assert result.exit_code == 0
+    assert '"lastUpdate": "2023-01-01T10:00:00"' in result.output
+    mock_instance.get_all_prices.assert_called_once_with(max_concurrency=4)
+
+
+def test_cli_record_and_history(runner, mocker, tmp_path):
+    """Test that --record stores prices and --history reads them back."""
+    db = str(tmp_path / "history.sqlite3")
+    mock_client = mocker.patch('opet.api.OpetApiClient')
+
+    def price(province_id):
+        mock_client.call_args.kwargs["history"].record("34", {
+            "province": "İstanbul",
+            "lastUpdate": "2024-01-01T06:00:00",
+            "prices": [{"name": "Benzin", "amount": 40.0}]
+        })
+        return "{}"
+
+    mock_client.return_value.price.side_effect = price
+
+    result = runner.invoke(cli, ['--il', '34', '--record', '--history-db', db])
+    assert result.exit_code == 0
+
+    result = runner.invoke(
+        cli, ['--il', '034', '--history', '--since', '2024-01-01',
+              '--history-db', db]
+    )
+    assert result.exit_code == 0
+    assert '"amount": 40.0' in result.output
+    assert '"province": "34"' in result.output
+
+
+def test_cli_history_requires_province(runner):
+    """Test that --history without --il fails."""
+    result = runner.invoke(cli, ['--history'])
+
+    assert result.exit_code == 1
+    assert "--history requires --il" in result.output
+
+
+def test_cli_export(runner, monkeypatch):
+    """Test that --export streams CSV rows for every province."""
+    with StubUpstream(product_count=2) as upstream:
+        monkeypatch.setenv("OPET_API_URL", upstream.url)
+        result = runner.invoke(cli, ['--export', 'csv'])
+
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    assert lines[0] == "province,product,amount,lastUpdate"
+    assert len(lines) == 1 + 81 * 2
+
+
+def test_cli_api_workers(runner, mocker, monkeypatch, tmp_path):
+    """Test that --workers starts uvicorn with a shared snapshot file."""
+    monkeypatch.setenv("OPET_SHARED_SNAPSHOT", "")
+    monkeypatch.setenv("OPET_CACHE_DIR", str(tmp_path))
+    run = mocker.patch("uvicorn.run")
+
+    result = runner.invoke(
+        cli, ["--api", "--workers", "4", "--host", "127.0.0.1",
+              "--port", "9000"]
+    )
+
+    assert result.exit_code == 0
+    run.assert_called_once_with(
+        "opet.server.app:app", host="127.0.0.1", port=9000, workers=4,
+        reload=False
+    )
+    assert os.environ["OPET_SHARED_SNAPSHOT"] == str(
+        tmp_path / "snapshot.sqlite3"
+    )
+
+
+def test_cli_snapshot_and_offline(runner, monkeypatch, tmp_path):
+    """Test that a saved snapshot answers --il and --all offline."""
+    path = str(tmp_path / "prices.snapshot")
+    with StubUpstream(product_count=2) as upstream:
+        monkeypatch.setenv("OPET_API_URL", upstream.url)
+        monkeypatch.setenv("OPET_CACHE_DIR", str(tmp_path))
+        saved = runner.invoke(cli, ["snapshot", "--output", path])
+        hits = dict(upstream.hits)
+        result = runner.invoke(cli, ["--snapshot", path, "--il", "034"])
+        everything = runner.invoke(cli, ["--snapshot", path, "--all"])
+        assert dict(upstream.hits) == hits
+
+    assert saved.exit_code == 0
+    assert "81 provinces" in saved.output
+    assert result.exit_code == 0
+    body = json.loads(result.output)
+    assert body["results"]["province"] == "IL 34"
+    assert body["snapshot"]["lastUpdate"] == upstream.last_update
+    assert body["snapshot"]["age"] >= 0
+    assert everything.exit_code == 0
+    bulk = json.loads(everything.output)
+    assert len(bulk["results"]) == 81
+    assert bulk["snapshot"] == {
+        "createdAt": body["snapshot"]["createdAt"],
+        "age": bulk["snapshot"]["age"],
+        "lastUpdate": upstream.last_update
+    }
+
+
+def test_cli_offline_rejects_export(runner, tmp_path):
+    """Test that --offline cannot be combined with --export."""
+    result = runner.invoke(cli, ["--offline", "--export", "csv"])
+
+    assert result.exit_code == 1
+    assert "--offline only works with --il and --all" in result.output
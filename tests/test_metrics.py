@@ -0,0 +1,148 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+from opet.api import OpetApiClient
+from opet.async_api import AsyncOpetApiClient
+from opet.exceptions import Http200Error, ProvinceNotFoundError
+from opet.metrics import ERRORS, UPSTREAM_SECONDS, MetricsRegistry
+from opet.server.controllers.fuel import FuelController
+from opet.server.controllers.metrics import MetricsController
+from opet.server.metrics import REQUEST_SECONDS, MetricsMiddleware
+from opet.server.providers.opet import OpetProvider
+from tests.stub_upstream import StubUpstream
+
+
+@pytest.fixture
+def registry():
+    """Fixture for an empty metrics registry."""
+    return MetricsRegistry()
+
+
+def test_render_prometheus_text(registry):
+    """Test the exposition format of every metric type."""
+    registry.counter("c_total", "A counter.", ("kind",)).inc(kind='a"b')
+    registry.gauge("g", "A gauge.").set(0.5)
+    histogram = registry.histogram("h_seconds", "A histogram.", (),
+                                   buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(3)
+
+    assert registry.render() == (
+        "# HELP c_total A counter.\n"
+        "# TYPE c_total counter\n"
+        'c_total{kind="a\\"b"} 1\n'
+        "# HELP g A gauge.\n"
+        "# TYPE g gauge\n"
+        "g 0.5\n"
+        "# HELP h_seconds A histogram.\n"
+        "# TYPE h_seconds histogram\n"
+        'h_seconds_bucket{le="0.1"} 1\n'
+        'h_seconds_bucket{le="1"} 2\n'
+        'h_seconds_bucket{le="+Inf"} 3\n'
+        "h_seconds_sum 3.55\n"
+        "h_seconds_count 3\n"
+    )
+
+
+def test_labels_and_types_are_checked(registry):
+    """Test that wrong labels and conflicting types are rejected."""
+    counter = registry.counter("c_total", "A counter.", ("kind",))
+    assert registry.counter("c_total", "A counter.", ("kind",)) is counter
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+    with pytest.raises(ValueError):
+        registry.gauge("c_total", "A gauge.")
+
+
+def test_hooks(registry):
+    """Test that hooks see every observation and cannot break it."""
+    seen = []
+
+    def broken(name, labels, value):
+        raise RuntimeError("hook failed")
+
+    registry.add_hook(broken)
+    registry.add_hook(lambda *args: seen.append(args))
+    histogram = registry.histogram("h_seconds", "A histogram.", ("route",))
+    with histogram.time(route="/x"):
+        pass
+    registry.remove_hook(broken)
+    registry.counter("c_total", "A counter.").inc(2)
+
+    assert seen[0][:2] == ("h_seconds", {"route": "/x"})
+    assert seen[1] == ("c_total", {}, 2)
+    assert histogram.count(route="/x") == 1
+
+
+def test_client_records_upstream_calls_and_errors():
+    """Test upstream latency and error counters of both clients."""
+    prices = UPSTREAM_SECONDS.count(endpoint="prices")
+    http_errors = ERRORS.value(type="Http200Error")
+    not_found = ERRORS.value(type="ProvinceNotFoundError")
+    with StubUpstream(product_count=1) as upstream:
+        client = OpetApiClient()
+        client.url = upstream.url
+        client.price_result("34")
+        with pytest.raises(ProvinceNotFoundError):
+            client.price_result("99")
+        upstream.fail_status = 500
+        async_client = AsyncOpetApiClient()
+        async_client.transport.retries = 0
+        async_client.url = upstream.url
+        with pytest.raises(Http200Error):
+            asyncio.run(async_client.get_price("6"))
+
+    assert UPSTREAM_SECONDS.count(endpoint="prices") == prices + 2
+    assert ERRORS.value(type="Http200Error") == http_errors + 1
+    assert ERRORS.value(type="ProvinceNotFoundError") == not_found + 1
+
+
+def test_metrics_endpoint():
+    """Test that /metrics reports latency, cache and transport counters."""
+    with StubUpstream(product_count=1) as upstream:
+        client = AsyncOpetApiClient()
+        client.url = upstream.url
+        provider = OpetProvider(client)
+        app = FastAPI()
+        app.add_middleware(MetricsMiddleware)
+        app.include_router(FuelController(provider).router)
+        app.include_router(MetricsController(provider).router)
+        labels = {"route": "/fuel/prices/{province_id}", "method": "GET"}
+        ok = REQUEST_SECONDS.count(status="200", **labels)
+        missing = REQUEST_SECONDS.count(status="404", **labels)
+
+        async def run():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as http:
+                await http.get("/fuel/prices/34")
+                await http.get("/fuel/prices/34")
+                await http.get("/fuel/prices/99")
+                return await http.get("/metrics")
+
+        response = asyncio.run(run())
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert REQUEST_SECONDS.count(status="200", **labels) == ok + 2
+    assert REQUEST_SECONDS.count(status="404", **labels) == missing + 1
+    body = response.text
+    assert "# TYPE opet_http_request_seconds histogram" in body
+    assert 'opet_upstream_request_seconds_count{endpoint="prices"}' in body
+    assert 'opet_cache{cache="prices",stat="hits"} 1' in body
+    assert 'opet_cache{cache="prices",stat="hit_ratio"} 0.5' in body
+    transport = {
+        line.split('"')[1]: float(line.split()[-1])
+        for line in body.splitlines() if line.startswith("opet_transport{")
+    }
+    assert transport["connections_opened"] >= 1
+    assert transport["requests"] == (
+        transport["connections_opened"] + transport["connections_reused"]
+    )
+    assert transport["coalesced"] == 0
+    assert 'opet_circuit_breaker_state{state="closed"} 1' in body
+    assert 'opet_circuit_breaker_state{state="open"} 0' in body
+    assert 'opet_circuit_breaker{stat="opened"} 0' in body
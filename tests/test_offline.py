@@ -0,0 +1,88 @@
+import pytest
+from opet.exceptions import ProvinceNotFoundError, SnapshotError
+from opet.offline import OfflineOpetApiClient, SnapshotFile, write_snapshot
+
+
+def result(name, *prices):
+    return {
+        "province": name,
+        "lastUpdate": "2024-01-02T06:00:00",
+        "prices": [{"name": n, "amount": a} for n, a in prices]
+    }
+
+
+BULK = {
+    "lastUpdate": "2024-01-02T06:00:00",
+    "results": {
+        "34": result("İstanbul", ("Motorin", 40.5), ("Benzin", 42.0)),
+        "6": result("Ankara", ("Motorin", 41.0)),
+        "81": result("Düzce", ("Benzin", 43.25))
+    },
+    "errors": {"35": "timeout"}
+}
+PROVINCES = [
+    {"code": "6", "name": "Ankara"},
+    {"code": "34", "name": "İstanbul"},
+    {"code": "35", "name": "İzmir"},
+    {"code": "81", "name": "Düzce"}
+]
+
+
+@pytest.fixture
+def path(tmp_path):
+    """Fixture for a snapshot file written from `BULK`."""
+    path = str(tmp_path / "prices.snapshot")
+    assert write_snapshot(path, BULK, PROVINCES, created_at=1000.0) == 3
+    return path
+
+
+def test_snapshot_file_lookups(path):
+    """Test index lookups and metadata of a snapshot file."""
+    with SnapshotFile(path) as snapshot:
+        assert len(snapshot) == 3
+        assert snapshot.codes() == ["34", "6", "81"]
+        assert snapshot.get("034") == BULK["results"]["34"]
+        assert snapshot.get("81") == BULK["results"]["81"]
+        assert snapshot.get("35") is None
+        assert snapshot.get("İzmir") is None
+        assert "6" in snapshot and "7" not in snapshot
+        assert snapshot.last_update == "2024-01-02T06:00:00"
+        assert snapshot.provinces == PROVINCES
+        assert snapshot.age(now=1090.0) == 90.0
+
+
+def test_invalid_snapshot(tmp_path):
+    """Test that missing and foreign files are rejected."""
+    with pytest.raises(SnapshotError):
+        SnapshotFile(str(tmp_path / "missing"))
+    other = tmp_path / "other"
+    other.write_bytes(b"not a snapshot at all, just some bytes")
+    with pytest.raises(SnapshotError):
+        SnapshotFile(str(other))
+
+
+def test_offline_client(path):
+    """Test that the offline client answers like the online one."""
+    with OfflineOpetApiClient(path, clock=lambda: 1065.0) as client:
+        assert client.get_last_update() == {
+            "lastUpdateDate": "2024-01-02T06:00:00"
+        }
+        assert client.get_price("34", "benzin") == [
+            {"name": "Benzin", "amount": 42.0}
+        ]
+        assert client.price_result("6", fields=["prices"]) == {
+            "prices": [{"name": "Motorin", "amount": 41.0}]
+        }
+        assert client.snapshot_info() == {
+            "createdAt": "1970-01-01T00:16:40Z",
+            "age": 65,
+            "lastUpdate": "2024-01-02T06:00:00"
+        }
+        assert '"age": 65' in client.price("81")
+        with pytest.raises(SnapshotError):
+            client.price("35")
+        with pytest.raises(ProvinceNotFoundError):
+            client.price("99")
+        bulk = client.get_all_prices(["6", "35", "99"])
+        assert list(bulk["results"]) == ["6"]
+        assert set(bulk["errors"]) == {"35", "99"}
@@ -0,0 +1,141 @@
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi import FastAPI
+from opet.exceptions import ProvinceNotFoundError
+from opet.server.controllers.fuel import FuelController
+from opet.server.providers.base import PriceProvider
+from opet.server.providers.registry import (
+    ProviderRegistry,
+    VendorTimeoutError
+)
+
+
+class StubProvider(PriceProvider):
+    """Local vendor answering after `delay` seconds."""
+
+    def __init__(self, name, prices, delay=0.0, error=None):
+        self.name = name
+        self.prices = prices
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def get_prices(self, province_id):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {
+            "province": f"IL {province_id}",
+            "lastUpdate": "2024-01-01T06:00:00",
+            "prices": [
+                {"name": name, "amount": amount}
+                for name, amount in self.prices
+            ]
+        }
+
+
+def make_registry(*providers, timeout=1.0):
+    registry = ProviderRegistry(default_timeout=timeout)
+    for provider in providers:
+        registry.register(provider)
+    return registry
+
+
+def test_register():
+    """Test that vendors are registered once, by name."""
+    registry = make_registry(StubProvider("a", []), StubProvider("b", []))
+    assert registry.names() == ["a", "b"]
+    assert "a" in registry and len(registry) == 2
+    with pytest.raises(ValueError):
+        registry.register(StubProvider("a", []))
+    registry.unregister("a")
+    assert registry.names() == ["b"]
+
+
+def test_incomplete_provider_cannot_be_created():
+    """Test that a vendor without get_prices fails when it is created."""
+    class Incomplete(PriceProvider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_slow_vendor_does_not_hold_up_the_rest():
+    """Test that vendors run concurrently, each with its own timeout."""
+    fast = StubProvider("fast", [("Motorin", 44.0)], delay=0.05)
+    also_fast = StubProvider("also_fast", [("Motorin", 43.0)], delay=0.05)
+    slow = StubProvider("slow", [("Motorin", 42.0)], delay=5.0)
+    registry = make_registry(fast, also_fast)
+    registry.register(slow, timeout=0.2)
+
+    start = time.perf_counter()
+    results, errors = asyncio.run(registry.get_prices("34"))
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 1.0
+    assert list(results) == ["fast", "also_fast"]
+    assert isinstance(errors["slow"], VendorTimeoutError)
+
+
+def request(app, path):
+    async def get():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await client.get(path)
+    return asyncio.run(get())
+
+
+def make_app(registry):
+    app = FastAPI()
+    controller = FuelController(registry.get(registry.names()[0]),
+                                registry=registry)
+    app.include_router(controller.router)
+    return app
+
+
+def test_compare_endpoint():
+    """Test that vendor results are merged with attribution."""
+    registry = make_registry(
+        StubProvider("a", [("Motorin", 44.0), ("Benzin", 42.0)]),
+        StubProvider("b", [("Motorin", 43.5)]),
+        StubProvider("c", [], error=RuntimeError("down"))
+    )
+    app = make_app(registry)
+    assert request(app, "/fuel/vendors").json() == ["a", "b", "c"]
+
+    response = request(app, "/fuel/compare/034?fuel_type=motorin")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["province"] == "34"
+    assert set(body["results"]) == {"a", "b"}
+    assert body["results"]["a"]["prices"] == [
+        {"name": "Motorin", "amount": 44.0}
+    ]
+    assert body["prices"] == [
+        {"vendor": "b", "name": "Motorin", "amount": 43.5},
+        {"vendor": "a", "name": "Motorin", "amount": 44.0}
+    ]
+    assert body["errors"] == {"c": "down"}
+
+
+def test_compare_endpoint_errors():
+    """Test 404 when no vendor knows the province and 503 when all fail."""
+    missing = make_registry(
+        StubProvider("a", [], error=ProvinceNotFoundError("yok"))
+    )
+    assert request(make_app(missing), "/fuel/compare/99").status_code == 404
+    down = make_registry(
+        StubProvider("a", [], error=ProvinceNotFoundError("yok")),
+        StubProvider("b", [], delay=1.0)
+    )
+    down.register(StubProvider("c", [], delay=1.0), timeout=0.05)
+    down.unregister("b")
+    response = request(make_app(down), "/fuel/compare/34")
+    assert response.status_code == 503
+    assert "c:" in response.json()["detail"]
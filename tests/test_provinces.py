@@ -0,0 +1,51 @@
+from opet.provinces import FALLBACK_PROVINCES, ProvinceCatalog
+
+
+def test_fallback_has_all_plate_codes(tmp_path):
+    """Test that the bundled list covers plate codes 1 to 81."""
+    catalog = ProvinceCatalog(path=str(tmp_path / "missing.json"))
+    assert len(FALLBACK_PROVINCES) == 81
+    assert set(catalog.map) == {str(code) for code in range(1, 82)}
+    assert catalog.source == "fallback"
+    assert catalog.needs_refresh()
+
+
+def test_corrupt_snapshot_uses_fallback(tmp_path):
+    """Test that an unreadable snapshot is ignored."""
+    path = tmp_path / "provinces.json"
+    path.write_text("not json", encoding="utf-8")
+    catalog = ProvinceCatalog(path=str(path))
+    assert catalog.map["6"] == "Ankara"
+    assert catalog.source == "fallback"
+
+
+def test_snapshot_refresh_policy(tmp_path):
+    """Test that a snapshot older than max_age needs a refresh."""
+    now = [1000.0]
+    path = str(tmp_path / "provinces.json")
+    ProvinceCatalog(path=path, clock=lambda: now[0]).update(
+        [{"code": 34, "name": "İstanbul"}]
+    )
+    catalog = ProvinceCatalog(path=path, max_age=60, clock=lambda: now[0])
+    assert catalog.map == {"34": "İstanbul"}
+    assert catalog.source == "snapshot"
+    assert not catalog.needs_refresh()
+    now[0] += 61
+    assert catalog.needs_refresh()
+    catalog.refresh_failed()
+    assert not catalog.needs_refresh()
+    now[0] += catalog.retry_delay
+    assert catalog.needs_refresh()
+
+
+def test_catalog_refreshes_again_after_max_age(tmp_path):
+    """Test that a successful refresh does not stop later ones."""
+    now = [1000.0]
+    catalog = ProvinceCatalog(
+        path=str(tmp_path / "provinces.json"), max_age=60,
+        clock=lambda: now[0]
+    )
+    catalog.update([{"code": 34, "name": "İstanbul"}])
+    assert not catalog.needs_refresh()
+    now[0] += 61
+    assert catalog.needs_refresh()
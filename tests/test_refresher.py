@@ -0,0 +1,111 @@
+import asyncio
+from opet.async_api import AsyncOpetApiClient
+from opet.server.refresher import SnapshotRefresher
+from tests.stub_upstream import StubUpstream
+
+
+class FakeClock:
+    """Manually advanced clock for staleness tests."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_refresher(upstream, clock):
+    client = AsyncOpetApiClient()
+    client.url = upstream.url
+    return SnapshotRefresher(client, poll_interval=10, clock=clock)
+
+
+def test_refresh_only_when_last_update_changes():
+    """Test that prices are refreshed only after lastUpdate changes."""
+    clock = FakeClock()
+    with StubUpstream(product_count=2) as upstream:
+        refresher = make_refresher(upstream, clock)
+        assert refresher.is_stale()
+        assert asyncio.run(refresher.refresh_once())
+        assert upstream.count("prices") == 81
+        assert upstream.count("lastupdate") == 1
+        assert len(refresher.snapshot.results) == 81
+        assert refresher.snapshot.get("034")["province"] == "IL 34"
+
+        assert not asyncio.run(refresher.refresh_once())
+        assert upstream.count("prices") == 81
+
+        upstream.last_update = "2024-01-02T06:00:00"
+        assert asyncio.run(refresher.refresh_once())
+        assert upstream.count("prices") == 162
+        assert upstream.count("lastupdate") == 3
+        assert refresher.snapshot.last_update == "2024-01-02T06:00:00"
+
+
+def test_staleness():
+    """Test that a snapshot not confirmed for stale_after is stale."""
+    clock = FakeClock()
+    with StubUpstream(product_count=1) as upstream:
+        refresher = make_refresher(upstream, clock)
+        asyncio.run(refresher.refresh_once())
+        clock.now += 20
+        assert refresher.age() == 20
+        assert not refresher.is_stale()
+        clock.now += 11
+        assert refresher.is_stale()
+        asyncio.run(refresher.refresh_once())
+        assert refresher.age() == 0
+
+
+def test_run_survives_upstream_errors():
+    """Test that the background task keeps the snapshot on failures."""
+    with StubUpstream(product_count=1) as upstream:
+        refresher = make_refresher(upstream, FakeClock())
+        refresher.poll_interval = 0.01
+        refresher.client.transport.retries = 0
+
+        async def run():
+            await refresher.refresh_once()
+            upstream.fail_status = 500
+            refresher.start()
+            await asyncio.sleep(0.1)
+            await refresher.stop()
+
+        asyncio.run(run())
+        assert upstream.count("lastupdate") > 2
+        assert len(refresher.snapshot.results) == 81
+
+
+def test_failed_provinces_are_retried_and_marked_stale():
+    """Test that provinces missed by a refresh are retried on later ticks."""
+    clock = FakeClock()
+    with StubUpstream(product_count=1) as upstream:
+        refresher = make_refresher(upstream, clock)
+        asyncio.run(refresher.refresh_once())
+        respond = upstream.respond
+
+        def failing(endpoint, query):
+            if query.get("ProvinceCode") == ["50"]:
+                return None
+            return respond(endpoint, query)
+
+        upstream.respond = failing
+        upstream.last_update = "2024-01-02T06:00:00"
+        upstream.products = [{"productName": "Product 0", "amount": 41.0}]
+        assert asyncio.run(refresher.refresh_once())
+        stale = refresher.snapshot.get("50")
+        assert stale["lastUpdate"] == "2024-01-01T06:00:00"
+        assert stale["stale"] is True
+        assert "stale" not in refresher.snapshot.get("34")
+        assert refresher.snapshot.outdated() == ["50"]
+        assert not asyncio.run(refresher.refresh_once())
+
+        upstream.respond = respond
+        prices = upstream.count("prices")
+        assert asyncio.run(refresher.refresh_once())
+        assert upstream.count("prices") == prices + 1
+        fresh = refresher.snapshot.get("50")
+        assert fresh["prices"] == [{"name": "Product 0", "amount": 41.0}]
+        assert "stale" not in fresh
+        assert refresher.snapshot.outdated() == []
+        assert not asyncio.run(refresher.refresh_once())
@@ -0,0 +1,50 @@
+import pytest
+from opet import serialization
+from opet.serialization import (
+    available_backends, configure, dumps, dumps_bytes, resolve_backend
+)
+
+DATA = {"province": "İstanbul", "prices": [{"name": "A", "amount": 40.5}]}
+
+
+@pytest.fixture(autouse=True)
+def reset(monkeypatch):
+    """Fixture restoring the module defaults after each test."""
+    monkeypatch.setattr(serialization, "_settings", {})
+    monkeypatch.setattr(serialization, "_encoders", {})
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_modes(backend):
+    """Test that every backend produces the same text in both modes."""
+    assert dumps(DATA, "compact", backend) == (
+        '{"province":"İstanbul","prices":[{"name":"A","amount":40.5}]}'
+    )
+    assert dumps(DATA, "pretty", backend).startswith(
+        '{\n  "province": "İstanbul",\n  "prices": [\n    {\n'
+    )
+    assert dumps_bytes(DATA, "compact", backend) == (
+        dumps(DATA, "compact", backend).encode("utf-8")
+    )
+
+
+def test_defaults_from_env(monkeypatch):
+    """Test that the environment selects the default backend and mode."""
+    monkeypatch.setenv("OPET_JSON_BACKEND", "json")
+    monkeypatch.setenv("OPET_JSON_MODE", "compact")
+    assert resolve_backend() == "json"
+    assert dumps({"a": 1}) == '{"a":1}'
+    configure(mode="pretty")
+    assert dumps({"a": 1}) == '{\n  "a": 1\n}'
+
+
+def test_unknown_backend_and_mode():
+    """Test that unknown names are rejected."""
+    with pytest.raises(ValueError):
+        configure(backend="ujson")
+    with pytest.raises(ValueError):
+        configure(mode="tight")
+    with pytest.raises(ValueError):
+        dumps(DATA, backend="ujson")
+    with pytest.raises(ValueError):
+        dumps(DATA, mode="tight")
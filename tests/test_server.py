@@ -0,0 +1,397 @@
+import asyncio
+import json
+import time
+import threading
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from opet.async_api import AsyncOpetApiClient
+from opet.history import PriceHistory
+from opet.server.compression import CompressionMiddleware
+from opet.server.controllers.fuel import FuelController
+from opet.server.providers.opet import OpetProvider, render_json
+from opet.server.refresher import SnapshotRefresher
+from opet.server.settings import Settings
+from tests.stub_upstream import StubUpstream
+
+
+def make_app(upstream):
+    """Builds an app whose provider talks to the stub upstream."""
+    client = AsyncOpetApiClient()
+    client.url = upstream.url
+    app = FastAPI()
+    app.include_router(FuelController(OpetProvider(client)).router)
+    return app
+
+
+@pytest.fixture
+def upstream():
+    """Fixture for a local stub of the Opet API."""
+    with StubUpstream(product_count=2) as stub:
+        yield stub
+
+
+async def get_many(app, paths):
+    """Sends all requests to the app concurrently."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://test"
+    ) as client:
+        return await asyncio.gather(*(client.get(p) for p in paths))
+
+
+def test_get_prices(upstream):
+    """Test the prices endpoint end to end."""
+    response, = asyncio.run(get_many(make_app(upstream), ["/fuel/prices/34"]))
+    assert response.status_code == 200
+    assert response.json() == {
+        "province": "IL 34",
+        "lastUpdate": upstream.last_update,
+        "prices": [
+            {"name": "Product 0", "amount": 40.0},
+            {"name": "Product 1", "amount": 41.5}
+        ]
+    }
+
+
+def test_compression(upstream):
+    """Test that large responses are gzipped but event streams are not."""
+    app = make_app(upstream)
+    app.add_middleware(CompressionMiddleware, minimum_size=1000)
+
+    @app.get("/events")
+    async def events():
+        return StreamingResponse(
+            iter(["data: 1\n\n"] * 200), media_type="text/event-stream"
+        )
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            headers = {"Accept-Encoding": "gzip"}
+            responses = await asyncio.gather(
+                client.get("/fuel/prices", headers=headers),
+                client.get("/fuel/prices/34", headers=headers),
+                client.get("/events", headers=headers)
+            )
+            revalidated = await client.get("/fuel/prices", headers={
+                "Accept-Encoding": "gzip",
+                "If-None-Match": responses[0].headers["ETag"]
+            })
+            plain = await client.get(
+                "/fuel/prices", headers={"Accept-Encoding": "identity"}
+            )
+            return responses + [revalidated, plain]
+
+    bulk, single, stream, revalidated, plain = asyncio.run(run())
+    assert bulk.headers["content-encoding"] == "gzip"
+    assert bulk.headers["ETag"].endswith('-gzip"')
+    assert plain.headers["ETag"] != bulk.headers["ETag"]
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == bulk.headers["ETag"]
+    assert not single.headers["ETag"].endswith('-gzip"')
+    assert len(bulk.json()["results"]) == 81
+    assert "content-encoding" not in single.headers
+    assert "content-encoding" not in stream.headers
+    assert stream.text == "data: 1\n\n" * 200
+
+
+def test_compare_defaults_to_opet(upstream):
+    """Test that the compare endpoint queries the Opet provider."""
+    response, = asyncio.run(
+        get_many(make_app(upstream), ["/fuel/compare/34"])
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body["results"]) == ["opet"]
+    assert body["prices"][0] == {
+        "vendor": "opet", "name": "Product 0", "amount": 40.0
+    }
+
+
+def test_stats_endpoints(upstream):
+    """Test the nationwide stats and cheapest province endpoints."""
+    app = make_app(upstream)
+    stats, cheapest, missing = asyncio.run(get_many(app, [
+        "/fuel/stats?fuel_type=product 0",
+        "/fuel/cheapest/Product 1?limit=3&order=desc",
+        "/fuel/cheapest/lpg"
+    ]))
+    assert stats.json()["products"] == [{
+        "product": "Product 0", "count": 81, "min": 40.0, "max": 40.0,
+        "mean": 40.0, "median": 40.0
+    }]
+    assert stats.json()["lastUpdate"] == upstream.last_update
+    results = cheapest.json()["results"]
+    assert len(results) == 3
+    assert results[0]["product"] == "Product 1"
+    assert missing.status_code == 404
+    assert upstream.count("prices") == 81
+    validations = upstream.count("lastupdate")
+    again, = asyncio.run(get_many(app, ["/fuel/stats"]))
+    assert again.status_code == 200
+    assert upstream.count("lastupdate") == validations
+
+
+def test_get_prices_unknown_province(upstream):
+    """Test that an unknown plate code returns 404."""
+    response, = asyncio.run(get_many(make_app(upstream), ["/fuel/prices/99"]))
+    assert response.status_code == 404
+
+
+def test_concurrent_requests_do_not_serialize(upstream):
+    """Load test: slow upstream calls must not block the event loop."""
+    upstream.latency = 0.2
+    app = make_app(upstream)
+    paths = [f"/fuel/prices/{code}" for code in range(1, 21)]
+    asyncio.run(get_many(app, ["/fuel/last-update"]))
+    started = time.perf_counter()
+    responses = asyncio.run(get_many(app, paths))
+    elapsed = time.perf_counter() - started
+    assert all(r.status_code == 200 for r in responses)
+    # Serialized, 20 requests with at least one 0.2s round trip each would
+    # take 4s or more.
+    assert elapsed < 2.0
+
+
+def test_get_all_prices(upstream):
+    """Test the bulk prices endpoint."""
+    response, = asyncio.run(get_many(make_app(upstream), ["/fuel/prices"]))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["lastUpdate"] == upstream.last_update
+    assert len(body["results"]) == 81
+    assert body["errors"] == {}
+    assert upstream.count("lastupdate") == 1
+
+
+def test_get_prices_batch(upstream):
+    """Test that ids fetches only the given provinces in one response."""
+    response, = asyncio.run(get_many(
+        make_app(upstream), ["/fuel/prices?ids=34,06,99&fuel_type=product 1"]
+    ))
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body["results"]) == ["34", "6"]
+    assert body["results"]["6"]["prices"] == [
+        {"name": "Product 1", "amount": 41.5}
+    ]
+    assert "99" in body["errors"]
+    assert upstream.count("lastupdate") == 1
+    assert upstream.count("prices") == 2
+
+
+def test_get_prices_filtered(upstream):
+    """Test fuel_type and fields on the single province endpoint."""
+    responses = asyncio.run(get_many(make_app(upstream), [
+        "/fuel/prices/34?fuel_type=product 1&fields=province,prices",
+        "/fuel/prices/34?fields=amount"
+    ]))
+    assert responses[0].json() == {
+        "province": "IL 34",
+        "prices": [{"name": "Product 1", "amount": 41.5}]
+    }
+    assert responses[1].status_code == 422
+
+
+def test_post_prices_batch(upstream):
+    """Test the batch endpoint with a per-province fuel type."""
+    async def post():
+        transport = httpx.ASGITransport(app=make_app(upstream))
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await client.post("/fuel/prices", json=[
+                {"province_id": "34", "fuel_type": "Product 0"},
+                {"province_id": "35"}
+            ])
+
+    response = asyncio.run(post())
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results["34"]["prices"] == [{"name": "Product 0", "amount": 40.0}]
+    assert len(results["35"]["prices"]) == 2
+
+
+def test_get_prices_prerendered(upstream):
+    """Test that prerendered responses match and are reused."""
+    client = AsyncOpetApiClient()
+    client.url = upstream.url
+    provider = OpetProvider(client, prerender=True)
+    app = FastAPI()
+    app.include_router(FuelController(provider).router)
+    first, second = asyncio.run(
+        get_many(app, ["/fuel/prices/34", "/fuel/prices/34"])
+    )
+    assert first.status_code == 200
+    assert first.headers["content-type"] == "application/json"
+    assert first.content == second.content
+    assert first.json()["province"] == "IL 34"
+    result = asyncio.run(client.price_result("34"))
+    body = provider.render(result)
+    assert provider.render(asyncio.run(client.price_result("34"))) is body
+    assert provider.render(dict(result, stale=True)) is not body
+    newer = dict(result, lastUpdate="2024-02-01T06:00:00")
+    assert provider.render(newer) == render_json(newer)
+
+
+def test_served_from_snapshot(upstream):
+    """Test that a loaded snapshot answers without upstream requests."""
+    client = AsyncOpetApiClient()
+    client.url = upstream.url
+    refresher = SnapshotRefresher(client, poll_interval=60)
+    asyncio.run(refresher.refresh_once())
+    app = FastAPI()
+    app.include_router(
+        FuelController(OpetProvider(client), refresher).router
+    )
+    hits = dict(upstream.hits)
+    responses = asyncio.run(get_many(app, [
+        "/fuel/prices/34", "/fuel/prices", "/fuel/provinces",
+        "/fuel/last-update", "/fuel/prices?ids=34,35"
+    ]))
+    assert upstream.hits == hits
+    assert all(r.status_code == 200 for r in responses)
+    assert responses[0].json()["province"] == "IL 34"
+    assert responses[0].headers["X-Snapshot-Stale"] == "false"
+    assert int(responses[0].headers["X-Snapshot-Age"]) >= 0
+    assert len(responses[1].json()["results"]) == 81
+    assert len(responses[2].json()) == 81
+    assert responses[3].json() == {"lastUpdateDate": upstream.last_update}
+    assert list(responses[4].json()["results"]) == ["34", "35"]
+
+
+def test_settings_from_env(monkeypatch):
+    """Test that server settings are read from OPET_* variables."""
+    monkeypatch.setenv("OPET_REFRESH", "true")
+    monkeypatch.setenv("OPET_POLL_INTERVAL", "30")
+    monkeypatch.setenv("OPET_GZIP", "off")
+    monkeypatch.setenv("OPET_RATE_LIMIT", "5")
+    settings = Settings.from_env()
+    assert settings.refresh_enabled
+    assert settings.poll_interval == 30
+    assert settings.stale_after == 90
+    assert not settings.prerender
+    assert not settings.gzip_enabled
+    assert settings.gzip_min_size == 1000
+    assert settings.rate_limit == 5
+    assert settings.rate_burst is None
+    assert settings.max_in_flight == 256
+    assert settings.upstream_rate == 0
+
+
+def test_conditional_requests(upstream):
+    """Test ETag/Last-Modified headers and 304 answers from the cache."""
+    app = make_app(upstream)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            first = await client.get("/fuel/prices/34")
+            hits = dict(upstream.hits)
+            by_etag = await client.get(
+                "/fuel/prices/34",
+                headers={"If-None-Match": first.headers["ETag"]}
+            )
+            by_date = await client.get(
+                "/fuel/prices/34",
+                headers={"If-Modified-Since": first.headers["Last-Modified"]}
+            )
+            changed = await client.get(
+                "/fuel/prices/34", headers={"If-None-Match": '"other"'}
+            )
+            return first, by_etag, by_date, changed, hits
+
+    first, by_etag, by_date, changed, hits = asyncio.run(run())
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "public, max-age=60"
+    assert first.headers["Last-Modified"] == "Mon, 01 Jan 2024 03:00:00 GMT"
+    assert by_etag.status_code == 304
+    assert by_etag.content == b""
+    assert by_etag.headers["ETag"] == first.headers["ETag"]
+    assert by_date.status_code == 304
+    assert changed.status_code == 200
+    assert changed.content == first.content
+    assert upstream.hits == hits
+
+
+def test_history_endpoint(upstream, tmp_path, mocker):
+    """Test that fetched prices can be queried from the history endpoint."""
+    history = PriceHistory(str(tmp_path / "history.sqlite3"))
+    threads = []
+    query = history.query
+
+    def spy(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return query(*args, **kwargs)
+
+    mocker.patch.object(history, "query", side_effect=spy)
+    client = AsyncOpetApiClient(history=history)
+    client.url = upstream.url
+    app = FastAPI()
+    app.include_router(
+        FuelController(OpetProvider(client), history=history).router
+    )
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as http:
+            await http.get("/fuel/prices/34")
+            return await asyncio.gather(
+                http.get("/fuel/history/034"),
+                http.get(
+                    "/fuel/history/34",
+                    params={"product": "Product 1", "since": "2024-01-01"}
+                ),
+                http.get("/fuel/history/34", params={"until": "2023-12-31"})
+            )
+
+    full, product, before = asyncio.run(run())
+    assert full.status_code == 200
+    assert full.json() == {
+        "province": "34",
+        "records": [
+            {"product": "Product 0", "amount": 40.0,
+             "lastUpdate": upstream.last_update},
+            {"product": "Product 1", "amount": 41.5,
+             "lastUpdate": upstream.last_update}
+        ]
+    }
+    assert full.headers["Last-Modified"] == "Mon, 01 Jan 2024 03:00:00 GMT"
+    assert [r["product"] for r in product.json()["records"]] == ["Product 1"]
+    assert before.json()["records"] == []
+    # SQLite reads run in worker threads, off the event loop.
+    assert len(threads) == 3 and threading.get_ident() not in threads
+    history.close()
+
+
+def test_history_endpoint_disabled(upstream):
+    """Test that the history endpoint returns 404 without a history."""
+    response, = asyncio.run(get_many(make_app(upstream), ["/fuel/history/34"]))
+    assert response.status_code == 404
+
+
+def test_export_streams_rows(upstream):
+    """Test that the export endpoint streams one row per price."""
+    app = make_app(upstream)
+    ndjson, csv_response, invalid = asyncio.run(get_many(app, [
+        "/fuel/export", "/fuel/export?format=csv", "/fuel/export?format=xml"
+    ]))
+
+    assert ndjson.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in ndjson.text.splitlines()]
+    assert len(rows) == 81 * 2
+    assert {"province": "34", "product": "Product 1", "amount": 41.5,
+            "lastUpdate": upstream.last_update} in rows
+    assert csv_response.headers["content-type"].startswith("text/csv")
+    lines = csv_response.text.splitlines()
+    assert lines[0] == "province,product,amount,lastUpdate"
+    assert len(lines) == 1 + 81 * 2
+    assert invalid.status_code == 422
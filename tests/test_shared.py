@@ -0,0 +1,112 @@
+import asyncio
+import threading
+from opet.async_api import AsyncOpetApiClient
+from opet.server.refresher import PriceSnapshot, SnapshotRefresher
+from opet.server.shared import SharedSnapshotStore
+from tests.stub_upstream import StubUpstream
+
+
+def make_refresher(upstream, store):
+    client = AsyncOpetApiClient()
+    client.url = upstream.url
+    return SnapshotRefresher(client, poll_interval=10, store=store)
+
+
+def test_publish_and_load(tmp_path):
+    """Test that a published snapshot is loaded back unchanged."""
+    store = SharedSnapshotStore(str(tmp_path / "snapshot.sqlite3"))
+    assert store.version() == 0
+    assert store.load() is None
+    snapshot = PriceSnapshot(
+        "2024-01-01T06:00:00",
+        [{"code": "034", "name": "İSTANBUL"}],
+        {"34": {"province": "İSTANBUL", "lastUpdate": "2024-01-01T06:00:00",
+                "prices": [{"name": "Kurşunsuz Benzin", "amount": 42.5}]}},
+        1000.0
+    )
+    assert store.publish(snapshot) == 1
+    version, loaded = store.load()
+    assert version == 1
+    assert loaded.last_update == snapshot.last_update
+    assert loaded.provinces == snapshot.provinces
+    assert loaded.results == snapshot.results
+    assert store.load(newer_than=1) is None
+
+    store.touch(1050.0)
+    assert store.checked_at() == 1050.0
+    store.close()
+
+
+def test_single_leader(tmp_path):
+    """Test that only one store on a path holds the leadership."""
+    path = str(tmp_path / "snapshot.sqlite3")
+    first = SharedSnapshotStore(path)
+    second = SharedSnapshotStore(path)
+    assert first.try_lead()
+    assert not second.try_lead()
+    assert first.is_leader and not second.is_leader
+    first.close()
+    assert second.try_lead()
+    second.close()
+
+
+def test_follower_serves_leader_snapshot(tmp_path):
+    """Test that only the leader polls upstream and followers sync."""
+    path = str(tmp_path / "snapshot.sqlite3")
+    with StubUpstream(product_count=1) as upstream:
+        leader = make_refresher(upstream, SharedSnapshotStore(path))
+        follower = make_refresher(upstream, SharedSnapshotStore(path))
+
+        assert asyncio.run(leader.tick()) == leader.poll_interval
+        assert upstream.count("prices") == 81
+        hits = sum(upstream.hits.values())
+
+        assert asyncio.run(follower.tick()) == follower.sync_interval
+        assert sum(upstream.hits.values()) == hits
+        assert len(follower.snapshot.results) == 81
+        assert follower.snapshot.last_update == leader.snapshot.last_update
+
+        upstream.last_update = "2024-01-02T06:00:00"
+        asyncio.run(leader.tick())
+        asyncio.run(follower.tick())
+        assert follower.snapshot.last_update == "2024-01-02T06:00:00"
+        assert upstream.count("prices") == 162
+
+        leader.store.close()
+        follower.store.close()
+
+
+def test_new_leader_reuses_published_snapshot(tmp_path):
+    """Test that a restarted leader does not refetch unchanged prices."""
+    path = str(tmp_path / "snapshot.sqlite3")
+    with StubUpstream(product_count=1) as upstream:
+        first = make_refresher(upstream, SharedSnapshotStore(path))
+        asyncio.run(first.tick())
+        first.store.close()
+
+        second = make_refresher(upstream, SharedSnapshotStore(path))
+        asyncio.run(second.tick())
+        assert upstream.count("prices") == 81
+        assert len(second.snapshot.results) == 81
+        second.store.close()
+
+
+def test_store_is_read_off_the_event_loop(tmp_path, mocker):
+    """Test that a follower tick does not block the event loop on SQLite."""
+    path = str(tmp_path / "snapshot.sqlite3")
+    leader = SharedSnapshotStore(path)
+    assert leader.try_lead()
+    with StubUpstream(product_count=1) as upstream:
+        follower = make_refresher(upstream, SharedSnapshotStore(path))
+        threads = []
+        load = follower.store.load
+
+        def spy(*args):
+            threads.append(threading.get_ident())
+            return load(*args)
+
+        mocker.patch.object(follower.store, "load", side_effect=spy)
+        assert asyncio.run(follower.tick()) == follower.sync_interval
+        assert threads and threading.get_ident() not in threads
+        follower.store.close()
+    leader.close()
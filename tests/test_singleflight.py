@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from opet.singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_sync_calls_are_coalesced():
+    """Test that concurrent threads share the leader's result."""
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return {"value": 1}
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(flight.do, "key", slow) for _ in range(4)]
+        while flight.stats()["coalesced"] < 3:
+            time.sleep(0.001)
+        release.set()
+        results = [f.result() for f in futures]
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"calls": 4, "coalesced": 3, "in_flight": 0}
+
+
+def test_sync_exception_is_shared():
+    """Test that waiters receive the leader's exception."""
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(flight.do, "k", failing) for _ in range(2)]
+        while flight.stats()["coalesced"] < 1:
+            time.sleep(0.001)
+        release.set()
+        for future in futures:
+            with pytest.raises(ValueError, match="boom"):
+                future.result()
+
+
+def test_async_calls_are_coalesced():
+    """Test that concurrent tasks share the leader's result."""
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return [1, 2]
+
+    async def run():
+        return await asyncio.gather(
+            *(flight.do("key", slow) for _ in range(5)),
+            flight.do("other", slow)
+        )
+
+    results = asyncio.run(run())
+    assert len(calls) == 2
+    assert results[:5] == [[1, 2]] * 5
+    assert flight.stats() == {"calls": 6, "coalesced": 4, "in_flight": 0}
+
+
+def test_async_exception_is_shared():
+    """Test that waiting tasks receive the leader's exception."""
+    flight = AsyncSingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    async def run():
+        return await asyncio.gather(
+            *(flight.do("key", failing) for _ in range(3)),
+            return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_async_leader_cancellation_does_not_cancel_followers():
+    """Test that cancelling the leader leaves the shared call running."""
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def run():
+        leader = asyncio.ensure_future(flight.do("key", slow))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == "ok"
+    assert len(calls) == 1
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,61 @@
+import subprocess
+import sys
+
+
+HEAVY_MODULES = (
+    "requests", "urllib3", "httpx", "fastapi", "pydantic", "starlette",
+    "uvicorn", "asyncio", "concurrent.futures"
+)
+
+# Cumulative import time of opet.main, in microseconds. Importing the CLI
+# takes about 30 ms, most of it click; the HTTP or server stacks add
+# several times that.
+IMPORT_BUDGET_US = 150_000
+
+
+def _imported_modules(statement):
+    """Returns the modules a fresh interpreter loads for `statement`."""
+    code = statement + "; import sys; print('\\n'.join(sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return set(output.split())
+
+
+def test_cli_import_skips_heavy_modules():
+    """Importing the CLI must not load the HTTP or server stacks."""
+    modules = _imported_modules("import opet.main")
+
+    assert "opet.api" not in modules
+    assert [name for name in HEAVY_MODULES if name in modules] == []
+
+
+def test_client_creation_skips_heavy_modules():
+    """Creating a client makes no request and imports no HTTP library."""
+    modules = _imported_modules(
+        "from opet.api import OpetApiClient; OpetApiClient()"
+    )
+
+    assert [name for name in HEAVY_MODULES if name in modules] == []
+
+
+def _import_time(module):
+    """Returns the cumulative `-X importtime` of `module` in microseconds."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    ).stderr
+    for line in stderr.splitlines():
+        fields = [field.strip() for field in line.split("|")]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    raise AssertionError(f"{module} missing from -X importtime output")
+
+
+def test_cli_import_time_budget():
+    """Importing the CLI must stay within the startup budget."""
+    # The best of a few runs, so a busy machine does not fail the test.
+    best = min(_import_time("opet.main") for _ in range(3))
+
+    assert best < IMPORT_BUDGET_US
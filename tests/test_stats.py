@@ -0,0 +1,124 @@
+from opet.stats import PriceStats
+
+
+def result(name, last_update="2024-01-01T06:00:00", **prices):
+    return {
+        "province": name,
+        "lastUpdate": last_update,
+        "prices": [
+            {"name": product.replace("_", " "), "amount": amount}
+            for product, amount in prices.items()
+        ]
+    }
+
+
+def make_stats():
+    return PriceStats({
+        "1": result("ADANA", Motorin_UltraForce=44.0, Benzin=42.0),
+        "6": result("ANKARA", Motorin_UltraForce=43.0, Benzin=41.0),
+        "34": result("İSTANBUL", Motorin_UltraForce=45.0,
+                     Motorin_EcoForce=42.5),
+    })
+
+
+def test_stats():
+    """Test the per-product aggregates."""
+    stats = make_stats()
+    assert stats.products() == [
+        "Benzin", "Motorin EcoForce", "Motorin UltraForce"
+    ]
+    assert stats.stats("Motorin UltraForce") == {
+        "product": "Motorin UltraForce",
+        "count": 3,
+        "min": 43.0,
+        "max": 45.0,
+        "mean": 44.0,
+        "median": 44.0
+    }
+    assert stats.stats("Benzin")["median"] == 41.5
+    assert stats.stats("LPG") is None
+    assert [s["product"] for s in stats.all_stats("motorin")] == [
+        "Motorin EcoForce", "Motorin UltraForce"
+    ]
+
+
+def test_cheapest():
+    """Test ranking by exact product name and by fuel type."""
+    stats = make_stats()
+    assert [r["code"] for r in stats.cheapest("motorin ultraforce")] == [
+        "6", "1", "34"
+    ]
+    assert stats.cheapest("motorin", 2) == [
+        {"code": "34", "province": "İSTANBUL",
+         "product": "Motorin EcoForce", "amount": 42.5},
+        {"code": "6", "province": "ANKARA",
+         "product": "Motorin UltraForce", "amount": 43.0}
+    ]
+    assert stats.cheapest("benzin", 1, most_expensive=True)[0]["code"] == "1"
+    assert stats.cheapest("lpg") == []
+
+
+def test_incremental_update():
+    """Test that replacing a province only changes its own entries."""
+    stats = make_stats()
+    assert not stats.update(
+        "6", result("ANKARA", Motorin_UltraForce=43.0, Benzin=41.0)
+    )
+    assert stats.update("6", result("ANKARA", Motorin_UltraForce=46.0))
+    assert stats.stats("Motorin UltraForce")["max"] == 46.0
+    assert stats.stats("Benzin")["count"] == 1
+    stats.remove("1")
+    assert stats.stats("Benzin") is None
+    assert len(stats) == 2
+
+
+def test_new_update_clears_index():
+    """Test that provinces of an older update are not aggregated."""
+    stats = make_stats()
+    assert stats.update(
+        "6", result("ANKARA", "2024-01-02T06:00:00", Motorin_UltraForce=46.0)
+    )
+    assert stats.last_update == "2024-01-02T06:00:00"
+    assert len(stats) == 1
+    assert stats.stats("Motorin UltraForce")["count"] == 1
+    stats.update("1", result("ADANA", Benzin=42.0))
+    assert stats.covers(["1", "6"])
+    assert stats.last_update == "2024-01-02T06:00:00"
+    stats.revalidate("2024-01-03T06:00:00")
+    assert not stats and not stats.covers(["1"])
+
+
+def test_client_cheapest():
+    """Test that client queries read the index after the first one."""
+    from opet.api import OpetApiClient
+    from tests.stub_upstream import StubUpstream
+
+    with StubUpstream(product_count=2) as upstream:
+        client = OpetApiClient()
+        client.url = upstream.url
+        stats = client.price_stats()
+        assert [s["count"] for s in stats] == [81, 81]
+        assert upstream.count("prices") == 81
+        cheapest = client.cheapest("product 1", 3)
+        assert [r["amount"] for r in cheapest] == [41.5, 41.5, 41.5]
+        assert upstream.count("prices") == 81
+        assert upstream.count("lastupdate") == 1
+
+
+def test_client_stats_cover_every_province():
+    """Test that one fetched province is not reported as nationwide."""
+    from opet.api import OpetApiClient
+    from opet.cache import PriceCache
+    from tests.stub_upstream import StubUpstream
+
+    with StubUpstream(product_count=1) as upstream:
+        # With no TTL, every query confirms `lastUpdate` first.
+        client = OpetApiClient(cache=PriceCache(ttl=0))
+        client.url = upstream.url
+        client.price_result("34")
+        assert client.price_stats()[0]["count"] == 81
+        assert upstream.count("prices") == 81
+        upstream.last_update = "2024-02-01T06:00:00"
+        assert client.price_stats()[0]["count"] == 81
+        assert upstream.count("prices") == 162
+        assert client.stats.last_update == "2024-02-01T06:00:00"
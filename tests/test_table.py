@@ -0,0 +1,118 @@
+import math
+import pytest
+from opet.cache import PriceCache
+from opet.server.models.fuel import PriceResponse
+from opet.server.refresher import PriceSnapshot
+from opet.table import PriceTable
+
+RESULTS = {
+    "34": {
+        "province": "İstanbul",
+        "lastUpdate": "2024-01-01T06:00:00",
+        "prices": [
+            {"name": "Benzin", "amount": 40.5},
+            {"name": "Motorin", "amount": 41.0}
+        ]
+    },
+    "06": {
+        "province": "Ankara",
+        "lastUpdate": "2024-01-01T06:00:00",
+        "prices": [
+            {"name": "Motorin", "amount": 41.2},
+            {"name": "LPG", "amount": 20.1}
+        ]
+    }
+}
+
+
+@pytest.fixture
+def table():
+    """Fixture for a table built from two provinces."""
+    return PriceTable.from_results(RESULTS)
+
+
+def test_layout(table):
+    """Test that products are interned columns of a flat array."""
+    assert table.last_update == "2024-01-01T06:00:00"
+    assert table.codes == ("34", "6")
+    assert table.products == ("Benzin", "Motorin", "LPG")
+    assert table.amounts.typecode == "d"
+    assert list(table.amounts[:2]) == [40.5, 41.0]
+    assert math.isnan(table.amounts[2]) and math.isnan(table.amounts[3])
+    assert list(table.amounts[4:]) == [41.2, 20.1]
+    assert table.nbytes == 6 * 8
+    assert len(table) == 2
+    assert "006" in table and "35" not in table
+
+
+def test_lookups(table):
+    """Test single prices and product columns."""
+    assert table.amount("6", "LPG") == 20.1
+    assert table.amount("34", "LPG") is None
+    assert table.amount("34", "Missing") is None
+    assert table.column("Motorin") == {"34": 41.0, "6": 41.2}
+    assert table.column("Missing") == {}
+    with pytest.raises(KeyError):
+        table.prices("35")
+
+
+def test_round_trip(table):
+    """Test conversion back to price results and pydantic models."""
+    assert table.result("06") == RESULTS["06"]
+    assert table.to_results() == {"34": RESULTS["34"], "6": RESULTS["06"]}
+    assert PriceTable.from_results(table.to_results()) == table
+
+    model = PriceResponse.from_table(table, "34")
+    assert model.prices[1].name == "Motorin"
+    assert PriceTable.from_results({"34": model.model_dump()}).result(
+        "34"
+    ) == RESULTS["34"]
+
+
+def test_from_bulk():
+    """Test building a table from a bulk result."""
+    table = PriceTable.from_bulk(
+        {"lastUpdate": "2024-01-02T06:00:00", "results": {}, "errors": {}}
+    )
+    assert len(table) == 0
+    assert table.last_update == "2024-01-02T06:00:00"
+    assert table.to_results() == {}
+
+
+def test_rows_keep_their_update():
+    """Test that rows from an earlier update keep their lastUpdate."""
+    results = {
+        "34": RESULTS["34"],
+        "6": {**RESULTS["06"], "lastUpdate": "2024-01-02T06:00:00"}
+    }
+    table = PriceTable.from_results(results)
+    assert table.last_update == "2024-01-02T06:00:00"
+    assert table.updates == ("2024-01-01T06:00:00", "2024-01-02T06:00:00")
+    assert table.to_results() == results
+    assert table.get("35") is None
+
+
+def test_snapshot_and_cache_store_tables():
+    """Test that the snapshot and the price cache hold tables."""
+    snapshot = PriceSnapshot("2024-01-01T06:00:00", [], RESULTS, 0.0)
+    assert isinstance(snapshot.table, PriceTable)
+    assert snapshot.get("006") == RESULTS["06"]
+    assert snapshot.results == {"34": RESULTS["34"], "6": RESULTS["06"]}
+
+    cache = PriceCache()
+    cache.put("34", RESULTS["34"])
+    assert isinstance(cache._entries["34"].value, PriceTable)
+    first = cache.get("34")
+    assert first == RESULTS["34"]
+    assert first is not cache.get("34")
+
+
+def test_size_mismatch():
+    """Test that inconsistent columns are rejected."""
+    amounts = PriceTable.from_results(RESULTS).amounts
+    with pytest.raises(ValueError):
+        PriceTable("", ["34"], ["İstanbul"], ["Benzin"], amounts)
+    with pytest.raises(ValueError):
+        PriceTable("", ["34"], [], ["Benzin"], amounts)
+    with pytest.raises(ValueError):
+        PriceTable("", [], [], [], amounts[:0], ["x"])
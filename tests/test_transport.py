@@ -0,0 +1,107 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from opet.exceptions import Http200Error
+from opet.utils import http_get
+from opet.transport import (
+    DEFAULT_HEADERS,
+    HttpTransport,
+    get_default_transport,
+    set_default_transport
+)
+from tests.stub_upstream import StubUpstream
+
+
+@pytest.fixture
+def upstream():
+    """Fixture for a local stub of the Opet API."""
+    with StubUpstream() as stub:
+        yield stub
+
+
+def test_connections_are_reused(upstream):
+    """Test that consecutive requests share one keep-alive connection."""
+    with HttpTransport() as transport:
+        transport.get(f"{upstream.url}/provinces")
+        transport.get(f"{upstream.url}/lastupdate")
+        transport.get(f"{upstream.url}/prices?ProvinceCode=34")
+        assert transport.stats() == {
+            "requests": 3,
+            "connections_opened": 1,
+            "connections_reused": 2,
+            "coalesced": 0
+        }
+
+
+def test_non_200_raises_after_retries(upstream):
+    """Test that retryable statuses are retried before failing."""
+    upstream.fail_status = 503
+    transport = HttpTransport(retries=2, backoff_factor=0)
+    with pytest.raises(Http200Error, match="status code 503"):
+        transport.get(f"{upstream.url}/lastupdate")
+    assert upstream.count("lastupdate") == 3
+
+
+def test_per_request_timeout(mocker):
+    """Test that a per-request timeout overrides the default."""
+    mock_response = mocker.Mock(status_code=200)
+    mock_response.json.return_value = []
+    mock_get = mocker.patch(
+        'requests.Session.get', return_value=mock_response
+    )
+    transport = HttpTransport(connect_timeout=1.0, read_timeout=2.0)
+    transport.get("http://testurl.com")
+    transport.get("http://testurl.com", timeout=(0.5, 0.5))
+    assert mock_get.call_args_list[0].kwargs["timeout"] == (1.0, 2.0)
+    assert mock_get.call_args_list[1].kwargs["timeout"] == (0.5, 0.5)
+
+
+def test_default_transport_is_shared():
+    """Test that the default transport is created once and replaceable."""
+    set_default_transport(None)
+    first = get_default_transport()
+    assert get_default_transport() is first
+    replacement = HttpTransport()
+    set_default_transport(replacement)
+    assert get_default_transport() is replacement
+    set_default_transport(None)
+
+
+def test_concurrent_identical_requests_coalesce(upstream):
+    """Test that identical in-flight requests share one upstream call."""
+    upstream.latency = 0.2
+    url = f"{upstream.url}/prices?ProvinceCode=34"
+    with HttpTransport() as transport:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(transport.get, [url] * 8))
+        assert all(result == results[0] for result in results)
+        assert upstream.count("prices") == 1
+        assert transport.stats()["coalesced"] == 7
+
+
+def test_session_get_arguments(mocker):
+    """Test that the transport sends headers, timeouts and TLS options."""
+    mock_response = mocker.Mock()
+    mock_response.status_code = 200
+    mock_response.json.return_value = {"key": "value"}
+    mock_get = mocker.patch(
+        'requests.Session.get', return_value=mock_response
+    )
+    url = "http://testurl.com"
+    assert http_get(url, transport=HttpTransport()) == {"key": "value"}
+    mock_get.assert_called_once_with(
+        url,
+        headers=DEFAULT_HEADERS,
+        timeout=(3.05, 10.0),
+        verify=True
+    )
+
+
+def test_http_get_uses_default_transport(mocker):
+    """Test that http_get falls back to the shared transport."""
+    mock_transport = mocker.Mock()
+    mock_transport.get.return_value = {"key": "value"}
+    mocker.patch(
+        'opet.utils.get_default_transport', return_value=mock_transport
+    )
+    assert http_get("http://testurl.com") == {"key": "value"}
+    mock_transport.get.assert_called_once_with("http://testurl.com")
@@ -1,4 +1,5 @@
 import pytest
+from opet.transport import HttpTransport
 from opet.utils import http_get, to_json
 from opet.exceptions import Http200Error
 
@@ -21,15 +22,19 @@ def test_http_get_success(mocker):
     mock_response = mocker.Mock()
     mock_response.status_code = 200
     mock_response.json.return_value = {"key": "value"}
-    mock_requests_get = mocker.patch(
-        'requests.get', return_value=mock_response
+    mock_session_get = mocker.patch(
+        'requests.Session.get', return_value=mock_response
         )
+    mocker.patch(
+        'opet.utils.get_default_transport', return_value=HttpTransport()
+    )
     url = "http://testurl.com"
     data = http_get(url)
 
-    mock_requests_get.assert_called_once_with(
+    mock_session_get.assert_called_once_with(
         url,
         headers=EXPECTED_HEADERS,
+        timeout=(3.05, 10.0),
         verify=True
     )
     assert data == {"key": "value"}
@@ -39,7 +44,11 @@ def test_http_get_failure(mocker):
     """Test http_get for a failed request."""
     mock_response = mocker.Mock()
     mock_response.status_code = 500
-    mocker.patch('requests.get', return_value=mock_response)
+    mocker.patch('requests.Session.get', return_value=mock_response)
+    mocker.patch(
+        'opet.utils.get_default_transport',
+        return_value=HttpTransport(retries=0)
+    )
 
     url = "http://testurl.com"
     with pytest.raises(Http200Error):